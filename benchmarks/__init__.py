@@ -0,0 +1,9 @@
+"""
+Performance benchmarks for the Litra Glow control library
+
+Run individual benchmarks from the repository root, e.g.
+``python -m benchmarks.bench_daemon``.
+
+Author: RKaushik
+License: MIT
+"""
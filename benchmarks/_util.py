@@ -0,0 +1,71 @@
+"""
+Shared helpers for the benchmark scripts
+
+Author: RKaushik
+License: MIT
+"""
+
+import time
+from typing import Callable, Dict, List
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Get a percentile using nearest-rank on sorted samples.
+
+    Args:
+        samples: Measured values
+        pct: Percentile (0-100)
+
+    Returns:
+        Value at the requested percentile
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def time_calls(func: Callable[[], object], iterations: int, warmup: int = 10) -> List[float]:
+    """
+    Time repeated calls to a function.
+
+    Args:
+        func: Function to call
+        iterations: Number of timed calls
+        warmup: Number of untimed calls made first
+
+    Returns:
+        Per-call latencies in seconds
+    """
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """
+    Summarize latency samples in microseconds.
+
+    Args:
+        samples: Latencies in seconds
+
+    Returns:
+        Dictionary with mean, p50 and p99 in microseconds
+    """
+    return {
+        'mean_us': sum(samples) / len(samples) * 1e6 if samples else 0.0,
+        'p50_us': percentile(samples, 50) * 1e6,
+        'p99_us': percentile(samples, 99) * 1e6,
+    }
+
+
+def format_row(name: str, stats: Dict[str, float]) -> str:
+    """Format a summary as one aligned table row."""
+    return f"{name:<28} mean {stats['mean_us']:>10.2f} us   p50 {stats['p50_us']:>10.2f} us   p99 {stats['p99_us']:>10.2f} us"
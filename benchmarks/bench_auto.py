@@ -0,0 +1,93 @@
+"""
+Auto-brightness loop: throughput and memory over long reading streams
+
+Pipes a synthetic lux signal (a slow day-like swing plus sensor noise)
+through `litra.auto.run()` into an emulated light and reports readings
+per second, peak traced memory and how many writes were suppressed. The
+per-reading cost and the memory peak should not grow with the length of
+the stream.
+
+Usage: python -m benchmarks.bench_auto [--readings N ...] [--max-rate R]
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+import math
+import os
+import random
+import threading
+import time
+import tracemalloc
+
+from litra.auto import AutoBrightness, run as run_auto
+from litra.emulator import EmulatedLitra, EmulatedLitraDevice
+
+
+def _write_signal(fd: int, count: int, seed: int = 1):
+    rng = random.Random(seed)
+    batch = []
+    with os.fdopen(fd, 'w') as stream:
+        for i in range(count):
+            lux = 400 + 350 * math.sin(i * 2 * math.pi / 20000) + rng.gauss(0, 20)
+            batch.append(f"{max(lux, 0):.1f}\n")
+            if len(batch) == 1000:
+                stream.write(''.join(batch))
+                batch = []
+        stream.write(''.join(batch))
+
+
+def run(reading_counts=(10000, 100000, 1000000), max_rate: float = 2.0) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        reading_counts: Stream lengths to measure
+        max_rate: Maximum brightness writes per second
+
+    Returns:
+        Dictionary mapping stream length to readings/s, peak memory and stats
+    """
+    results = {}
+    for count in reading_counts:
+        device = EmulatedLitraDevice(EmulatedLitra())
+        device.connect()
+        controller = AutoBrightness(device, max_rate=max_rate)
+        read_fd, write_fd = os.pipe()
+        writer = threading.Thread(target=_write_signal, args=(write_fd, count))
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        writer.start()
+        run_auto(controller, read_fd)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        writer.join()
+        os.close(read_fd)
+        device.disconnect()
+
+        results[count] = {
+            'readings_per_second': count / elapsed,
+            'peak_kib': peak / 1024.0,
+            'stats': controller.stats.to_dict(),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--readings', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--max-rate', type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'READINGS':>9}  {'READINGS/S':>10}  {'PEAK MEM':>10}  {'WRITES':>6}  {'SUPPRESSED':>10}")
+    for count, result in run(args.readings, args.max_rate).items():
+        stats = result['stats']
+        print(f"{count:>9}  {result['readings_per_second']:>10.0f}  {result['peak_kib']:>7.1f} KiB  "
+              f"{stats['writes']:>6}  {stats['suppressed']:>10}")
+
+
+if __name__ == '__main__':
+    main()
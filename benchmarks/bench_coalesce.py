@@ -0,0 +1,114 @@
+"""
+Slider simulation: direct writes vs. CoalescingWriter
+
+A simulated knob produces brightness updates much faster than the emulated
+light can absorb them (each report costs --latency-ms). Direct writes build
+a backlog that delays the final value; the coalescing writer sends at most
+--max-rate updates per second and lands on the final value right away.
+
+Usage: python -m benchmarks.bench_coalesce [--updates N] [--update-rate HZ]
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+import threading
+import time
+from queue import Queue
+
+from litra.coalesce import CoalescingWriter
+from litra.commands import BRIGHTNESS_REPORTS
+from litra.emulator import EmulatedLitra, EmulatedLitraDevice
+
+
+def _slider_values(count: int):
+    # Sweep up and down across the full range
+    span = 250 - 20
+    return [20 + abs((i * 7) % (2 * span) - span) for i in range(count)]
+
+
+def _drive(submit, values, update_rate: float):
+    period = 1.0 / update_rate
+    start = time.perf_counter()
+    for i, value in enumerate(values):
+        delay = start + i * period - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        submit(value)
+    return time.perf_counter()
+
+
+def run(updates: int = 1000, update_rate: float = 1000.0, latency_ms: float = 5.0,
+        max_rate: float = 50.0) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        updates: Number of slider updates
+        update_rate: Slider updates per second
+        latency_ms: Simulated per-report latency of the light
+        max_rate: CoalescingWriter rate limit
+
+    Returns:
+        Dictionary with results for the 'direct' and 'coalesced' paths
+    """
+    values = _slider_values(updates)
+    results = {}
+
+    # Direct: a writer thread drains an unbounded queue, like a naive event loop would
+    light = EmulatedLitra(report_latency=latency_ms / 1000.0)
+    with EmulatedLitraDevice(light) as device:
+        queue = Queue()
+
+        def drain():
+            while True:
+                value = queue.get()
+                if value is None:
+                    return
+                device.write(BRIGHTNESS_REPORTS[value])
+
+        worker = threading.Thread(target=drain)
+        worker.start()
+        done = _drive(queue.put, values, update_rate)
+        queue.put(None)
+        worker.join()
+        results['direct'] = {
+            'writes': light.writes,
+            'settle_ms': (time.perf_counter() - done) * 1000.0,
+            'final_ok': light.brightness_lumen == values[-1],
+        }
+
+    light = EmulatedLitra(report_latency=latency_ms / 1000.0)
+    with EmulatedLitraDevice(light) as device:
+        writer = CoalescingWriter(device, max_rate=max_rate)
+        done = _drive(writer.set_brightness, values, update_rate)
+        writer.flush()
+        settle_ms = (time.perf_counter() - done) * 1000.0
+        writer.close()
+        results['coalesced'] = dict(writer.stats(), writes=light.writes, settle_ms=settle_ms,
+                                    final_ok=light.brightness_lumen == values[-1])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--updates', type=int, default=1000)
+    parser.add_argument('--update-rate', type=float, default=1000.0)
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    parser.add_argument('--max-rate', type=float, default=50.0)
+    args = parser.parse_args()
+
+    results = run(args.updates, args.update_rate, args.latency_ms, args.max_rate)
+    direct, coalesced = results['direct'], results['coalesced']
+    print(f"direct:    {direct['writes']:>6} device writes, final value reached "
+          f"{direct['settle_ms']:8.1f} ms after the last update (correct: {direct['final_ok']})")
+    print(f"coalesced: {coalesced['writes']:>6} device writes, final value reached "
+          f"{coalesced['settle_ms']:8.1f} ms after the last update (correct: {coalesced['final_ok']})")
+    print(f"           accepted {coalesced['accepted']}, merged {coalesced['merged']}, "
+          f"sent {coalesced['sent']} "
+          f"({100.0 * (1 - coalesced['sent'] / coalesced['accepted']):.1f}% of writes removed)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Encode + write cost: list-building command functions vs. precomputed reports
+
+Both paths go through ``LitraDevice.write()`` into a stub handle whose
+``write()`` does nothing, so the numbers isolate the Python-side cost of
+building, padding and converting a report.
+
+Usage: python -m benchmarks.bench_commands [--iterations N]
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+
+from litra.commands import (
+    set_brightness_command,
+    set_temperature_command,
+    brightness_report,
+    temperature_report,
+    BRIGHTNESS_REPORTS,
+)
+from litra.device import LitraDevice
+
+from ._util import time_calls, summarize, format_row
+
+
+class StubHidDevice:
+    """hid.Device stand-in that accepts and discards every report."""
+
+    def write(self, data: bytes) -> int:
+        return len(data)
+
+    def close(self):
+        pass
+
+
+def run(iterations: int = 200000) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        iterations: Calls timed per case
+
+    Returns:
+        Dictionary of latency summaries keyed by case
+    """
+    device = LitraDevice()
+    device.device = StubHidDevice()
+    write = device.write
+
+    return {
+        'encode_list': summarize(time_calls(lambda: set_brightness_command(180), iterations)),
+        'encode_table': summarize(time_calls(lambda: brightness_report(180), iterations)),
+        'brightness_list_write': summarize(time_calls(
+            lambda: write(set_brightness_command(180)), iterations)),
+        'brightness_table_write': summarize(time_calls(
+            lambda: write(brightness_report(180)), iterations)),
+        'brightness_raw_table_write': summarize(time_calls(
+            lambda: write(BRIGHTNESS_REPORTS[180]), iterations)),
+        'temperature_list_write': summarize(time_calls(
+            lambda: write(set_temperature_command(4000)), iterations)),
+        'temperature_table_write': summarize(time_calls(
+            lambda: write(temperature_report(4000)), iterations)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200000)
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    for name, stats in results.items():
+        print(format_row(name, stats))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Per-command latency: direct HID open/write/close vs. litrad round-trip
+
+Both paths talk to an in-memory emulated light. The direct path pays the
+(simulated) HID open cost on every command, exactly like one
+``litra-control`` invocation does; the daemon path pays a Unix socket
+connect plus one JSON round-trip.
+
+Usage: python -m benchmarks.bench_daemon [--iterations N] [--open-latency-ms MS]
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+
+from litra.commands import TURN_ON_REPORT
+from litra.daemon import LitraDaemon, DaemonClient, send_request
+from litra.emulator import EmulatedLitra, EmulatedLitraDevice
+
+from ._util import time_calls, summarize, format_row
+
+
+def run(iterations: int = 500, open_latency_ms: float = 2.0) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        iterations: Commands timed per path
+        open_latency_ms: Simulated HID open cost in milliseconds
+
+    Returns:
+        Dictionary of latency summaries keyed by path
+    """
+    light = EmulatedLitra(open_latency=open_latency_ms / 1000.0)
+
+    def direct():
+        with EmulatedLitraDevice(light) as device:
+            device.write(TURN_ON_REPORT)
+
+    socket_path = os.path.join(tempfile.mkdtemp(), 'litrad-bench.sock')
+    daemon = LitraDaemon(socket_path=socket_path,
+                         device_factory=lambda: EmulatedLitraDevice(light))
+    daemon.bind()
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        results = {
+            'direct': summarize(time_calls(direct, iterations)),
+            'daemon_per_call': summarize(time_calls(
+                lambda: send_request('on', socket_path=socket_path), iterations)),
+        }
+        with DaemonClient(socket_path) as client:
+            results['daemon_persistent'] = summarize(time_calls(
+                lambda: client.request('on'), iterations))
+    finally:
+        daemon.shutdown()
+        daemon.close()
+        thread.join()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--open-latency-ms', type=float, default=2.0,
+                        help='Simulated HID open cost (default: 2.0)')
+    args = parser.parse_args()
+
+    results = run(args.iterations, args.open_latency_ms)
+    for name, stats in results.items():
+        print(format_row(name, stats))
+    speedup = results['direct']['mean_us'] / results['daemon_per_call']['mean_us']
+    print(f"\nDaemon per-call speedup over direct open/close: {speedup:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Status queries from several threads: serialized vs. ReportDispatcher
+
+Several threads query one emulated light that loses a fraction of its
+status replies. Without correlation every query must hold the device
+until its reply arrives or the read times out, so one lost reply stalls
+every other caller. With ReportDispatcher the queries are in flight
+together and only the caller whose reply was lost waits out the timeout.
+
+Usage: python -m benchmarks.bench_dispatch [--threads N] [--drop-rate P]
+           [--latency-ms MS] [--seconds S]
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+import threading
+import time
+
+from litra.commands import GET_STATUS_REPORT
+from litra.dispatch import ReportDispatcher
+from litra.emulator import EmulatedLitra, EmulatedLitraDevice
+
+from ._util import percentile
+
+
+def _hammer(query, threads: int, seconds: float) -> dict:
+    samples, failures = [], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def worker():
+        local, failed = [], 0
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            if query() is None:
+                failed += 1
+            local.append(time.perf_counter() - start)
+        with lock:
+            samples.extend(local)
+            failures[0] += failed
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        'queries': len(samples),
+        'lost': failures[0],
+        'throughput_qps': len(samples) / elapsed,
+        'p50_ms': percentile(samples, 50) * 1000.0,
+        'p99_ms': percentile(samples, 99) * 1000.0,
+    }
+
+
+def run(threads: int = 4, drop_rate: float = 0.02, latency_ms: float = 1.0,
+        seconds: float = 2.0, timeout_ms: int = 100) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        threads: Number of querying threads
+        drop_rate: Probability a status reply is lost
+        latency_ms: Emulated per-report latency
+        seconds: How long each mode runs
+        timeout_ms: Per-query reply timeout; the dispatcher retries lost
+            replies within it, starting from its adaptive read timeout
+
+    Returns:
+        Dictionary with results for 'serialized' and 'dispatched'
+    """
+    results = {}
+
+    light = EmulatedLitra(report_latency=latency_ms / 1000.0, drop_rate=drop_rate, seed=1)
+    with EmulatedLitraDevice(light) as device:
+        device_lock = threading.Lock()
+
+        def serialized():
+            with device_lock:
+                if not device.write(GET_STATUS_REPORT):
+                    return None
+                return device.read_reply(GET_STATUS_REPORT, timeout_ms)
+
+        results['serialized'] = _hammer(serialized, threads, seconds)
+
+    light = EmulatedLitra(report_latency=latency_ms / 1000.0, drop_rate=drop_rate, seed=1)
+    with EmulatedLitraDevice(light) as device, ReportDispatcher(device) as dispatcher:
+        results['dispatched'] = _hammer(
+            lambda: dispatcher.request(GET_STATUS_REPORT, timeout_ms / 1000.0), threads, seconds)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--drop-rate', type=float, default=0.02)
+    parser.add_argument('--latency-ms', type=float, default=1.0)
+    parser.add_argument('--seconds', type=float, default=2.0)
+    parser.add_argument('--timeout-ms', type=int, default=100)
+    args = parser.parse_args()
+
+    results = run(args.threads, args.drop_rate, args.latency_ms, args.seconds, args.timeout_ms)
+    for mode, result in results.items():
+        print(f"{mode:<11} {result['queries']:>6} queries ({result['lost']} lost)   "
+              f"{result['throughput_qps']:7.0f} queries/s   p50 {result['p50_ms']:7.2f} ms   "
+              f"p99 {result['p99_ms']:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
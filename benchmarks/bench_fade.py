@@ -0,0 +1,61 @@
+"""
+Fade engine: achieved frame rate and jitter against an emulated light
+
+Plays a full-range brightness and temperature fade at several target
+frame rates. With a per-report latency above the frame period the
+scheduler has to drop frames; the fade must still finish on time.
+
+Usage: python -m benchmarks.bench_fade [--duration S] [--latency-ms MS]
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+
+from litra.emulator import EmulatedLitra, EmulatedLitraDevice
+from litra.transitions import build_frames, play_frames
+
+
+def run(duration: float = 1.0, rates=(10, 30, 60, 120), latency_ms: float = 0.0) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        duration: Fade length in seconds
+        rates: Target frame rates to measure
+        latency_ms: Simulated per-report latency of the light
+
+    Returns:
+        Dictionary mapping target fps to FadeStats.to_dict()
+    """
+    results = {}
+    for fps in rates:
+        light = EmulatedLitra(brightness_lumen=20, temperature_kelvin=2700,
+                              report_latency=latency_ms / 1000.0)
+        with EmulatedLitraDevice(light) as device:
+            frames = build_frames(20, 250, 2700, 6500, duration, fps)
+            stats = play_frames(device, frames, fps)
+        assert (light.brightness_lumen, light.temperature_kelvin) == (250, 6500)
+        results[fps] = stats.to_dict()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=float, default=1.0)
+    parser.add_argument('--fps', type=float, nargs='+', default=[10, 30, 60, 120])
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help='Simulated per-report latency (default: 0)')
+    args = parser.parse_args()
+
+    print(f"{'target':>7} {'achieved':>9} {'sent':>6} {'dropped':>8} {'elapsed':>10} "
+          f"{'jitter mean':>12} {'jitter max':>11}")
+    for fps, stats in run(args.duration, args.fps, args.latency_ms).items():
+        print(f"{fps:>7g} {stats['achieved_fps']:>9.1f} {stats['frames_sent']:>6} "
+              f"{stats['frames_dropped']:>8} {stats['elapsed_ms']:>7.1f} ms "
+              f"{stats['jitter_mean_ms']:>9.3f} ms {stats['jitter_max_ms']:>8.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Multi-device fan-out: serial loop vs. run_parallel() against N slow lights
+
+Every emulated light sleeps for the configured open and per-report latency,
+so a serial loop costs roughly N times one device while the parallel
+fan-out should cost roughly one device regardless of N.
+
+Usage: python -m benchmarks.bench_fanout [--devices N ...] [--latency-ms MS]
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+import time
+
+from litra.emulator import EmulatedLitra, EmulatedLitraDevice
+from litra.fanout import run_parallel
+
+
+def run(device_counts=(1, 2, 4, 8, 16), latency_ms: float = 20.0) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        device_counts: Group sizes to measure
+        latency_ms: Simulated open and per-report latency of every light
+
+    Returns:
+        Dictionary mapping device count to serial and parallel wall times in ms
+    """
+    results = {}
+    for count in device_counts:
+        lights = {
+            f"EMU{i:04d}": EmulatedLitra(serial_number=f"EMU{i:04d}",
+                                         open_latency=latency_ms / 1000.0,
+                                         report_latency=latency_ms / 1000.0)
+            for i in range(count)
+        }
+        infos = [{'path': serial.encode(), 'serial_number': serial} for serial in lights]
+        factory = lambda info: EmulatedLitraDevice(lights[info['serial_number']])
+        action = lambda device: device.execute('brightness', 150)
+
+        start = time.perf_counter()
+        for info in infos:
+            device = factory(info)
+            with device:
+                action(device)
+        serial_ms = (time.perf_counter() - start) * 1000.0
+
+        start = time.perf_counter()
+        outcome = run_parallel(infos, action, timeout=10.0, device_factory=factory)
+        parallel_ms = (time.perf_counter() - start) * 1000.0
+        assert all(result['ok'] for result in outcome)
+
+        results[count] = {'serial_ms': serial_ms, 'parallel_ms': parallel_ms}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--latency-ms', type=float, default=20.0,
+                        help='Simulated open and per-report latency (default: 20)')
+    args = parser.parse_args()
+
+    print(f"{'devices':>8} {'serial':>12} {'parallel':>12} {'speedup':>8}")
+    for count, row in run(args.devices, args.latency_ms).items():
+        speedup = row['serial_ms'] / row['parallel_ms']
+        print(f"{count:>8} {row['serial_ms']:>9.1f} ms {row['parallel_ms']:>9.1f} ms {speedup:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Group apply skew: one-by-one writes vs. LightGroup's start barrier
+
+Every emulated light takes the configured time per report. Writing the
+lights one after another spreads the writes over N report times, while a
+LightGroup releases all writes together, so its skew between the first and
+the last write should stay flat as the group grows.
+
+Usage: python -m benchmarks.bench_group [--devices N ...] [--latency-ms MS] [--applies N]
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+import time
+
+from litra.commands import brightness_report
+from litra.emulator import EmulatedLitra, EmulatedLitraDevice
+from litra.group import LightGroup
+
+from ._util import percentile
+
+
+def run(device_counts=(1, 2, 4, 8, 16, 32), latency_ms: float = 2.0, applies: int = 50) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        device_counts: Group sizes to measure
+        latency_ms: Simulated per-report latency of every light
+        applies: Brightness changes applied per group size and method
+
+    Returns:
+        Dictionary mapping device count to p50/max skew in ms for the
+        sequential loop and the barrier
+    """
+    results = {}
+    for count in device_counts:
+        lights = {f"EMU{i:04d}": EmulatedLitra(serial_number=f"EMU{i:04d}",
+                                               report_latency=latency_ms / 1000.0)
+                  for i in range(count)}
+        infos = [{'path': serial.encode(), 'serial_number': serial} for serial in lights]
+        factory = lambda info: EmulatedLitraDevice(lights[info['serial_number']])
+
+        devices = [factory(info) for info in infos]
+        for device in devices:
+            device.connect()
+        sequential = []
+        for n in range(applies):
+            report = brightness_report(20 + n % 231)
+            done = []
+            for device in devices:
+                device.write(report)
+                done.append(time.perf_counter())
+            sequential.append((done[-1] - done[0]) * 1000.0)
+        for device in devices:
+            device.disconnect()
+
+        barrier = []
+        with LightGroup(infos, device_factory=factory) as group:
+            for n in range(applies):
+                result = group.apply('brightness', 20 + n % 231)
+                assert result['ok'], result
+                barrier.append(result['skew_ms'])
+
+        results[count] = {
+            'sequential_p50_ms': percentile(sequential, 50),
+            'sequential_max_ms': max(sequential),
+            'barrier_p50_ms': percentile(barrier, 50),
+            'barrier_max_ms': max(barrier),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    parser.add_argument('--applies', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'LIGHTS':>6}  {'ONE BY ONE p50':>14} {'max':>9}  {'BARRIER p50':>11} {'max':>9}")
+    for count, result in run(args.devices, args.latency_ms, args.applies).items():
+        print(f"{count:>6}  {result['sequential_p50_ms']:>11.3f} ms {result['sequential_max_ms']:>6.3f} ms  "
+              f"{result['barrier_p50_ms']:>8.3f} ms {result['barrier_max_ms']:>6.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
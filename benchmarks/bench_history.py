@@ -0,0 +1,96 @@
+"""
+Event history: recording overhead per command and memory over uptime
+
+Runs brightness and status commands against an emulated light with the
+history off and on, and reports the mean time per command and the
+overhead of recording. It then records far more events than the history
+holds and reports traced memory, which should not grow past the arrays
+allocated for its capacity.
+
+Usage: python -m benchmarks.bench_history [--commands N] [--capacity N] [--events N]
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from litra import history
+from litra.commands import brightness_report
+from litra.emulator import EmulatedLitra, EmulatedLitraDevice
+
+
+def _time_commands(device: EmulatedLitraDevice, command: str, commands: int) -> float:
+    value = 150 if command == 'brightness' else None
+    start = time.perf_counter()
+    for _ in range(commands):
+        device.execute(command, value)
+    return (time.perf_counter() - start) / commands * 1e6
+
+
+def run(commands: int = 10000, capacity: int = history.DEFAULT_CAPACITY, events: int = 1000000) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        commands: Commands timed per command type and mode
+        capacity: History capacity
+        events: Events recorded for the memory measurement
+
+    Returns:
+        Dictionary with 'commands' (command -> mean microseconds off and on
+        and the overhead) and 'memory' (traced KiB after each number of events)
+    """
+    device = EmulatedLitraDevice(EmulatedLitra())
+    device.connect()
+    results = {'commands': {}, 'memory': {}}
+    for command in ('brightness', 'status'):
+        # Warm up, then alternate so drift affects both modes alike
+        _time_commands(device, command, commands // 10)
+        off, on = [], []
+        for _ in range(3):
+            history.disable()
+            off.append(_time_commands(device, command, commands))
+            history.enable(capacity)
+            on.append(_time_commands(device, command, commands))
+        history.disable()
+        results['commands'][command] = {'off_us': min(off), 'on_us': min(on),
+                                        'overhead_us': min(on) - min(off)}
+    device.disconnect()
+
+    report = brightness_report(150)
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    recorder = history.EventHistory(capacity)
+    recorded = 0
+    for checkpoint in (capacity // 2, capacity, events // 10, events):
+        for _ in range(checkpoint - recorded):
+            recorder.record(history.WRITE, 'EMU0001', report, 0.0001)
+        recorded = checkpoint
+        current, _ = tracemalloc.get_traced_memory()
+        results['memory'][checkpoint] = (current - baseline) / 1024.0
+    tracemalloc.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--commands', type=int, default=10000)
+    parser.add_argument('--capacity', type=int, default=history.DEFAULT_CAPACITY)
+    parser.add_argument('--events', type=int, default=1000000)
+    args = parser.parse_args()
+
+    results = run(args.commands, args.capacity, args.events)
+    print(f"{'COMMAND':<11} {'HISTORY OFF':>12} {'HISTORY ON':>12} {'OVERHEAD':>10}")
+    for command, result in results['commands'].items():
+        print(f"{command:<11} {result['off_us']:>9.2f} us {result['on_us']:>9.2f} us "
+              f"{result['overhead_us']:>7.2f} us")
+    print(f"\n{'EVENTS':>9}  MEMORY (capacity {args.capacity})")
+    for count, kib in results['memory'].items():
+        print(f"{count:>9}  {kib:.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
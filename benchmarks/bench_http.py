@@ -0,0 +1,151 @@
+"""
+Load test for `litra-control serve`
+
+Client threads hammer the REST API with a mix of brightness writes and
+status reads spread over every light, and report requests per second and
+tail latency. Each thread either keeps one HTTP/1.1 connection open
+(keepalive) or opens a new connection per request (reconnect).
+
+By default an in-process server is started on emulated lights; pass
+--url to load an already running server instead.
+
+Usage: python -m benchmarks.bench_http [--lights N] [--threads N] [--seconds S]
+           [--latency-ms MS] [--url http://127.0.0.1:8765]
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+from litra.emulator import EmulatorBackend
+from litra.server import LitraHTTPServer
+from litra.transport import set_backend
+
+from ._util import percentile
+
+
+def _load(host: str, port: int, serials: list, threads: int, seconds: float, keepalive: bool) -> dict:
+    samples, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def worker(index: int):
+        local, failed = [], 0
+        connection = None
+        i = index
+        while time.perf_counter() < stop_at:
+            serial = serials[i % len(serials)]
+            if i % 4 == 0:
+                method, path, body = 'GET', f'/devices/{serial}/status', None
+            else:
+                method, path = 'POST', f'/devices/{serial}/brightness'
+                body = json.dumps({'value': 20 + i % 231})
+            i += 1
+            start = time.perf_counter()
+            try:
+                if connection is None:
+                    connection = http.client.HTTPConnection(host, port, timeout=10)
+                connection.request(method, path, body, {'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                reply = json.loads(response.read())
+                if not reply.get('ok'):
+                    failed += 1
+            except (OSError, http.client.HTTPException, ValueError):
+                failed += 1
+                connection.close()
+                connection = None
+            local.append(time.perf_counter() - start)
+            if not keepalive and connection is not None:
+                connection.close()
+                connection = None
+        if connection is not None:
+            connection.close()
+        with lock:
+            samples.extend(local)
+            errors[0] += failed
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': len(samples),
+        'errors': errors[0],
+        'rps': len(samples) / elapsed,
+        'p50_ms': percentile(samples, 50) * 1000.0,
+        'p99_ms': percentile(samples, 99) * 1000.0,
+        'p999_ms': percentile(samples, 99.9) * 1000.0,
+    }
+
+
+def run(lights: int = 4, threads: int = 8, seconds: float = 3.0, latency_ms: float = 1.0,
+        url: str = None) -> dict:
+    """
+    Run the load test.
+
+    Args:
+        lights: Emulated lights behind the in-process server
+        threads: Client threads
+        seconds: How long each mode runs
+        latency_ms: Emulated per-report latency
+        url: Base URL of a running server to load instead
+
+    Returns:
+        Dictionary with results for 'keepalive' and 'reconnect'
+    """
+    server = None
+    if url:
+        parts = urlsplit(url)
+        host, port = parts.hostname, parts.port or 80
+        connection = http.client.HTTPConnection(host, port, timeout=10)
+        connection.request('GET', '/devices')
+        serials = [device['serial_number'] for device in json.loads(connection.getresponse().read())['devices']]
+        connection.close()
+    else:
+        backend = EmulatorBackend.create(lights, report_latency=latency_ms / 1000.0)
+        set_backend(backend)
+        server = LitraHTTPServer(('127.0.0.1', 0))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+        serials = [light.serial_number for light in backend.lights]
+    if not serials:
+        raise SystemExit("No lights to load")
+
+    try:
+        return {mode: _load(host, port, serials, threads, seconds, mode == 'keepalive')
+                for mode in ('keepalive', 'reconnect')}
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            set_backend(None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lights', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--latency-ms', type=float, default=1.0,
+                        help='Emulated per-report latency (default: 1.0)')
+    parser.add_argument('--url', help='Load a running server instead of an in-process one')
+    args = parser.parse_args()
+
+    results = run(args.lights, args.threads, args.seconds, args.latency_ms, args.url)
+    for mode, result in results.items():
+        print(f"{mode:<10} {result['requests']:>7} requests ({result['errors']} errors)   "
+              f"{result['rps']:7.0f} req/s   p50 {result['p50_ms']:6.2f} ms   "
+              f"p99 {result['p99_ms']:6.2f} ms   p99.9 {result['p999_ms']:6.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Overhead of device I/O instrumentation
+
+Times write + read round-trips against an emulated light with metrics
+recording disabled and enabled. The disabled case is the default and
+should be indistinguishable from uninstrumented code.
+
+Usage: python -m benchmarks.bench_metrics [--iterations N]
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+
+from litra import metrics
+from litra.commands import GET_STATUS_REPORT
+from litra.emulator import EmulatedLitraDevice
+
+from ._util import percentile, time_calls
+
+
+def run(iterations: int = 20000) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        iterations: Status round-trips per mode
+
+    Returns:
+        Dictionary with p50/p99 latency in microseconds for 'disabled' and 'enabled'
+    """
+    results = {}
+    with EmulatedLitraDevice() as device:
+        def round_trip():
+            device.write(GET_STATUS_REPORT)
+            device.read()
+
+        for mode in ('disabled', 'enabled'):
+            if mode == 'enabled':
+                metrics.enable()
+            else:
+                metrics.disable()
+            samples = time_calls(round_trip, iterations, warmup=100)
+            results[mode] = {
+                'p50_us': percentile(samples, 50) * 1e6,
+                'p99_us': percentile(samples, 99) * 1e6,
+            }
+    metrics.disable()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    for mode, result in results.items():
+        print(f"{mode:<9} p50 {result['p50_us']:7.2f} us   p99 {result['p99_us']:7.2f} us")
+    overhead = results['enabled']['p50_us'] - results['disabled']['p50_us']
+    print(f"recording adds {overhead:.2f} us per write + read at p50")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Daylight schedule: timer wheel vs. scanning every light on every tick
+
+Simulates a full day at a 1 second tick on a fake clock, for a growing
+number of lights that follow the same curve:
+
+  scan   every tick looks up each light's current value in the table and
+         compares it with the last one sent
+  wheel  ScheduleRunner: each light sleeps in the timer wheel until its
+         quantized value next changes
+
+Both send the same writes; the difference is the cost of the ticks.
+
+Usage: python -m benchmarks.bench_schedule [--lights N [N ...]]
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+import time
+
+from litra.commands import BRIGHTNESS_REPORTS, TEMPERATURE_REPORTS
+from litra.schedule import MINUTES_PER_DAY, ScheduleRunner, compile_curve
+
+CURVE = [
+    {'time': '06:30', 'brightness': 60, 'temperature': 2700},
+    {'time': '09:00', 'brightness': 200, 'temperature': 5600},
+    {'time': '17:00', 'brightness': 180, 'temperature': 5000},
+    {'time': '21:30', 'brightness': 40, 'temperature': 2700},
+]
+SECONDS_PER_DAY = MINUTES_PER_DAY * 60
+
+
+class _CountingDevice:
+    state_cache = None
+
+    def __init__(self):
+        self.writes = 0
+
+    def write(self, data) -> bool:
+        self.writes += 1
+        return True
+
+    def state_key(self) -> str:
+        return 'bench'
+
+
+def _scan(table, count: int) -> int:
+    devices = [_CountingDevice() for _ in range(count)]
+    last = [(None, None)] * count
+    for second in range(SECONDS_PER_DAY):
+        minute = second // 60
+        for i, device in enumerate(devices):
+            lumen, kelvin = table.at(minute)
+            sent_lumen, sent_kelvin = last[i]
+            if lumen != sent_lumen:
+                device.write(BRIGHTNESS_REPORTS[lumen])
+            if kelvin != sent_kelvin:
+                device.write(TEMPERATURE_REPORTS[kelvin])
+            last[i] = (lumen, kelvin)
+    return sum(device.writes for device in devices)
+
+
+def _wheel(table, count: int) -> int:
+    devices = [_CountingDevice() for _ in range(count)]
+    now = [0.0]
+    runner = ScheduleRunner(clock=lambda: now[0], sleep=lambda seconds: now.__setitem__(0, now[0] + seconds),
+                            localtime=time.gmtime)
+    for device in devices:
+        runner.add(device, table)
+    runner.run(SECONDS_PER_DAY)
+    return sum(device.writes for device in devices)
+
+
+def run(lights=(1, 10, 100)) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        lights: Light counts to simulate
+
+    Returns:
+        Dictionary with the curve compile time and, per light count and
+        mode, ns per tick and the number of writes
+    """
+    start = time.perf_counter()
+    table = compile_curve(CURVE)
+    results = {'compile_ms': (time.perf_counter() - start) * 1000.0, 'table_bytes': table.nbytes}
+    for count in lights:
+        for mode, func in (('scan', _scan), ('wheel', _wheel)):
+            start = time.perf_counter()
+            writes = func(table, count)
+            elapsed = time.perf_counter() - start
+            results[(count, mode)] = {'ns_per_tick': elapsed / SECONDS_PER_DAY * 1e9, 'writes': writes}
+        assert results[(count, 'scan')]['writes'] == results[(count, 'wheel')]['writes']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lights', type=int, nargs='+', default=[1, 10, 100])
+    args = parser.parse_args()
+
+    results = run(args.lights)
+    print(f"compile {results['compile_ms']:.2f} ms, table {results['table_bytes']} bytes")
+    for count in args.lights:
+        scan, wheel = results[(count, 'scan')], results[(count, 'wheel')]
+        print(f"{count:>5} lights   scan {scan['ns_per_tick']:10.0f} ns/tick   "
+              f"wheel {wheel['ns_per_tick']:8.0f} ns/tick   {scan['ns_per_tick'] / wheel['ns_per_tick']:6.1f}x   "
+              f"{wheel['writes']} writes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Status decoding: list + dict vs. LitraStatus vs. bulk decoding
+
+Decodes the same status reports three ways:
+
+  dict   the original path: LitraDevice.read() copies the report into a
+         list and the parser builds a new dict per report
+  record parse_status_response() on the raw bytes, into a LitraStatus
+  bulk   parse_status_reports() over one contiguous buffer
+
+Usage: python -m benchmarks.bench_status_decode [--reports N] [--repeat R]
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+import sys
+import time
+
+from litra.commands import REPORT_LENGTH, parse_status_reports, parse_status_response
+
+
+def _legacy_parse(response):
+    # parse_status_response() as it was before LitraStatus
+    if not response or len(response) < 5:
+        return {'error': 'Invalid response'}
+    status = {
+        'power': 'on' if response[4] == 1 else 'off',
+        'brightness_lumen': None,
+        'temperature_kelvin': None
+    }
+    if len(response) >= 7:
+        brightness = (response[5] << 8) | response[6]
+        if brightness > 0:
+            status['brightness_lumen'] = brightness
+    if len(response) >= 9:
+        temperature = (response[7] << 8) | response[8]
+        if temperature > 0:
+            status['temperature_kelvin'] = temperature
+    return status
+
+
+def _reports(count: int):
+    reports = []
+    for i in range(count):
+        lumen = 20 + i % 231
+        kelvin = 2700 + (i % 39) * 100
+        report = bytes([0x11, 0xff, 0x04, 0x01, i & 1]) + lumen.to_bytes(2, 'big') + kelvin.to_bytes(2, 'big')
+        reports.append(report.ljust(REPORT_LENGTH, b'\x00'))
+    return reports
+
+
+def _best(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(reports: int = 10000, repeat: int = 5) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        reports: Number of status reports to decode per pass
+        repeat: Passes per mode; the fastest is reported
+
+    Returns:
+        Dictionary mapping mode to ns per report and bytes per decoded status
+    """
+    items = _reports(reports)
+    buffer = b''.join(items)
+
+    # Sanity check: every path decodes to the same values
+    expected = [_legacy_parse(list(report)) for report in items]
+    assert [dict(status) for status in parse_status_reports(buffer)] == expected
+    assert [dict(parse_status_response(report)) for report in items] == expected
+
+    modes = {
+        'dict': (lambda: [_legacy_parse(list(report)) for report in items], expected[0]),
+        'record': (lambda: [parse_status_response(report) for report in items],
+                   parse_status_response(items[0])),
+        'bulk': (lambda: parse_status_reports(buffer), parse_status_response(items[0])),
+    }
+    return {mode: {'ns_per_report': _best(func, repeat) / reports * 1e9,
+                   'bytes_per_status': sys.getsizeof(sample)}
+            for mode, (func, sample) in modes.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reports', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = run(args.reports, args.repeat)
+    baseline = results['dict']['ns_per_report']
+    for mode, result in results.items():
+        print(f"{mode:<7} {result['ns_per_report']:8.1f} ns/report   {result['bytes_per_status']:>4} bytes/status   "
+              f"{baseline / result['ns_per_report']:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
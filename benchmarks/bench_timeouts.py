@@ -0,0 +1,87 @@
+"""
+Status latency with lost replies: fixed 1 s read timeout vs. adaptive timeouts
+
+An emulated light answers status requests after a few milliseconds but
+loses a share of the replies. With the old fixed timeout every lost reply
+costs a full second; with timeouts derived from the observed round-trip
+times and a retry, it costs a few round trips. Reports p50/p99/max latency
+and failed requests for both.
+
+Usage: python -m benchmarks.bench_timeouts [--requests N] [--drop-rate P] [--latency-ms MS]
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+import time
+
+from litra.emulator import EmulatedLitra, EmulatedLitraDevice
+
+from ._util import percentile
+
+
+def _measure(device: EmulatedLitraDevice, requests: int) -> dict:
+    latencies, failures = [], 0
+    device.connect()
+    for _ in range(requests):
+        start = time.perf_counter()
+        status = device.query_status()
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        if 'error' in status:
+            failures += 1
+    device.disconnect()
+    return {
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': max(latencies),
+        'total_s': sum(latencies) / 1000.0,
+        'failures': failures,
+    }
+
+
+def run(requests: int = 200, drop_rate: float = 0.05, latency_ms: float = 2.0,
+        jitter_ms: float = 1.0) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        requests: Status requests per mode
+        drop_rate: Share of status replies the light loses
+        latency_ms: Per-report latency of the light
+        jitter_ms: Extra random latency per report, up to this much
+
+    Returns:
+        Dictionary mapping 'fixed' and 'adaptive' to latency percentiles,
+        total time and failed requests
+    """
+    results = {}
+    for mode in ('fixed', 'adaptive'):
+        light = EmulatedLitra(serial_number=f"BENCH-{mode}", report_latency=latency_ms / 1000.0,
+                              jitter=jitter_ms / 1000.0, drop_rate=drop_rate, seed=1)
+        device = EmulatedLitraDevice(light)
+        if mode == 'fixed':
+            # What every read did before timeouts adapted
+            device.timeout_floor_ms = device.timeout_ceiling_ms = 1000
+            device.max_retries = 0
+        results[mode] = _measure(device, requests)
+        results[mode]['dropped'] = light.dropped
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--drop-rate', type=float, default=0.05)
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    parser.add_argument('--jitter-ms', type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'MODE':<9} {'p50':>9} {'p99':>10} {'max':>10} {'TOTAL':>8} {'DROPPED':>8} {'FAILED':>7}")
+    for mode, result in run(args.requests, args.drop_rate, args.latency_ms, args.jitter_ms).items():
+        print(f"{mode:<9} {result['p50_ms']:>6.2f} ms {result['p99_ms']:>7.2f} ms {result['max_ms']:>7.2f} ms "
+              f"{result['total_s']:>6.2f} s {result['dropped']:>8} {result['failures']:>7}")
+
+
+if __name__ == '__main__':
+    main()
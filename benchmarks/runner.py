@@ -0,0 +1,247 @@
+"""
+Benchmark suite runner with baseline comparison
+
+Measures:
+
+  cold_start.*   interpreter start-up plus one litra_control.py invocation,
+                 per subcommand, in a fresh process
+  encode.*       throughput of the command builders in litra/commands.py
+  parse.*        throughput of parse_status_response
+  enumerate.*    cost of find_litra_devices()
+  cmd.*          in-process p50/p99 latency of each cmd_* function
+
+Everything runs against the emulator backend unless --backend hid is given.
+Results are written as JSON; if a baseline file exists, every metric is
+compared against it and regressions beyond --threshold are reported and
+turn the exit status non-zero. Absolute timings depend on the machine, so
+no baseline is shipped: create one per machine with --update-baseline
+(benchmarks/baseline.json by default) before comparing.
+
+Usage: python -m benchmarks.runner [--quick] [--output FILE] [--baseline FILE]
+           [--update-baseline] [--threshold PCT]
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from ._util import percentile, time_calls
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(REPO_ROOT, 'litra_control.py')
+DEFAULT_OUTPUT = os.path.join(REPO_ROOT, 'benchmarks', 'results', 'latest.json')
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, 'benchmarks', 'baseline.json')
+
+COLD_START_COMMANDS = (
+    ('help', ['--help']),
+    ('on', ['on']),
+    ('off', ['off']),
+    ('toggle', ['toggle']),
+    ('brightness', ['brightness', '150']),
+    ('temperature', ['temperature', '4000']),
+    ('status', ['status']),
+    ('list', ['list']),
+    ('scene_apply', ['scene', 'apply', 'bench']),
+    ('invalid', ['brightness', '999']),
+)
+
+
+def _metric(value: float, unit: str, better: str) -> dict:
+    return {'value': value, 'unit': unit, 'better': better}
+
+
+def _bench_env(backend: str, state_dir: str) -> dict:
+    env = dict(os.environ)
+    env['LITRA_BACKEND'] = backend
+    env['LITRA_NO_DAEMON'] = '1'
+    env['LITRA_STATE_FILE'] = os.path.join(state_dir, 'state.json')
+    env['LITRA_STATE_TTL'] = '0'
+    env['LITRA_EMULATOR_STATE'] = os.path.join(state_dir, 'emulator.json')
+    env['LITRA_SCENES_FILE'] = os.path.join(state_dir, 'scenes.bin')
+    return env
+
+
+def bench_cold_start(runs: int, backend: str) -> dict:
+    """Time fresh `python litra_control.py <args>` processes."""
+    results = {}
+    with tempfile.TemporaryDirectory() as state_dir:
+        env = _bench_env(backend, state_dir)
+        subprocess.run([sys.executable, CLI, 'scene', 'save', 'bench', '--on', '-b', '150', '-t', '4000'],
+                       env=env, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for name, args in COLD_START_COMMANDS:
+            samples = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, CLI] + args, env=env, cwd=REPO_ROOT,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                samples.append(time.perf_counter() - start)
+            results[f'cold_start.{name}.p50'] = _metric(percentile(samples, 50) * 1000.0, 'ms', 'lower')
+    return results
+
+
+def _throughput(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return iterations / (time.perf_counter() - start)
+
+
+def bench_codec(iterations: int) -> dict:
+    """Throughput of command builders and the status parser."""
+    from litra import commands
+
+    status = commands.GET_STATUS_REPORT[:4] + bytes([1, 0, 150, 0x0f, 0xa0]) + bytes(11)
+    status_list = list(status)
+    cases = {
+        'encode.turn_on_command': commands.turn_on_command,
+        'encode.set_brightness_command': lambda: commands.set_brightness_command(150),
+        'encode.set_temperature_command': lambda: commands.set_temperature_command(4000),
+        'encode.brightness_report': lambda: commands.brightness_report(150),
+        'encode.temperature_report': lambda: commands.temperature_report(4000),
+        'parse.parse_status_response.list': lambda: commands.parse_status_response(status_list),
+        'parse.parse_status_response.bytes': lambda: commands.parse_status_response(status),
+    }
+    return {name: _metric(_throughput(func, iterations), 'ops/s', 'higher')
+            for name, func in cases.items()}
+
+
+def bench_enumerate(iterations: int) -> dict:
+    """Cost of find_litra_devices() on the current backend, cached and rescanning."""
+    from litra.device import find_litra_devices
+
+    results = {}
+    for name, func in (('find_litra_devices', find_litra_devices),
+                       ('find_litra_devices_refresh', lambda: find_litra_devices(refresh=True))):
+        samples = time_calls(func, iterations, warmup=3)
+        results[f'enumerate.{name}.p50'] = _metric(percentile(samples, 50) * 1e6, 'us', 'lower')
+        results[f'enumerate.{name}.p99'] = _metric(percentile(samples, 99) * 1e6, 'us', 'lower')
+    return results
+
+
+def bench_commands(iterations: int) -> dict:
+    """End-to-end latency of each cmd_* function, in process."""
+    import litra_control
+
+    cases = {
+        'on': litra_control.cmd_on,
+        'off': litra_control.cmd_off,
+        'toggle': litra_control.cmd_toggle,
+        'brightness': lambda: litra_control.cmd_brightness('150'),
+        'temperature': lambda: litra_control.cmd_temperature('4000'),
+        'status': litra_control.cmd_status,
+        'list': litra_control.cmd_list,
+    }
+    results = {}
+    sink = io.StringIO()
+    for name, func in cases.items():
+        with contextlib.redirect_stdout(sink):
+            samples = time_calls(func, iterations, warmup=5)
+        sink.seek(0)
+        sink.truncate()
+        results[f'cmd.{name}.p50'] = _metric(percentile(samples, 50) * 1e6, 'us', 'lower')
+        results[f'cmd.{name}.p99'] = _metric(percentile(samples, 99) * 1e6, 'us', 'lower')
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Find metrics that got worse than the baseline by more than a threshold.
+
+    Args:
+        results: Current metrics
+        baseline: Baseline metrics
+        threshold: Allowed relative change in percent
+
+    Returns:
+        List of (name, baseline_value, current_value, change_percent) tuples
+    """
+    regressions = []
+    for name, metric in results.items():
+        base = baseline.get(name)
+        if not base or not base['value']:
+            continue
+        change = (metric['value'] - base['value']) / base['value'] * 100.0
+        worse = change if metric['better'] == 'lower' else -change
+        if worse > threshold:
+            regressions.append((name, base['value'], metric['value'], change))
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the Litra benchmark suite")
+    parser.add_argument('--quick', action='store_true', help='Fewer iterations, for smoke runs')
+    parser.add_argument('--backend', default='emulator', help='LITRA_BACKEND to measure (default: emulator)')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Where to write results JSON')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON to compare against')
+    parser.add_argument('--update-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--threshold', type=float, default=20.0,
+                        help='Regression threshold in percent (default: 20)')
+    parser.add_argument('--skip-cold-start', action='store_true', help='Skip the subprocess benchmarks')
+    args = parser.parse_args()
+
+    scale = 10 if args.quick else 1
+    sys.path.insert(0, REPO_ROOT)
+
+    metrics = {}
+    with tempfile.TemporaryDirectory() as state_dir:
+        os.environ.update(_bench_env(args.backend, state_dir))
+        if not args.skip_cold_start:
+            metrics.update(bench_cold_start(max(3, 20 // scale), args.backend))
+        metrics.update(bench_codec(200000 // scale))
+        metrics.update(bench_enumerate(2000 // scale))
+        metrics.update(bench_commands(500 // scale))
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': args.backend,
+        'metrics': metrics,
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
+
+    for name in sorted(metrics):
+        metric = metrics[name]
+        print(f"{name:<45} {metric['value']:>14.2f} {metric['unit']}")
+    print(f"\nResults written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        # Timings depend on the machine, so no baseline is shipped
+        print(f"No baseline at {args.baseline}, so nothing was compared. Baselines are per machine: "
+              f"run once with --update-baseline on this machine to create one")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as fh:
+        baseline = json.load(fh)['metrics']
+    regressions = compare(metrics, baseline, args.threshold)
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:g}% against {args.baseline}")
+        return 0
+
+    print(f"\n{len(regressions)} regression(s) beyond {args.threshold:g}%:")
+    for name, before, after, change in regressions:
+        print(f"  {name:<45} {before:>12.2f} -> {after:>12.2f} ({change:+.1f}%)")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
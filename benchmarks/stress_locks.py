@@ -0,0 +1,147 @@
+"""
+Stress test: many concurrent litra-control processes on one light
+
+Launches N `litra-control brightness +1` processes at the same moment
+against an emulated light whose state is shared through
+LITRA_EMULATOR_STATE, with simulated open and report latency to widen
+the races. Every increment that is not reflected in the final brightness
+was lost to a concurrent session. The run is repeated with per-device
+locking disabled (LITRA_NO_LOCK) for comparison.
+
+Reports the success rate, lost updates, and the lock wait recorded by
+each process.
+
+Usage: python -m benchmarks.stress_locks [--processes N] [--open-latency-ms MS]
+           [--latency-ms MS] [--lock-timeout S]
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from ._util import percentile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(REPO_ROOT, 'litra_control.py')
+START_LUMEN = 20
+
+# Runs one CLI invocation with metrics enabled and reports its lock wait
+# as the last line on stderr
+_CHILD = """
+import json, sys
+sys.path.insert(0, {root!r})
+from litra import metrics
+recorder = metrics.enable()
+import litra_control
+code = litra_control.main({argv!r})
+waits = [entry['sum_ms'] for entry in recorder.to_dict()['operations'] if entry['operation'] == 'lock']
+print(json.dumps({{'exit_code': code, 'lock_wait_ms': waits[0] if waits else None}}), file=sys.stderr)
+"""
+
+
+def _brightness(env: dict) -> int:
+    output = subprocess.run([sys.executable, CLI, 'status', '--all', '--json'], env=dict(env, LITRA_STATE_TTL='0'),
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[0])['status']['brightness_lumen']
+
+
+def _stress(processes: int, env: dict) -> dict:
+    subprocess.run([sys.executable, CLI, 'brightness', str(START_LUMEN)], env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+    code = _CHILD.format(root=REPO_ROOT, argv=['brightness', '+1'])
+
+    start = time.perf_counter()
+    children = [subprocess.Popen([sys.executable, '-c', code], env=env, cwd=REPO_ROOT,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+                for _ in range(processes)]
+    reports = []
+    for child in children:
+        _, stderr = child.communicate()
+        lines = stderr.strip().splitlines()
+        try:
+            reports.append(json.loads(lines[-1]))
+        except (IndexError, ValueError):
+            reports.append({'exit_code': child.returncode, 'lock_wait_ms': None})
+    elapsed = time.perf_counter() - start
+
+    succeeded = sum(1 for report in reports if report['exit_code'] == 0)
+    waits = [report['lock_wait_ms'] for report in reports if report['lock_wait_ms'] is not None]
+    applied = _brightness(env) - START_LUMEN
+    result = {
+        'processes': processes,
+        'succeeded': succeeded,
+        'success_rate': succeeded / processes,
+        'lost_updates': succeeded - applied,
+        'elapsed_s': elapsed,
+    }
+    if waits:
+        result.update({
+            'lock_wait_p50_ms': percentile(waits, 50),
+            'lock_wait_p99_ms': percentile(waits, 99),
+            'lock_wait_max_ms': max(waits),
+        })
+    return result
+
+
+def run(processes: int = 24, open_latency_ms: float = 5.0, latency_ms: float = 2.0,
+        lock_timeout: float = 10.0) -> dict:
+    """
+    Run the stress test.
+
+    Args:
+        processes: Concurrent CLI invocations
+        open_latency_ms: Simulated HID open cost
+        latency_ms: Simulated per-report latency
+        lock_timeout: Bound on each process's lock wait
+
+    Returns:
+        Dictionary with results for 'locked' and 'unlocked'
+    """
+    results = {}
+    for mode in ('locked', 'unlocked'):
+        with tempfile.TemporaryDirectory() as state_dir:
+            env = dict(os.environ)
+            env.update({
+                'LITRA_BACKEND': 'emulator',
+                'LITRA_NO_DAEMON': '1',
+                'LITRA_EMULATOR_STATE': os.path.join(state_dir, 'emulator.json'),
+                'LITRA_EMULATOR_OPEN_LATENCY_MS': str(open_latency_ms),
+                'LITRA_EMULATOR_LATENCY_MS': str(latency_ms),
+                'LITRA_STATE_FILE': os.path.join(state_dir, 'state.json'),
+                'LITRA_LOCK_DIR': os.path.join(state_dir, 'locks'),
+                'LITRA_LOCK_TIMEOUT': str(lock_timeout),
+            })
+            env.pop('LITRA_NO_LOCK', None)
+            if mode == 'unlocked':
+                env['LITRA_NO_LOCK'] = '1'
+            results[mode] = _stress(processes, env)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=24)
+    parser.add_argument('--open-latency-ms', type=float, default=5.0)
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    parser.add_argument('--lock-timeout', type=float, default=10.0)
+    args = parser.parse_args()
+
+    for mode, result in run(args.processes, args.open_latency_ms, args.latency_ms, args.lock_timeout).items():
+        line = (f"{mode:<9} {result['succeeded']}/{result['processes']} succeeded "
+                f"({result['success_rate']:.0%})   {result['lost_updates']} lost updates   "
+                f"{result['elapsed_s']:.2f} s")
+        if 'lock_wait_p50_ms' in result:
+            line += (f"   lock wait p50 {result['lock_wait_p50_ms']:.1f} ms  "
+                     f"p99 {result['lock_wait_p99_ms']:.1f} ms  max {result['lock_wait_max_ms']:.1f} ms")
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,42 +1,55 @@
 """
 Logitech Litra Glow Control Library
 
+Public names are resolved lazily on first attribute access, so importing
+the package (or a light submodule such as litra.utils) does not load the
+device layer. The hid binding itself is only imported when a device is
+enumerated or opened.
+
 Author: RKaushik
 License: MIT
 """
 
-from .device import LitraDevice, find_litra_devices, get_device
-from .commands import (
-    turn_on_command,
-    turn_off_command,
-    get_status_command,
-    set_brightness_command,
-    set_temperature_command,
-    parse_status_response
-)
-from .utils import (
-    validate_brightness,
-    validate_temperature,
-    percentage_to_lumen,
-    lumen_to_percentage,
-    format_status
-)
+import importlib
 
 __version__ = "1.0.0"
 __author__ = "RKaushik"
-__all__ = [
-    'LitraDevice',
-    'find_litra_devices',
-    'get_device',
-    'turn_on_command',
-    'turn_off_command',
-    'get_status_command',
-    'set_brightness_command',
-    'set_temperature_command',
-    'parse_status_response',
-    'validate_brightness',
-    'validate_temperature',
-    'percentage_to_lumen',
-    'lumen_to_percentage',
-    'format_status'
-]
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    'LitraDevice': 'device',
+    'find_litra_devices': 'device',
+    'get_device': 'device',
+    'turn_on_command': 'commands',
+    'turn_off_command': 'commands',
+    'get_status_command': 'commands',
+    'set_brightness_command': 'commands',
+    'set_temperature_command': 'commands',
+    'parse_status_response': 'commands',
+    'brightness_report': 'commands',
+    'temperature_report': 'commands',
+    'TURN_ON_REPORT': 'commands',
+    'TURN_OFF_REPORT': 'commands',
+    'GET_STATUS_REPORT': 'commands',
+    'validate_brightness': 'utils',
+    'validate_temperature': 'utils',
+    'percentage_to_lumen': 'utils',
+    'lumen_to_percentage': 'utils',
+    'format_status': 'utils',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,218 @@
+"""
+Asyncio interface for Logitech Litra Glow devices
+
+hidapi only offers blocking calls, so every device operation runs on a
+small I/O thread pool shared by all devices. Reads are issued in short
+slices, which lets a cancelled or timed-out coroutine release the device
+within one slice instead of a full read timeout.
+
+Author: RKaushik
+License: MIT
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Optional, Union
+
+from . import device as _device
+from .device import LitraDevice
+
+DEFAULT_IO_WORKERS = 8
+
+# Longest single blocking read; bounds how long a cancelled read holds the device
+READ_SLICE = 0.05
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """
+    Get the I/O thread pool shared by all AsyncLitraDevice instances.
+
+    Returns:
+        The shared executor, created on first use
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DEFAULT_IO_WORKERS,
+                                           thread_name_prefix='litra-io')
+        return _executor
+
+
+def configure_io_executor(max_workers: int):
+    """
+    Replace the shared I/O thread pool with one of a different size.
+
+    Devices already in use keep working; calls in flight finish on the old pool.
+
+    Args:
+        max_workers: Number of I/O threads
+    """
+    global _executor
+    with _executor_lock:
+        old, _executor = _executor, ThreadPoolExecutor(max_workers=max_workers,
+                                                       thread_name_prefix='litra-io')
+    if old is not None:
+        old.shutdown(wait=False)
+
+
+class AsyncLitraDevice:
+    """Awaitable wrapper around a LitraDevice."""
+
+    def __init__(self, device: Optional[LitraDevice] = None,
+                 device_path: Optional[bytes] = None, serial_number: Optional[str] = None):
+        """
+        Initialize an async device.
+
+        Args:
+            device: Existing LitraDevice to wrap; one is created if omitted
+            device_path: Optional specific device path to connect to
+            serial_number: Optional serial number, as reported by find_litra_devices()
+        """
+        self.device = device or LitraDevice(device_path, serial_number)
+        self._lock = None
+        self._pending = None
+
+    @property
+    def serial_number(self) -> Optional[str]:
+        """Serial number of the wrapped device, if known."""
+        return self.device.serial_number
+
+    async def _call(self, func, *args):
+        """Run a blocking device call on the I/O pool, one call per device at a time."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            pending: Optional[Future] = self._pending
+            if pending is not None and not pending.done():
+                # A previous call was cancelled while its thread was still
+                # blocked in hidapi; let it finish before touching the device.
+                await asyncio.wait([asyncio.wrap_future(pending)])
+            self._pending = get_io_executor().submit(functools.partial(func, *args))
+            return await asyncio.wrap_future(self._pending)
+
+    async def _with_deadline(self, coro, timeout: Optional[float]):
+        if timeout is None:
+            return await coro
+        return await asyncio.wait_for(coro, timeout)
+
+    async def connect(self, timeout: Optional[float] = None) -> bool:
+        """
+        Connect to the device.
+
+        Args:
+            timeout: Seconds before asyncio.TimeoutError is raised
+
+        Returns:
+            True if connection successful, False otherwise
+        """
+        return await self._with_deadline(self._call(self.device.connect), timeout)
+
+    async def disconnect(self):
+        """Close the device connection."""
+        await self._call(self.device.disconnect)
+
+    async def write(self, data: Union[bytes, List[int]], timeout: Optional[float] = None) -> bool:
+        """
+        Write a report to the device.
+
+        Args:
+            data: Report bytes or list of bytes to write
+            timeout: Seconds before asyncio.TimeoutError is raised
+
+        Returns:
+            True if write successful, False otherwise
+        """
+        return await self._with_deadline(self._call(self.device.write, data), timeout)
+
+    async def read(self, length: int = 20, timeout: float = 1.0) -> Optional[List[int]]:
+        """
+        Wait for the next report from the device.
+
+        Args:
+            length: Number of bytes to read
+            timeout: Seconds to wait for a report
+
+        Returns:
+            List of bytes read, or None if nothing arrived in time
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            slice_ms = max(1, int(min(READ_SLICE, remaining) * 1000))
+            data = await self._call(self.device.read, length, slice_ms)
+            if data:
+                return data
+
+    async def status(self, timeout: float = 1.0) -> dict:
+        """
+        Request and parse the current device status.
+
+        Runs LitraDevice.query_status() on the I/O pool under a deadline of
+        timeout seconds, so only the status reply is accepted (other reports
+        are skipped), lost replies are retried, and the blocking call ends
+        by itself when the time is up.
+
+        Args:
+            timeout: Seconds for the whole request/response exchange
+
+        Returns:
+            Status dictionary from parse_status_response, or a dictionary
+            with an 'error' key if the request failed or ran out of time
+
+        Raises:
+            asyncio.TimeoutError: If the I/O pool did not get to the request in time
+        """
+        deadline = time.monotonic() + timeout
+        return await asyncio.wait_for(self._call(self._query_status, deadline), timeout)
+
+    def _query_status(self, deadline: float) -> dict:
+        device = self.device
+        previous = device.deadline
+        if previous is None or deadline < previous:
+            device.deadline = deadline
+        try:
+            return device.query_status()
+        finally:
+            device.deadline = previous
+
+    async def execute(self, command: str, value: Optional[int] = None,
+                      timeout: Optional[float] = None) -> dict:
+        """
+        Run LitraDevice.execute() on the I/O pool.
+
+        Args:
+            command: Command name, see LitraDevice.execute()
+            value: Optional command argument
+            timeout: Seconds before asyncio.TimeoutError is raised
+
+        Returns:
+            Result dictionary from LitraDevice.execute()
+        """
+        return await self._with_deadline(self._call(self.device.execute, command, value), timeout)
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
+
+
+async def find_litra_devices() -> List[dict]:
+    """
+    Find all connected Litra Glow devices without blocking the event loop.
+
+    Returns:
+        List of device info dictionaries, as from litra.find_litra_devices()
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_executor(), _device.find_litra_devices)
@@ -0,0 +1,384 @@
+"""
+Closed-loop auto-brightness from a stream of ambient light readings
+
+An external lux sensor writes readings (numbers separated by whitespace
+or newlines) to stdin or a FIFO. AutoBrightness smooths them with an
+exponential moving average, ignores changes inside a hysteresis band
+around the last accepted level, and maps lux to lumens through a table
+built once from a lux -> brightness percentage curve with
+percentage_to_lumen(). A brightness report is only written when the
+quantized target changes, and never more often than the maximum write
+rate; targets that arrive faster are coalesced into the latest one.
+
+The loop keeps a single LitraDevice open, blocks in select() between
+readings, and holds no per-reading state, so memory and CPU use stay flat
+however long it runs. A FIFO is opened so that a restarting sensor does
+not end the run.
+
+Author: RKaushik
+License: MIT
+"""
+
+import math
+import os
+import select
+import stat
+import sys
+import time
+from array import array
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from .commands import brightness_report
+from .device import LitraDevice
+from .utils import percentage_to_lumen
+
+# Lux -> brightness percentage: dim room, office lighting, daylight
+DEFAULT_CURVE = ((0, 10), (50, 30), (300, 60), (1000, 100))
+DEFAULT_SMOOTHING = 0.2
+DEFAULT_HYSTERESIS = 0.1
+DEFAULT_MAX_RATE = 2.0
+RETRY_SECONDS = 5.0
+# Above this the table would only repeat its last value
+MAX_TABLE_LUX = 100000
+# Lines longer than this are not sensor readings and are dropped
+MAX_LINE = 256
+# Hysteresis band floor, so readings near 0 lux do not flap
+MIN_BAND_LUX = 1.0
+
+
+def parse_curve(points: Sequence[str]) -> List[Tuple[float, float]]:
+    """
+    Parse 'LUX:PERCENT' curve points.
+
+    Args:
+        points: Strings such as '300:60'
+
+    Returns:
+        (lux, percent) pairs sorted by lux
+
+    Raises:
+        ValueError: If a point is malformed or out of range
+    """
+    curve = []
+    for point in points:
+        lux, sep, percent = point.partition(':')
+        try:
+            if not sep:
+                raise ValueError
+            lux, percent = float(lux), float(percent)
+        except ValueError:
+            raise ValueError(f"Curve points look like LUX:PERCENT, got '{point}'") from None
+        if not 0 <= lux <= MAX_TABLE_LUX or not 0 <= percent <= 100:
+            raise ValueError(f"Curve point '{point}' must have 0-{MAX_TABLE_LUX} lux and 0-100 percent")
+        curve.append((lux, percent))
+    if not curve:
+        raise ValueError("A curve needs at least one point")
+    return sorted(curve)
+
+
+class LuxTable:
+    """Precomputed lux -> lumen lookup, one entry per whole lux."""
+
+    __slots__ = ('_lumens',)
+
+    def __init__(self, curve: Sequence[Tuple[float, float]] = DEFAULT_CURVE):
+        """
+        Build the table by interpolating the curve linearly.
+
+        Below the first point and above the last one the curve is flat.
+        Percentages are rounded to whole numbers, so the targets are
+        quantized to the 101 brightness levels of percentage_to_lumen().
+
+        Args:
+            curve: (lux, percent) pairs sorted by lux
+        """
+        lumen_at = [percentage_to_lumen(percent) for percent in range(101)]
+        top = min(int(math.ceil(curve[-1][0])), MAX_TABLE_LUX)
+        lumens = array('B', bytes(top + 1))
+        segment = 0
+        for lux in range(top + 1):
+            while segment < len(curve) - 1 and lux > curve[segment + 1][0]:
+                segment += 1
+            lux0, percent0 = curve[segment]
+            if lux <= lux0 or segment == len(curve) - 1:
+                # Flat before the first point and after the last one
+                percent = percent0
+            else:
+                lux1, percent1 = curve[segment + 1]
+                percent = percent0 + (percent1 - percent0) * (lux - lux0) / (lux1 - lux0)
+            lumens[lux] = lumen_at[int(round(percent))]
+        self._lumens = lumens
+
+    def lookup(self, lux: float) -> int:
+        """
+        Get the brightness target for a light level.
+
+        Args:
+            lux: Ambient light level
+
+        Returns:
+            Brightness in lumens
+        """
+        lumens = self._lumens
+        index = int(lux)
+        return lumens[index] if index < len(lumens) else lumens[-1]
+
+    def __len__(self) -> int:
+        return len(self._lumens)
+
+
+class AutoStats:
+    """Counters collected while auto-brightness runs."""
+
+    __slots__ = ('readings', 'invalid', 'writes', 'failed_writes', 'suppressed_hysteresis',
+                 'suppressed_unchanged', 'suppressed_rate')
+
+    def __init__(self):
+        self.readings = 0
+        self.invalid = 0
+        self.writes = 0
+        self.failed_writes = 0
+        # Readings inside the hysteresis band
+        self.suppressed_hysteresis = 0
+        # New levels that map to the brightness already set
+        self.suppressed_unchanged = 0
+        # Targets replaced by a newer one while waiting for the rate limit
+        self.suppressed_rate = 0
+
+    @property
+    def suppressed(self) -> int:
+        """Readings that did not lead to a write."""
+        return self.suppressed_hysteresis + self.suppressed_unchanged + self.suppressed_rate
+
+    def to_dict(self) -> dict:
+        """
+        Get the stats as a JSON-friendly dictionary.
+
+        Returns:
+            Dictionary of counters, including the 'suppressed' total
+        """
+        result = {field: getattr(self, field) for field in self.__slots__}
+        result['suppressed'] = self.suppressed
+        return result
+
+
+class AutoBrightness:
+    """Filters lux readings and drives one open light's brightness."""
+
+    def __init__(self, device: LitraDevice, table: Optional[LuxTable] = None,
+                 smoothing: float = DEFAULT_SMOOTHING, hysteresis: float = DEFAULT_HYSTERESIS,
+                 max_rate: float = DEFAULT_MAX_RATE, clock: Callable[[], float] = time.monotonic,
+                 on_write: Optional[Callable[[float, int], None]] = None):
+        """
+        Initialize the controller.
+
+        Args:
+            device: Connected LitraDevice
+            table: Lux to lumen table (default: built from DEFAULT_CURVE)
+            smoothing: EMA weight of each new reading (0-1; 1 disables smoothing)
+            hysteresis: Relative change of the smoothed lux, from the level
+                of the last accepted target, needed before the target moves
+            max_rate: Maximum brightness writes per second
+            clock: Monotonic clock in seconds
+            on_write: Called with (smoothed lux, lumens) after every write
+        """
+        if not 0 < smoothing <= 1:
+            raise ValueError("Smoothing must be between 0 (exclusive) and 1")
+        if hysteresis < 0:
+            raise ValueError("Hysteresis must not be negative")
+        if max_rate <= 0:
+            raise ValueError("The maximum write rate must be positive")
+        self.device = device
+        self.table = LuxTable() if table is None else table
+        self.smoothing = smoothing
+        self.hysteresis = hysteresis
+        self.min_interval = 1.0 / max_rate
+        self.clock = clock
+        self.on_write = on_write
+        self.stats = AutoStats()
+        self.lux: Optional[float] = None
+        self.written: Optional[int] = None
+        self._anchor: Optional[float] = None
+        self._pending: Optional[int] = None
+        self._next_write = 0.0
+
+    def feed(self, lux: float, now: Optional[float] = None):
+        """
+        Process one reading, writing the new target if it is due.
+
+        Args:
+            lux: Ambient light level; negative or non-finite values are
+                counted as invalid and ignored
+            now: Current clock() value; read from the clock if omitted
+        """
+        if not lux >= 0 or lux == math.inf:
+            self.stats.invalid += 1
+            return
+        self.stats.readings += 1
+        filtered = lux if self.lux is None else self.lux + self.smoothing * (lux - self.lux)
+        self.lux = filtered
+
+        anchor = self._anchor
+        if anchor is not None and abs(filtered - anchor) <= self.hysteresis * max(anchor, MIN_BAND_LUX):
+            self.stats.suppressed_hysteresis += 1
+            return
+        self._anchor = filtered
+
+        target = self.table.lookup(filtered)
+        if target == (self.written if self._pending is None else self._pending):
+            self.stats.suppressed_unchanged += 1
+            return
+        if self._pending is not None:
+            self.stats.suppressed_rate += 1
+        self._pending = None if target == self.written else target
+        self.flush(now)
+
+    def flush(self, now: Optional[float] = None):
+        """
+        Write the pending target if the rate limit allows it.
+
+        Args:
+            now: Current clock() value; read from the clock if omitted
+        """
+        if self._pending is None:
+            return
+        now = self.clock() if now is None else now
+        if now < self._next_write:
+            return
+        target, device = self._pending, self.device
+        cache = device.state_cache
+        if device.write(brightness_report(target)):
+            self.stats.writes += 1
+            self.written = target
+            self._pending = None
+            self._next_write = now + self.min_interval
+            if cache is not None:
+                cache.update(device.state_key(), brightness_lumen=target)
+            if self.on_write is not None:
+                self.on_write(self.lux, target)
+            return
+        self.stats.failed_writes += 1
+        if cache is not None:
+            cache.invalidate(device.state_key())
+        # Reopen in case the light was unplugged, and try again shortly
+        device.disconnect()
+        device.connect()
+        self._next_write = now + RETRY_SECONDS
+
+    def wait_time(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        Get how long until the pending target may be written.
+
+        Args:
+            now: Current clock() value; read from the clock if omitted
+
+        Returns:
+            Seconds, or None if nothing is pending
+        """
+        if self._pending is None:
+            return None
+        now = self.clock() if now is None else now
+        return max(0.0, self._next_write - now)
+
+
+class LineReader:
+    """Incremental, bounded reader of newline-separated readings from a file descriptor."""
+
+    def __init__(self, fd: int):
+        """
+        Initialize the reader.
+
+        Args:
+            fd: Readable file descriptor (stdin, a pipe or a FIFO)
+        """
+        self.fd = fd
+        self.dropped = 0
+        self._buffer = b''
+
+    def read(self, timeout: Optional[float]) -> Optional[List[bytes]]:
+        """
+        Wait for input and return the complete lines that arrived.
+
+        Args:
+            timeout: Seconds to wait, None to wait until input arrives
+
+        Returns:
+            Complete lines (possibly none if the timeout expired), or None at end of input
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            chunk = os.read(self.fd, 4096)
+        except BlockingIOError:
+            return []
+        if not chunk:
+            return None
+        lines = (self._buffer + chunk).split(b'\n')
+        self._buffer = lines.pop()
+        if len(self._buffer) > MAX_LINE:
+            self._buffer = b''
+            self.dropped += 1
+        return lines
+
+
+def open_source(source: str) -> int:
+    """
+    Open the reading source.
+
+    A FIFO is opened for reading and writing, so it never reports end of
+    input when the sensor process exits and the next writer simply
+    continues the stream.
+
+    Args:
+        source: '-' for stdin, or a path to a FIFO or file
+
+    Returns:
+        File descriptor
+
+    Raises:
+        OSError: If the source cannot be opened
+    """
+    if source == '-':
+        return sys.stdin.fileno()
+    if stat.S_ISFIFO(os.stat(source).st_mode):
+        return os.open(source, os.O_RDWR | os.O_NONBLOCK)
+    return os.open(source, os.O_RDONLY)
+
+
+def run(controller: AutoBrightness, fd: int, duration: Optional[float] = None):
+    """
+    Feed readings from a file descriptor to the controller until end of input.
+
+    Args:
+        controller: Controller driving the light
+        fd: Readable file descriptor from open_source()
+        duration: Stop after this many seconds; None runs until end of input
+    """
+    reader = LineReader(fd)
+    clock = controller.clock
+    end = None if duration is None else clock() + duration
+    while True:
+        now = clock()
+        if end is not None and now >= end:
+            return
+        timeout = controller.wait_time(now)
+        if end is not None:
+            timeout = end - now if timeout is None else min(timeout, end - now)
+        lines = reader.read(timeout)
+        if lines is None:
+            # Still write the last target the rate limit held back
+            wait = controller.wait_time()
+            if wait:
+                time.sleep(wait)
+            controller.flush()
+            return
+        for line in lines:
+            for token in line.split():
+                try:
+                    controller.feed(float(token))
+                except ValueError:
+                    controller.stats.invalid += 1
+        controller.stats.invalid += reader.dropped
+        reader.dropped = 0
+        controller.flush()
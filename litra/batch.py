@@ -0,0 +1,147 @@
+"""
+Parsing and validation of newline-delimited command scripts
+
+A script has one command per line, using the same words as the CLI:
+
+    on
+    brightness 180
+    brightness 75%
+    brightness +10
+    temperature -200
+    status
+
+Blank lines and lines starting with '#' are ignored.
+
+Author: RKaushik
+License: MIT
+"""
+
+from typing import Iterable, List, Optional, Tuple
+
+from .utils import validate_brightness, validate_temperature, percentage_to_lumen
+
+Command = Tuple[str, Optional[int]]
+
+SIMPLE_COMMANDS = ('on', 'off', 'toggle', 'status')
+VALUE_COMMANDS = ('brightness', 'temperature')
+
+
+class BatchError(ValueError):
+    """Raised when a script line is not a valid command."""
+
+    def __init__(self, line_number: int, message: str):
+        super().__init__(f"line {line_number}: {message}")
+        self.line_number = line_number
+        self.message = message
+
+
+def parse_command(text: str) -> Command:
+    """
+    Parse and validate a single command.
+
+    Args:
+        text: Command text, e.g. "brightness 180", "brightness 75 -p" or "temperature -200"
+
+    Returns:
+        (command, value) tuple; brightness is always returned in lumens and
+        signed values become 'brightness_delta' / 'temperature_delta' commands
+
+    Raises:
+        ValueError: If the command is unknown or its value is invalid
+    """
+    words = text.split()
+    if not words:
+        raise ValueError("Empty command")
+
+    command = words[0].lower()
+    args = words[1:]
+
+    if command in SIMPLE_COMMANDS:
+        if args:
+            raise ValueError(f"'{command}' takes no arguments")
+        return command, None
+
+    if command not in VALUE_COMMANDS:
+        raise ValueError(f"Unknown command '{command}'")
+
+    is_percentage = False
+    if command == 'brightness':
+        if len(args) == 2 and args[1] in ('-p', '--percentage'):
+            is_percentage = True
+            args = args[:1]
+        elif len(args) == 1 and args[0].endswith('%'):
+            is_percentage = True
+            args = [args[0][:-1]]
+
+    if len(args) != 1:
+        raise ValueError(f"'{command}' takes exactly one value")
+
+    try:
+        value = int(args[0])
+    except ValueError:
+        raise ValueError(f"Invalid {command} value '{args[0]}'. Must be an integer.") from None
+
+    if args[0][0] in '+-':
+        return parse_adjustment(command, value, is_percentage)
+
+    if command == 'brightness':
+        if is_percentage:
+            if value < 0 or value > 100:
+                raise ValueError("Brightness percentage must be between 0 and 100")
+            value = percentage_to_lumen(value)
+        is_valid, error_msg = validate_brightness(value)
+    else:
+        is_valid, error_msg = validate_temperature(value)
+
+    if not is_valid:
+        raise ValueError(error_msg)
+    return command, value
+
+
+def parse_adjustment(command: str, delta: int, is_percentage: bool = False) -> Command:
+    """
+    Build a relative brightness or temperature adjustment.
+
+    Args:
+        command: 'brightness' or 'temperature'
+        delta: Signed change in lumens, percent or Kelvin
+        is_percentage: Interpret a brightness delta as a percentage of the range
+
+    Returns:
+        ('brightness_delta', lumens) or ('temperature_delta', kelvin)
+
+    Raises:
+        ValueError: If a temperature delta is not a multiple of 100
+    """
+    if command == 'brightness':
+        if is_percentage:
+            delta = int(round(delta * (250 - 20) / 100.0))
+        return 'brightness_delta', delta
+    if delta % 100 != 0:
+        raise ValueError("Temperature change must be a multiple of 100")
+    return 'temperature_delta', delta
+
+
+def parse_batch(lines: Iterable[str]) -> List[Command]:
+    """
+    Parse and validate a whole script before anything is sent.
+
+    Args:
+        lines: Script lines
+
+    Returns:
+        List of (command, value) tuples
+
+    Raises:
+        BatchError: For the first invalid line
+    """
+    commands = []
+    for line_number, line in enumerate(lines, 1):
+        text = line.strip()
+        if not text or text.startswith('#'):
+            continue
+        try:
+            commands.append(parse_command(text))
+        except ValueError as e:
+            raise BatchError(line_number, str(e)) from None
+    return commands
@@ -0,0 +1,298 @@
+"""
+HID traffic capture and replay
+
+When capture is on, LitraDevice appends every report it writes or reads
+to a binary log together with a monotonic timestamp and its direction.
+A log of a user's session can then be replayed into a real light or an
+emulator, at the original pace or as fast as the light accepts reports,
+and the status replies it gets back are compared with the recorded ones.
+
+Capture is off by default; the instrumented code then only checks a
+module global. Turn it on with start(), the CLI's --capture FILE option,
+or LITRA_CAPTURE=FILE. An existing log is appended to, so several
+invocations can be recorded into one file.
+
+File layout (little-endian):
+
+  header  4s magic 'LCAP', B version, x, H record size,
+          Q wall-clock time the log was created (ns since the epoch)
+  record  Q CLOCK_MONOTONIC timestamp (ns), B direction (0 out, 1 in),
+          3x, then the 20-byte report
+
+Author: RKaushik
+License: MIT
+"""
+
+import atexit
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Callable, Iterator, Optional, Tuple
+
+from .commands import REPORT_LENGTH, GET_STATUS_REPORT, parse_status_response, report_header
+
+MAGIC = b'LCAP'
+VERSION = 1
+
+HEADER_STRUCT = struct.Struct('<4sBxHQ')
+RECORD_STRUCT = struct.Struct(f'<QB3x{REPORT_LENGTH}s')
+
+OUT = 0
+IN = 1
+
+_STATUS_HEADER = report_header(GET_STATUS_REPORT)
+
+
+class CaptureWriter:
+    """Appends reports to a capture log."""
+
+    def __init__(self, path: str):
+        """
+        Open a log for appending, writing its header if it is new.
+
+        Args:
+            path: Log file
+
+        Raises:
+            ValueError: If the file exists but is not a capture log
+            OSError: If the file cannot be opened
+        """
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'ab')
+        try:
+            if self._file.tell() == 0:
+                self._file.write(HEADER_STRUCT.pack(MAGIC, VERSION, RECORD_STRUCT.size, time.time_ns()))
+            else:
+                with open(path, 'rb') as fh:
+                    _check_header(fh.read(HEADER_STRUCT.size), path)
+        except BaseException:
+            self._file.close()
+            raise
+
+    def record(self, direction: int, report: bytes):
+        """
+        Append one report.
+
+        Args:
+            direction: OUT for reports sent to the light, IN for reports read from it
+            report: Report bytes; padded or truncated to 20 bytes
+        """
+        data = RECORD_STRUCT.pack(time.monotonic_ns(), direction, bytes(report))
+        with self._lock:
+            if self._file is not None:
+                self._file.write(data)
+                self.records += 1
+
+    def flush(self):
+        """Push buffered records to the file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        """Flush and close the log."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _check_header(data: bytes, path: str) -> int:
+    if len(data) < HEADER_STRUCT.size:
+        raise ValueError(f"{path} is not a capture log")
+    magic, version, record_size, created_ns = HEADER_STRUCT.unpack_from(data)
+    if magic != MAGIC or version != VERSION or record_size != RECORD_STRUCT.size:
+        raise ValueError(f"{path} is not a version {VERSION} capture log")
+    return created_ns
+
+
+class CaptureLog:
+    """Capture log, memory-mapped for reading."""
+
+    def __init__(self, path: str):
+        """
+        Map a log.
+
+        A record cut short at the end of the file (the recording process
+        died mid-write) is ignored.
+
+        Args:
+            path: Log file
+
+        Raises:
+            ValueError: If the file is not a capture log
+            OSError: If the file cannot be read
+        """
+        self.path = path
+        with open(path, 'rb') as fh:
+            self.created_ns = _check_header(fh.read(HEADER_STRUCT.size), path)
+            size = os.fstat(fh.fileno()).st_size
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._count = (size - HEADER_STRUCT.size) // RECORD_STRUCT.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Tuple[int, int, bytes]:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("capture record index out of range")
+        return RECORD_STRUCT.unpack_from(self._map, HEADER_STRUCT.size + index * RECORD_STRUCT.size)
+
+    def __iter__(self) -> Iterator[Tuple[int, int, bytes]]:
+        """Yield (timestamp_ns, direction, report) tuples in recording order."""
+        if not self._count:
+            return iter(())
+        end = HEADER_STRUCT.size + self._count * RECORD_STRUCT.size
+        return RECORD_STRUCT.iter_unpack(memoryview(self._map)[HEADER_STRUCT.size:end])
+
+    def close(self):
+        """Unmap the log."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _status(report) -> Optional[dict]:
+    status = parse_status_response(report)
+    return None if 'error' in status else status.to_dict()
+
+
+def replay(log: CaptureLog, device, realtime: bool = True, speed: float = 1.0,
+           max_gap: Optional[float] = None, timeout_ms: int = 1000,
+           clock: Callable[[], float] = time.perf_counter,
+           sleep: Callable[[float], None] = time.sleep) -> dict:
+    """
+    Play a capture log into an open device.
+
+    Recorded writes are sent again. Each recorded status reply is matched
+    by reading the device's reply to the replayed status request, and both
+    are decoded with parse_status_response and compared. Other recorded
+    input reports (acknowledgements, button press notifications) cannot be
+    reproduced and are skipped. For replies to match, the light should start
+    in the state it was in when the capture began.
+
+    Args:
+        log: Capture log
+        device: Connected LitraDevice to replay into
+        realtime: Keep the recorded spacing between writes; otherwise send
+            every report as soon as the previous one is done
+        speed: With realtime, play this many times faster than recorded
+        max_gap: With realtime, shorten pauses longer than this many seconds
+            (for example between separate CLI invocations)
+        timeout_ms: Milliseconds to wait for each status reply
+        clock: Clock in seconds
+        sleep: Sleep function in seconds
+
+    Returns:
+        Dictionary with 'records', 'writes', 'failed_writes', 'replies',
+        'missing' (replies that never came), 'skipped', 'mismatches' (list
+        of {'record', 'at_s', 'expected', 'actual'}), 'elapsed_s',
+        'recorded_s' and 'reports_per_second'
+    """
+    result = {'records': len(log), 'writes': 0, 'failed_writes': 0, 'replies': 0, 'missing': 0,
+              'skipped': 0, 'mismatches': []}
+    start = clock()
+    first = previous = None
+    offset = 0.0
+
+    for index, (timestamp_ns, direction, report) in enumerate(log):
+        if first is None:
+            first = previous = timestamp_ns
+        gap = (timestamp_ns - previous) / 1e9
+        if max_gap is not None and gap > max_gap:
+            gap = max_gap
+        offset += gap
+        previous = timestamp_ns
+
+        if direction == OUT:
+            if realtime:
+                delay = start + offset / speed - clock()
+                if delay > 0:
+                    sleep(delay)
+            if device.write(report):
+                result['writes'] += 1
+            else:
+                result['failed_writes'] += 1
+        elif report[:len(_STATUS_HEADER)] == _STATUS_HEADER:
+            expected = _status(report)
+            response = device.read_reply(GET_STATUS_REPORT, timeout_ms)
+            if response is None:
+                result['missing'] += 1
+                actual = None
+            else:
+                result['replies'] += 1
+                actual = _status(response)
+            if actual != expected:
+                result['mismatches'].append({'record': index, 'at_s': round(offset, 6),
+                                             'expected': expected, 'actual': actual})
+        else:
+            result['skipped'] += 1
+
+    elapsed = clock() - start
+    result['elapsed_s'] = elapsed
+    result['recorded_s'] = (previous - first) / 1e9 if first is not None else 0.0
+    result['reports_per_second'] = (result['writes'] + result['replies']) / elapsed if elapsed > 0 else 0.0
+    return result
+
+
+# The active writer, or None when capture is off. LitraDevice reads this
+# global directly so the disabled cost is one lookup.
+recorder: Optional[CaptureWriter] = None
+
+
+def start(path: str) -> CaptureWriter:
+    """
+    Start capturing to a log, replacing any capture in progress.
+
+    Args:
+        path: Log file; appended to if it exists
+
+    Returns:
+        The active CaptureWriter
+    """
+    global recorder
+    writer = CaptureWriter(path)
+    if recorder is not None:
+        recorder.close()
+    recorder = writer
+    return writer
+
+
+def stop():
+    """Stop capturing and close the log."""
+    global recorder
+    writer, recorder = recorder, None
+    if writer is not None:
+        writer.close()
+
+
+def get_capture() -> Optional[CaptureWriter]:
+    """
+    Get the active writer.
+
+    Returns:
+        CaptureWriter if capture is on, None otherwise
+    """
+    return recorder
+
+
+atexit.register(stop)
+
+if os.environ.get('LITRA_CAPTURE'):
+    try:
+        start(os.environ['LITRA_CAPTURE'])
+    except (OSError, ValueError) as e:
+        import sys
+        print(f"Warning: Cannot capture to {os.environ['LITRA_CAPTURE']} - {e}", file=sys.stderr)
@@ -0,0 +1,250 @@
+"""
+Write coalescing and rate limiting for high-frequency updates
+
+When brightness or temperature is bound to a slider or a MIDI knob, the
+controller can produce far more updates than the device and the USB stack
+can absorb. CoalescingWriter keeps only the latest pending value per
+attribute and sends them from a background thread at no more than a
+configured rate (a token bucket). Power commands skip the bucket and are
+always sent ahead of pending value updates.
+
+Author: RKaushik
+License: MIT
+"""
+
+import threading
+import time
+from typing import Callable, Optional, Union, List
+
+from .commands import (
+    TURN_ON_REPORT,
+    TURN_OFF_REPORT,
+    brightness_report,
+    temperature_report,
+)
+from .device import LitraDevice
+
+DEFAULT_MAX_RATE = 30.0
+
+# Function byte (report[3]) of each coalescable attribute, in send order
+_POWER = 0x1c
+_ATTRIBUTES = {_POWER: 'power', 0x4c: 'brightness', 0x9c: 'temperature'}
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` events per second with bursts of `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+            clock: Monotonic clock in seconds
+        """
+        self.rate = rate
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.clock = clock
+        self._last = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_take(self) -> bool:
+        """
+        Take a token if one is available.
+
+        Returns:
+            True if a token was taken
+        """
+        self._refill()
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """
+        Get the time until the next token is available.
+
+        Returns:
+            Seconds to wait, 0 if a token is available now
+        """
+        self._refill()
+        return max(0.0, (1.0 - self.tokens) / self.rate)
+
+
+class CoalescingWriter:
+    """
+    Opt-in coalescing front end for LitraDevice.write().
+
+    Reports other than power, brightness and temperature (e.g. status
+    requests) are written through immediately.
+    """
+
+    def __init__(self, device: LitraDevice, max_rate: float = DEFAULT_MAX_RATE, burst: int = 1):
+        """
+        Initialize the writer and start its flush thread.
+
+        Args:
+            device: Connected LitraDevice
+            max_rate: Maximum brightness/temperature writes per second
+            burst: Number of value writes allowed back-to-back after an idle period
+        """
+        if max_rate <= 0:
+            raise ValueError("max_rate must be greater than 0")
+        self.device = device
+        self.bucket = TokenBucket(max_rate, burst)
+        self.accepted = 0
+        self.merged = 0
+        self.sent = 0
+        self.failed = 0
+        self._pending = {}
+        self._io_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._busy = False
+        self._thread = threading.Thread(target=self._run, name='litra-coalesce', daemon=True)
+        self._thread.start()
+
+    def write(self, data: Union[bytes, List[int]]) -> bool:
+        """
+        Queue a report, replacing any pending report for the same attribute.
+
+        Args:
+            data: Report bytes or list of bytes
+
+        Returns:
+            True if the report was accepted (or, for pass-through reports, written)
+        """
+        function = data[3] if len(data) > 3 else None
+        attribute = _ATTRIBUTES.get(function)
+        if attribute is None:
+            with self._io_lock:
+                return self.device.write(data)
+
+        with self._cond:
+            if self._closed:
+                return False
+            self.accepted += 1
+            if attribute in self._pending:
+                self.merged += 1
+            self._pending[attribute] = data
+            self._cond.notify()
+        return True
+
+    def set_power(self, on: bool) -> bool:
+        """Queue a power command."""
+        return self.write(TURN_ON_REPORT if on else TURN_OFF_REPORT)
+
+    def set_brightness(self, brightness_lumen: int) -> bool:
+        """
+        Queue a brightness update.
+
+        Args:
+            brightness_lumen: Brightness in lumens (20-250)
+
+        Returns:
+            True if the update was accepted
+
+        Raises:
+            ValueError: If the brightness is outside the supported range
+        """
+        return self.write(brightness_report(brightness_lumen))
+
+    def set_temperature(self, temperature_kelvin: int) -> bool:
+        """
+        Queue a temperature update.
+
+        Args:
+            temperature_kelvin: Temperature in Kelvin (2700-6500, multiples of 100)
+
+        Returns:
+            True if the update was accepted
+
+        Raises:
+            ValueError: If the temperature is not a supported value
+        """
+        return self.write(temperature_report(temperature_kelvin))
+
+    def _next_report(self) -> Optional[bytes]:
+        """Pick the next report to send, or None if nothing can be sent yet. Caller holds _cond."""
+        if 'power' in self._pending:
+            return self._pending.pop('power')
+        if self._pending and self.bucket.try_take():
+            attribute = next(iter(self._pending))
+            return self._pending.pop(attribute)
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+                while True:
+                    if self._closed and not self._pending:
+                        return
+                    report = self._next_report()
+                    if report is not None:
+                        break
+                    self._cond.wait(self.bucket.wait_time() if self._pending else None)
+                self._busy = True
+
+            with self._io_lock:
+                ok = self.device.write(report)
+            with self._cond:
+                if ok:
+                    self.sent += 1
+                else:
+                    self.failed += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every pending update has been sent.
+
+        Args:
+            timeout: Seconds to wait, None to wait forever
+
+        Returns:
+            True if nothing is pending any more
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Send what is still pending and stop the flush thread.
+
+        Args:
+            timeout: Seconds to wait for the pending updates
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        """
+        Get the write counters.
+
+        Returns:
+            Dictionary with 'accepted', 'merged', 'sent', 'failed' and 'pending'
+        """
+        with self._cond:
+            return {
+                'accepted': self.accepted,
+                'merged': self.merged,
+                'sent': self.sent,
+                'failed': self.failed,
+                'pending': len(self._pending),
+            }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
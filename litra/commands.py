@@ -5,7 +5,98 @@ Author: RKaushik
 License: MIT
 """
 
-from typing import List
+import struct
+from collections.abc import Mapping as _MappingABC
+from types import MappingProxyType
+from typing import List, Mapping, Optional, Union
+
+# Every HID output report sent to the device is exactly this long
+REPORT_LENGTH = 20
+
+
+def _report(*prefix: int) -> bytes:
+    """Build a zero-padded 20-byte report from its leading bytes."""
+    return bytes(prefix).ljust(REPORT_LENGTH, b'\x00')
+
+
+# Ready-to-send reports. The whole command space is small enough (231 lumen
+# values, 39 temperatures, on, off and status) to build once at import time,
+# so the write path never has to assemble or pad a report.
+TURN_ON_REPORT = _report(0x11, 0xff, 0x04, 0x1c, 0x01)
+TURN_OFF_REPORT = _report(0x11, 0xff, 0x04, 0x1c, 0x00)
+GET_STATUS_REPORT = _report(0x11, 0xff, 0x04, 0x01)
+
+BRIGHTNESS_REPORTS: Mapping[int, bytes] = MappingProxyType({
+    lumen: _report(0x11, 0xff, 0x04, 0x4c, (lumen >> 8) & 0xFF, lumen & 0xFF)
+    for lumen in range(20, 251)
+})
+
+TEMPERATURE_REPORTS: Mapping[int, bytes] = MappingProxyType({
+    kelvin: _report(0x11, 0xff, 0x04, 0x9c, (kelvin >> 8) & 0xFF, kelvin & 0xFF)
+    for kelvin in range(2700, 6501, 100)
+})
+
+
+def brightness_report(brightness_lumen: int) -> bytes:
+    """
+    Get the precomputed report that sets brightness in lumens.
+    
+    Args:
+        brightness_lumen: Brightness value in lumens (20-250)
+        
+    Returns:
+        20-byte report
+        
+    Raises:
+        ValueError: If the brightness is outside the supported range
+    """
+    try:
+        return BRIGHTNESS_REPORTS[brightness_lumen]
+    except KeyError:
+        raise ValueError(f"Brightness must be between 20 and 250 lumens, got {brightness_lumen}") from None
+
+
+def temperature_report(temperature_kelvin: int) -> bytes:
+    """
+    Get the precomputed report that sets color temperature in Kelvin.
+    
+    Args:
+        temperature_kelvin: Temperature value in Kelvin (2700-6500, multiples of 100)
+        
+    Returns:
+        20-byte report
+        
+    Raises:
+        ValueError: If the temperature is not a supported value
+    """
+    try:
+        return TEMPERATURE_REPORTS[temperature_kelvin]
+    except KeyError:
+        raise ValueError(f"Temperature must be a multiple of 100 between 2700K and 6500K, "
+                         f"got {temperature_kelvin}") from None
+
+
+def state_report(field: str, value) -> bytes:
+    """
+    Get the precomputed report that sets one state field.
+    
+    Args:
+        field: 'power', 'brightness_lumen' or 'temperature_kelvin'
+        value: 'on'/'off', lumens or Kelvin
+        
+    Returns:
+        20-byte report
+        
+    Raises:
+        ValueError: If the field or value is not supported
+    """
+    if field == 'power':
+        return TURN_ON_REPORT if value == 'on' else TURN_OFF_REPORT
+    if field == 'brightness_lumen':
+        return brightness_report(value)
+    if field == 'temperature_kelvin':
+        return temperature_report(value)
+    raise ValueError(f"Unknown state field '{field}'")
 
 
 def turn_on_command() -> List[int]:
@@ -72,35 +163,186 @@ def set_temperature_command(temperature_kelvin: int) -> List[int]:
     return [0x11, 0xff, 0x04, 0x9c, temp_high, temp_low]
 
 
-def parse_status_response(response: List[int]) -> dict:
+# Status reply: 4 header bytes, power, brightness and temperature (big-endian)
+STATUS_STRUCT = struct.Struct('>4xBHH11x')
+_STATUS_PREFIX = struct.Struct('>4xBHH')
+STATUS_FIELDS = ('power', 'brightness_lumen', 'temperature_kelvin')
+
+
+class LitraStatus(_MappingABC):
+    """
+    Immutable decoded status report.
+    
+    Fields are read as attributes (``status.power``) or, for compatibility
+    with code written against the old status dictionaries, as mapping keys
+    (``status['power']``, ``status.get('brightness_lumen')``, ``dict(status)``).
+    """
+    
+    __slots__ = ('_power', '_brightness_lumen', '_temperature_kelvin')
+    
+    def __init__(self, power: str, brightness_lumen: Optional[int] = None,
+                 temperature_kelvin: Optional[int] = None):
+        """
+        Initialize a status record.
+        
+        Args:
+            power: 'on' or 'off'
+            brightness_lumen: Brightness in lumens, or None if not reported
+            temperature_kelvin: Temperature in Kelvin, or None if not reported
+        """
+        self._power = power
+        self._brightness_lumen = brightness_lumen
+        self._temperature_kelvin = temperature_kelvin
+    
+    @property
+    def power(self) -> str:
+        return self._power
+    
+    @property
+    def brightness_lumen(self) -> Optional[int]:
+        return self._brightness_lumen
+    
+    @property
+    def temperature_kelvin(self) -> Optional[int]:
+        return self._temperature_kelvin
+    
+    def __getitem__(self, key: str):
+        if key == 'power':
+            return self._power
+        if key == 'brightness_lumen':
+            return self._brightness_lumen
+        if key == 'temperature_kelvin':
+            return self._temperature_kelvin
+        raise KeyError(key)
+    
+    def __iter__(self):
+        return iter(STATUS_FIELDS)
+    
+    def __len__(self) -> int:
+        return len(STATUS_FIELDS)
+    
+    def __contains__(self, key) -> bool:
+        return key in STATUS_FIELDS
+    
+    def __hash__(self) -> int:
+        return hash((self._power, self._brightness_lumen, self._temperature_kelvin))
+    
+    def __repr__(self) -> str:
+        return (f"LitraStatus(power={self._power!r}, brightness_lumen={self._brightness_lumen!r}, "
+                f"temperature_kelvin={self._temperature_kelvin!r})")
+    
+    def to_dict(self) -> dict:
+        """
+        Convert to a plain status dictionary, e.g. for JSON output.
+        
+        Returns:
+            Dictionary with 'power', 'brightness_lumen' and 'temperature_kelvin'
+        """
+        return {
+            'power': self._power,
+            'brightness_lumen': self._brightness_lumen,
+            'temperature_kelvin': self._temperature_kelvin
+        }
+
+
+def parse_status_response(response: Union[bytes, bytearray, memoryview, List[int]]) -> Union[LitraStatus, dict]:
     """
     Parse the status response from the device.
     
     Args:
-        response: Raw response bytes from device
+        response: Raw response from the device, as bytes, a memoryview or a list of byte values
         
     Returns:
-        Dictionary with status information
+        LitraStatus, or a dictionary with an 'error' key if the response is too short
     """
     if not response or len(response) < 5:
         return {'error': 'Invalid response'}
     
-    status = {
-        'power': 'on' if response[4] == 1 else 'off',
-        'brightness_lumen': None,
-        'temperature_kelvin': None
-    }
-    
-    # Parse brightness if available (bytes 5-6)
-    if len(response) >= 7:
-        brightness = (response[5] << 8) | response[6]
-        if brightness > 0:
-            status['brightness_lumen'] = brightness
-    
-    # Parse temperature if available (bytes 7-8)
-    if len(response) >= 9:
-        temperature = (response[7] << 8) | response[8]
-        if temperature > 0:
-            status['temperature_kelvin'] = temperature
-    
-    return status
+    if type(response) is list:
+        response = bytes(response)
+    if len(response) >= _STATUS_PREFIX.size:
+        power, brightness, temperature = _STATUS_PREFIX.unpack_from(response)
+        # Zero means the field was not reported
+        return LitraStatus('on' if power == 1 else 'off', brightness or None, temperature or None)
+    
+    # Truncated report: decode whatever fields are complete
+    brightness = (response[5] << 8) | response[6] if len(response) >= 7 else 0
+    return LitraStatus('on' if response[4] == 1 else 'off', brightness or None, None)
+
+
+def parse_status_reports(buffer: Union[bytes, bytearray, memoryview]) -> List[LitraStatus]:
+    """
+    Decode a contiguous buffer of status reports in one pass.
+    
+    Args:
+        buffer: Concatenated 20-byte status reports
+        
+    Returns:
+        One LitraStatus per report, in order
+        
+    Raises:
+        ValueError: If the buffer length is not a multiple of REPORT_LENGTH
+    """
+    if len(buffer) % REPORT_LENGTH:
+        raise ValueError(f"Buffer length must be a multiple of {REPORT_LENGTH}, got {len(buffer)}")
+    return [LitraStatus('on' if power == 1 else 'off', brightness or None, temperature or None)
+            for power, brightness, temperature in STATUS_STRUCT.iter_unpack(buffer)]
+
+
+# A reply repeats the first four bytes of the request it answers. Reports
+# the light sends on its own (button presses) carry software ID 0 in the
+# low nibble of byte 3; requests sent by this library never do.
+HEADER_LENGTH = 4
+POWER_EVENT = 0x00
+BRIGHTNESS_EVENT = 0x10
+TEMPERATURE_EVENT = 0x20
+
+
+def report_header(report) -> bytes:
+    """
+    Get the bytes that correlate a reply with its request.
+    
+    Args:
+        report: Report bytes or list of bytes
+        
+    Returns:
+        First HEADER_LENGTH bytes
+    """
+    return bytes(report[:HEADER_LENGTH])
+
+
+def is_notification(report) -> bool:
+    """
+    Check whether a report was sent unsolicited by the light.
+    
+    Args:
+        report: Report bytes or list of bytes
+        
+    Returns:
+        True for button press notifications, False for replies
+    """
+    return len(report) >= HEADER_LENGTH and report[0] == 0x11 and report[2] == 0x04 and report[3] & 0x0F == 0
+
+
+def parse_event(report) -> dict:
+    """
+    Parse a button press notification.
+    
+    Args:
+        report: Report bytes or list of bytes
+        
+    Returns:
+        Dictionary with 'event' ('power', 'brightness' or 'temperature') and
+        the new 'power', 'brightness_lumen' or 'temperature_kelvin', or a
+        dictionary with an 'error' key
+    """
+    if not is_notification(report) or len(report) < 6:
+        return {'error': 'Invalid event'}
+    value = (report[4] << 8) | report[5]
+    if report[3] == POWER_EVENT:
+        return {'event': 'power', 'power': 'on' if report[4] == 1 else 'off'}
+    if report[3] == BRIGHTNESS_EVENT:
+        return {'event': 'brightness', 'brightness_lumen': value}
+    if report[3] == TEMPERATURE_EVENT:
+        return {'event': 'temperature', 'temperature_kelvin': value}
+    return {'error': f"Unknown event 0x{report[3]:02x}"}
@@ -0,0 +1,348 @@
+"""
+Litra Glow control daemon (litrad)
+
+Keeps the Litra Glow HID handle open and serves commands over a Unix
+domain socket, so that each CLI invocation only costs a socket round-trip
+instead of a USB enumeration and open/close cycle.
+
+Protocol: one JSON object per line in each direction. Requests look like
+``{"command": "brightness", "value": 150}``; replies carry ``"ok"`` plus
+either the result fields or ``"error"`` and ``"exit_code"``.
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Optional
+
+from . import history, metrics
+from .device import LitraDevice, get_device
+from .state import StateCache, default_ttl
+from .utils import validate_brightness, validate_temperature
+
+# Exit codes mirrored from litra_control.py so replies can be passed through
+EXIT_DEVICE_NOT_FOUND = 1
+EXIT_INVALID_PARAMETER = 2
+EXIT_COMMUNICATION_ERROR = 3
+
+COMMANDS = ('ping', 'metrics', 'history', 'on', 'off', 'toggle', 'brightness', 'temperature',
+            'brightness_delta', 'temperature_delta', 'status')
+
+
+def default_socket_path() -> str:
+    """
+    Get the socket path used by the daemon and its clients.
+
+    Returns:
+        Value of LITRA_SOCKET if set, otherwise a per-user path in the temp dir
+    """
+    path = os.environ.get('LITRA_SOCKET')
+    if path:
+        return path
+    return os.path.join(tempfile.gettempdir(), f"litrad-{os.getuid()}.sock")
+
+
+def _error(message: str, exit_code: int) -> dict:
+    return {'ok': False, 'error': message, 'exit_code': exit_code}
+
+
+class LitraDaemon:
+    """Owns an open LitraDevice and executes requests against it."""
+
+    def __init__(self, socket_path: Optional[str] = None,
+                 device_factory: Callable[[], Optional[LitraDevice]] = get_device,
+                 state_ttl: Optional[float] = None):
+        """
+        Initialize the daemon.
+
+        Args:
+            socket_path: Unix socket path to listen on
+            device_factory: Callable returning a connected LitraDevice or None
+            state_ttl: Seconds to trust the in-memory shadow state (default: $LITRA_STATE_TTL or 30)
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self.device_factory = device_factory
+        self.device = None
+        self.state_cache = StateCache(ttl=default_ttl() if state_ttl is None else state_ttl)
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _open_device(self) -> Optional[LitraDevice]:
+        if self.device is None:
+            device = self.device_factory()
+            if device is not None and device.device is None:
+                device.connect()
+            if device is not None and device.device is not None:
+                device.state_cache = self.state_cache
+                self.device = device
+        return self.device
+
+    def _drop_device(self):
+        if self.device is not None:
+            self.state_cache.invalidate(self.device.state_key())
+            try:
+                self.device.disconnect()
+            except (IOError, OSError):
+                pass
+            self.device = None
+
+    def _execute(self, device: LitraDevice, command: str, value: Optional[int]) -> dict:
+        result = device.execute(command, value)
+        if not result['ok']:
+            return _error(result['error'], EXIT_COMMUNICATION_ERROR)
+        del result['command']
+        result.pop('value', None)
+        return result
+
+    def handle_request(self, request: dict) -> dict:
+        """
+        Execute a single request against the device.
+
+        Args:
+            request: Decoded request with 'command' and optional 'value'
+
+        Returns:
+            Reply dictionary
+        """
+        command = request.get('command')
+        value = request.get('value')
+
+        if command not in COMMANDS:
+            return _error(f"Unknown command '{command}'", EXIT_INVALID_PARAMETER)
+        if command == 'ping':
+            return {'ok': True, 'pid': os.getpid()}
+        if command == 'metrics':
+            recorder = metrics.get_metrics()
+            if recorder is None:
+                return _error("Metrics are not enabled; start litrad with --metrics", EXIT_INVALID_PARAMETER)
+            return {'ok': True, 'metrics': recorder.to_dict()}
+        if command == 'history':
+            events = history.get_history()
+            if events is None:
+                return _error("History is not enabled; start litrad with --history", EXIT_INVALID_PARAMETER)
+            if value is not None and (not isinstance(value, int) or value < 0):
+                return _error("history value must be a number of seconds", EXIT_INVALID_PARAMETER)
+            since = None if value is None else time.time() - value
+            return {'ok': True, 'events': events.query(since=since)}
+        if command == 'brightness':
+            is_valid, error_msg = validate_brightness(value)
+            if not is_valid:
+                return _error(error_msg, EXIT_INVALID_PARAMETER)
+        elif command == 'temperature':
+            is_valid, error_msg = validate_temperature(value)
+            if not is_valid:
+                return _error(error_msg, EXIT_INVALID_PARAMETER)
+        elif command in ('brightness_delta', 'temperature_delta'):
+            if not isinstance(value, int):
+                return _error(f"{command} value must be an integer", EXIT_INVALID_PARAMETER)
+            if command == 'temperature_delta' and value % 100 != 0:
+                return _error("Temperature change must be a multiple of 100", EXIT_INVALID_PARAMETER)
+
+        with self._lock:
+            # A failure on a cached handle usually means the light was
+            # unplugged and replugged, so reopen once before giving up.
+            for attempt in range(2):
+                device = self._open_device()
+                if device is None:
+                    return _error("Litra Glow device not found. Please check USB connection.",
+                                  EXIT_DEVICE_NOT_FOUND)
+                try:
+                    reply = self._execute(device, command, value)
+                except (IOError, OSError) as e:
+                    reply = _error(f"Communication failed - {e}", EXIT_COMMUNICATION_ERROR)
+                if reply['ok'] or attempt:
+                    return reply
+                self._drop_device()
+
+    def bind(self):
+        """Create the listening socket, replacing a stale one if present."""
+        if os.path.exists(self.socket_path):
+            if send_request('ping', socket_path=self.socket_path) is not None:
+                raise OSError(f"litrad is already running on {self.socket_path}")
+            os.unlink(self.socket_path)
+        self._server = _DaemonServer(self.socket_path, _RequestHandler)
+        self._server.litra_daemon = self
+        os.chmod(self.socket_path, 0o600)
+
+    def serve_forever(self):
+        """Serve requests until shutdown() is called."""
+        if self._server is None:
+            self.bind()
+        self._server.serve_forever()
+
+    def shutdown(self):
+        """Stop serving requests. Must be called from another thread."""
+        if self._server is not None:
+            self._server.shutdown()
+
+    def close(self):
+        """Close the listening socket and the device handle."""
+        if self._server is not None:
+            self._server.server_close()
+            self._server = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+        with self._lock:
+            self._drop_device()
+
+
+class _DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Reads JSON requests line by line until the client disconnects."""
+
+    def handle(self):
+        daemon = self.server.litra_daemon
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be an object")
+            except ValueError as e:
+                reply = _error(f"Invalid request - {e}", EXIT_INVALID_PARAMETER)
+            else:
+                reply = daemon.handle_request(request)
+            self.wfile.write(json.dumps(reply).encode('utf-8') + b"\n")
+            self.wfile.flush()
+
+
+class DaemonClient:
+    """Persistent connection to a running litrad."""
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: float = 5.0):
+        """
+        Connect to the daemon.
+
+        Args:
+            socket_path: Unix socket path of the daemon
+            timeout: Socket timeout in seconds
+
+        Raises:
+            OSError: If no daemon is listening on the socket
+        """
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(socket_path or default_socket_path())
+        except OSError:
+            self._sock.close()
+            raise
+        self._file = self._sock.makefile('rb')
+
+    def request(self, command: str, value: Optional[int] = None) -> dict:
+        """
+        Send a request and wait for its reply.
+
+        Args:
+            command: Command name
+            value: Optional command argument
+
+        Returns:
+            Reply dictionary
+        """
+        request = {'command': command}
+        if value is not None:
+            request['value'] = value
+        self._sock.sendall(json.dumps(request).encode('utf-8') + b"\n")
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("litrad closed the connection")
+        return json.loads(line)
+
+    def close(self):
+        """Close the connection."""
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def send_request(command: str, value: Optional[int] = None,
+                 socket_path: Optional[str] = None, timeout: float = 5.0) -> Optional[dict]:
+    """
+    Send one request to the daemon if it is running.
+
+    Args:
+        command: Command name
+        value: Optional command argument
+        socket_path: Unix socket path of the daemon
+        timeout: Socket timeout in seconds
+
+    Returns:
+        Reply dictionary, or None if no daemon is running
+    """
+    try:
+        client = DaemonClient(socket_path, timeout)
+    except OSError:
+        return None
+    with client:
+        try:
+            return client.request(command, value)
+        except (OSError, ValueError) as e:
+            return _error(f"Daemon request failed - {e}", EXIT_COMMUNICATION_ERROR)
+
+
+def main(argv=None) -> int:
+    """Entry point for the litrad daemon."""
+    parser = argparse.ArgumentParser(
+        description="Keep a Litra Glow open and serve litra-control requests",
+        epilog="Author: RKaushik | License: MIT"
+    )
+    parser.add_argument('--socket', help='Unix socket path (default: $LITRA_SOCKET or temp dir)')
+    parser.add_argument('--state-ttl', type=float, metavar='SECONDS',
+                        help='Trust cached device state for this long (default: $LITRA_STATE_TTL or 30)')
+    parser.add_argument('--metrics', action='store_true',
+                        help='Record device I/O timings, served by `python -m litra.metrics`')
+    parser.add_argument('--history', type=int, nargs='?', const=history.DEFAULT_CAPACITY, metavar='EVENTS',
+                        help='Keep the last EVENTS device events (default: '
+                             f'{history.DEFAULT_CAPACITY}), served by `python -m litra.history`')
+    args = parser.parse_args(argv)
+
+    if args.metrics:
+        metrics.enable()
+    if args.history is not None:
+        if args.history <= 0:
+            parser.error("--history needs a positive number of events")
+        history.enable(args.history)
+
+    daemon = LitraDaemon(socket_path=args.socket, state_ttl=args.state_ttl)
+    try:
+        daemon.bind()
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    def _stop(signum, frame):
+        threading.Thread(target=daemon.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    print(f"litrad listening on {daemon.socket_path}", file=sys.stderr)
+    try:
+        daemon.serve_forever()
+    finally:
+        daemon.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
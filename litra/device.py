@@ -5,8 +5,23 @@ Author: RKaushik
 License: MIT
 """
 
-import hid
-from typing import Optional, List
+from time import monotonic, perf_counter
+from typing import Iterable, Optional, List, Tuple, Union
+
+from . import capture as _capture
+from . import history as _history
+from . import metrics as _metrics
+from . import timeouts as _timeouts
+from .commands import (
+    REPORT_LENGTH,
+    GET_STATUS_REPORT,
+    state_report,
+    parse_status_response,
+    report_header,
+    is_notification,
+    parse_event
+)
+from .transport import Transport, get_backend
 
 
 class LitraDevice:
@@ -24,15 +39,30 @@ class LitraDevice:
     MAX_TEMPERATURE_KELVIN = 6500
     TEMPERATURE_STEP = 100
     
-    def __init__(self, device_path: Optional[bytes] = None):
+    def __init__(self, device_path: Optional[bytes] = None, serial_number: Optional[str] = None,
+                 transport: Optional[Transport] = None):
         """
         Initialize a Litra device connection.
         
         Args:
             device_path: Optional specific device path to connect to
+            serial_number: Optional serial number, as reported by find_litra_devices()
+            transport: Optional unopened transport to use instead of the current backend
         """
         self.device = None
         self.device_path = device_path
+        self.serial_number = serial_number
+        self.transport = transport
+        # Optional litra.state.StateCache consulted and updated by execute()
+        self.state_cache = None
+        # Optional litra.dispatch.ReportDispatcher that owns all reads while running
+        self.dispatcher = None
+        # time.monotonic() by which every operation must be done, or None
+        self.deadline: Optional[float] = None
+        # Extra attempts when a status reply is lost or a write fails
+        self.max_retries = _timeouts.DEFAULT_RETRIES
+        self.timeout_floor_ms = _timeouts.default_floor_ms()
+        self.timeout_ceiling_ms = _timeouts.default_ceiling_ms()
         
     def connect(self) -> bool:
         """
@@ -41,66 +71,499 @@ class LitraDevice:
         Returns:
             True if connection successful, False otherwise
         """
+        if self.deadline is not None and monotonic() >= self.deadline:
+            return False
+        recorder = _metrics.recorder
+        if recorder is not None:
+            start = perf_counter()
         try:
-            if self.device_path:
-                self.device = hid.Device(path=self.device_path)
+            if self.transport is not None:
+                self.transport.open()
+                self.device = self.transport
             else:
-                # Find and connect to first available Litra Glow
-                self.device = hid.Device(self.VENDOR_ID, self.PRODUCT_ID_GLOW)
-            
-            return True
+                self.device = get_backend().open(self.device_path, self.VENDOR_ID, self.PRODUCT_ID_GLOW)
         except (IOError, OSError) as e:
+            if recorder is not None:
+                recorder.observe('open', self._metrics_serial(), perf_counter() - start, 'error', e)
+            if self.transport is None:
+                # The light may have been unplugged or re-enumerated under a new path
+                from .registry import invalidate_registry
+                invalidate_registry()
             return False
+        if recorder is not None:
+            recorder.observe('open', self.state_key(), perf_counter() - start)
+        return True
     
     def disconnect(self):
         """Close the device connection."""
         if self.device:
-            self.device.close()
-            self.device = None
+            recorder = _metrics.recorder
+            if recorder is None:
+                self.device.close()
+                self.device = None
+                return
+            serial, start = self._metrics_serial(), perf_counter()
+            try:
+                self.device.close()
+            except Exception as e:
+                recorder.observe('close', serial, perf_counter() - start, 'error', e)
+                raise
+            finally:
+                self.device = None
+            recorder.observe('close', serial, perf_counter() - start)
     
-    def write(self, data: List[int]) -> bool:
+    def _metrics_serial(self) -> str:
+        """Serial label for metrics, without querying the device."""
+        if self.serial_number:
+            return self.serial_number
+        if self.device_path:
+            return self.device_path.decode('utf-8', 'replace')
+        return 'default'
+    
+    def write(self, data: Union[bytes, List[int]]) -> bool:
         """
         Write data to the device.
         
+        Complete 20-byte reports (such as those in ``litra.commands``) are
+        sent as-is; shorter data is zero-padded first.
+        
         Args:
-            data: List of bytes to write
+            data: Report bytes or list of bytes to write
             
         Returns:
             True if write successful, False otherwise
         """
         if not self.device:
             return False
+        if self.deadline is not None and monotonic() >= self.deadline:
+            return False
         
+        recorder = _metrics.recorder
+        history = _history.recorder
+        if recorder is not None or history is not None:
+            start = perf_counter()
         try:
-            # Pad data to 20 bytes as required by the device
-            padded_data = data + [0x00] * (20 - len(data))
-            self.device.write(bytes(padded_data))
-            return True
-        except (IOError, OSError):
+            if type(data) is not bytes or len(data) != REPORT_LENGTH:
+                # Pad data to 20 bytes as required by the device
+                data = bytes(data).ljust(REPORT_LENGTH, b'\x00')
+            self.device.write(data)
+        except (IOError, OSError) as e:
+            if recorder is not None:
+                recorder.observe('write', self._metrics_serial(), perf_counter() - start, 'error', e)
+            if history is not None:
+                history.record(_history.WRITE, self._metrics_serial(), data, perf_counter() - start,
+                               _history.ERROR)
             return False
+        if recorder is not None:
+            recorder.observe('write', self._metrics_serial(), perf_counter() - start)
+        if history is not None:
+            history.record(_history.WRITE, self._metrics_serial(), data, perf_counter() - start)
+        capture = _capture.recorder
+        if capture is not None:
+            capture.record(_capture.OUT, data)
+        return True
     
-    def read(self, length: int = 20) -> Optional[List[int]]:
+    def read(self, length: int = 20, timeout_ms: Optional[int] = None) -> Optional[List[int]]:
         """
         Read data from the device.
         
         Args:
             length: Number of bytes to read
+            timeout_ms: Milliseconds to wait for a report (default: read_timeout_ms())
+            
+        Returns:
+            List of bytes read, or None if read failed or timed out
+        """
+        data = self.read_report(length, timeout_ms)
+        return list(data) if data else None
+    
+    def read_report(self, length: int = 20, timeout_ms: Optional[int] = None,
+                    poll: bool = False) -> Optional[bytes]:
+        """
+        Read one report without copying it into a list.
+        
+        Args:
+            length: Number of bytes to read
+            timeout_ms: Milliseconds to wait for a report (default:
+                read_timeout_ms()); never longer than the deadline allows
+            poll: Reader-loop mode for litra.dispatch: I/O errors are raised,
+                the timeout is not cut by the deadline, and only reports that
+                arrived are recorded (in the history and capture; the
+                dispatcher measures round trips for the metrics itself)
             
         Returns:
-            List of bytes read, or None if read failed
+            Report bytes as returned by the transport, or None if the read
+            failed or timed out
+        
+        Raises:
+            IOError: In poll mode, if the device is closed or the read failed
         """
         if not self.device:
+            if poll:
+                raise ConnectionError("Device is not connected")
             return None
+        if timeout_ms is None:
+            timeout_ms = self.read_timeout_ms()
+        elif self.deadline is not None and not poll:
+            timeout_ms = min(timeout_ms, _timeouts.remaining_ms(self.deadline))
         
+        recorder = None if poll else _metrics.recorder
+        history = _history.recorder
+        if recorder is not None or history is not None:
+            start = perf_counter()
         try:
-            data = self.device.read(length, timeout=1000)
-            return list(data) if data else None
-        except (IOError, OSError):
+            data = self.device.read(length, timeout=timeout_ms)
+        except (IOError, OSError) as e:
+            if poll:
+                raise
+            if recorder is not None:
+                recorder.observe('read', self._metrics_serial(), perf_counter() - start, 'error', e)
+            if history is not None:
+                history.record(_history.READ, self._metrics_serial(), None, perf_counter() - start,
+                               _history.ERROR)
             return None
+        if recorder is not None:
+            recorder.observe('read', self._metrics_serial(), perf_counter() - start,
+                             'ok' if data else 'timeout')
+        if history is not None and (data or not poll):
+            history.record(_history.READ, self._metrics_serial(), data, perf_counter() - start,
+                           _history.OK if data else _history.TIMEOUT)
+        if data:
+            capture = _capture.recorder
+            if capture is not None:
+                capture.record(_capture.IN, data)
+        return data or None
+    
+    def read_reply(self, request: bytes, timeout_ms: Optional[int] = None) -> Optional[bytes]:
+        """
+        Read until the reply to a request arrives.
+        
+        Replies are matched on their header bytes. Button press notifications
+        read on the way update the state cache; other reports (such as
+        acknowledgements of earlier commands) are discarded.
+        
+        Args:
+            request: Report the reply answers
+            timeout_ms: Milliseconds to wait for the reply in total
+                (default: read_timeout_ms())
+            
+        Returns:
+            Reply bytes, or None if no reply arrived in time
+        """
+        if timeout_ms is None:
+            timeout_ms = self.read_timeout_ms()
+        header = report_header(request)
+        deadline = monotonic() + timeout_ms / 1000.0
+        remaining = timeout_ms
+        while remaining > 0:
+            response = self.read_report(timeout_ms=remaining)
+            if response is None:
+                return None
+            if report_header(response) == header:
+                return response
+            if is_notification(response):
+                self.handle_notification(response)
+            remaining = int((deadline - monotonic()) * 1000)
+        return None
+    
+    def read_timeout_ms(self) -> int:
+        """
+        Get how long to wait for the next reply.
+        
+        The timeout follows this light's recent round-trip times (see
+        litra.timeouts), between timeout_floor_ms and timeout_ceiling_ms,
+        and is cut to what is left of the deadline.
+        
+        Returns:
+            Milliseconds; 0 once the deadline has passed
+        """
+        estimator = _timeouts.get_rtt_table().get(self.state_key())
+        timeout = estimator.timeout_ms(self.timeout_floor_ms, self.timeout_ceiling_ms)
+        if self.deadline is not None:
+            timeout = min(timeout, _timeouts.remaining_ms(self.deadline))
+        return timeout
+    
+    def _deadline_error(self, error: str) -> str:
+        if self.deadline is not None and monotonic() >= self.deadline:
+            return "Deadline exceeded"
+        return error
+    
+    def handle_notification(self, report) -> dict:
+        """
+        Apply a button press notification to the state cache.
+        
+        Args:
+            report: Notification report bytes
+            
+        Returns:
+            Event dictionary from parse_event
+        """
+        event = parse_event(report)
+        if 'error' not in event and self.state_cache is not None:
+            field = {'power': 'power', 'brightness': 'brightness_lumen',
+                     'temperature': 'temperature_kelvin'}[event['event']]
+            self.state_cache.update(self.state_key(), **{field: event[field]})
+        return event
+    
+    def state_key(self) -> str:
+        """
+        Get the key identifying this device in a StateCache.
+        
+        Returns:
+            Serial number if known, otherwise the device path, otherwise 'default'
+        """
+        if not self.serial_number and self.device is not None:
+            try:
+                self.serial_number = self.device.serial or None
+            except (AttributeError, IOError, OSError):
+                pass
+        if self.serial_number:
+            return self.serial_number
+        if self.device_path:
+            return self.device_path.decode('utf-8', 'replace')
+        return 'default'
+    
+    def query_status(self) -> dict:
+        """
+        Request and parse the current device status.
+        
+        Returns:
+            LitraStatus from parse_status_response, or a dictionary with an
+            'error' key if the request failed
+        """
+        history = _history.recorder
+        if history is not None:
+            start = perf_counter()
+        if self.dispatcher is not None:
+            response, outcome = self.dispatcher.exchange(GET_STATUS_REPORT)
+        else:
+            response, outcome = self._request_status()
+        if response is None:
+            # The request could not even be sent, or its reply never came
+            sent = outcome != 'error'
+            if history is not None:
+                history.record(_history.STATUS, self._metrics_serial(), GET_STATUS_REPORT,
+                               perf_counter() - start, _history.TIMEOUT if sent else _history.ERROR)
+            return {'error': self._deadline_error("Failed to read device status" if sent
+                                                  else "Failed to get device status")}
+        status = parse_status_response(response)
+        if history is not None:
+            history.record(_history.STATUS, self._metrics_serial(), response, perf_counter() - start,
+                           _history.ERROR if 'error' in status else _history.OK)
+        if 'error' not in status and self.state_cache is not None:
+            self.state_cache.update(self.state_key(), **status)
+        return status
+    
+    def _request_status(self) -> Tuple[Optional[bytes], str]:
+        """
+        Send a status request and wait for the reply, asking again if it is lost.
+        
+        The first wait is the adaptive read timeout and every retry doubles
+        it. Without a deadline, all attempts together take no longer than
+        timeout_ceiling_ms, the single wait used before timeouts adapted.
+        
+        Returns:
+            (reply, outcome), as from ReportDispatcher.exchange(): 'ok' with
+            the reply, or None with 'error' (not sent) or 'timeout'
+        """
+        rtt = _timeouts.get_rtt_table()
+        key = self.state_key()
+        timeout = self.read_timeout_ms()
+        budget_end = self.deadline
+        if budget_end is None:
+            budget_end = monotonic() + self.timeout_ceiling_ms / 1000.0
+        for attempt in range(self.max_retries + 1):
+            sent = monotonic()
+            if not self.write(GET_STATUS_REPORT):
+                return None, 'error'
+            response = self.read_reply(GET_STATUS_REPORT, min(timeout, _timeouts.remaining_ms(budget_end)))
+            if response:
+                if attempt == 0:
+                    rtt.observe(key, (monotonic() - sent) * 1000.0)
+                return response, 'ok'
+            # A retried reply could answer either request, so it is no sample
+            rtt.back_off(key)
+            timeout *= 2
+            if monotonic() >= budget_end:
+                break
+        return None, 'timeout'
+    
+    def current_state(self) -> dict:
+        """
+        Get the device state, from the shadow cache if it is fresh and complete.
+        
+        Returns:
+            Status dictionary with 'power', 'brightness_lumen' and
+            'temperature_kelvin', or a dictionary with an 'error' key
+        """
+        if self.state_cache is not None:
+            cached = self.state_cache.get(self.state_key())
+            if cached is not None and None not in cached.values():
+                return cached
+        return self.query_status()
+    
+    def _current(self, field: str) -> Tuple[Optional[object], Optional[str]]:
+        """Get one state field from the shadow cache, falling back to a status read."""
+        if self.state_cache is not None:
+            cached = self.state_cache.get(self.state_key())
+            if cached is not None and cached[field] is not None:
+                return cached[field], None
+        status = self.query_status()
+        if 'error' in status:
+            return None, status['error']
+        if status[field] is None:
+            return None, f"Device did not report {field.split('_')[0]}"
+        return status[field], None
+    
+    def _apply(self, result: dict, field: str, value) -> dict:
+        """Write one state change unless the shadow cache says it is already set."""
+        report = state_report(field, value)
+        
+        cache = self.state_cache
+        if cache is not None and cache.matches(self.state_key(), field, value):
+            result['ok'] = True
+            result[field] = value
+            result['skipped'] = True
+            return result
+        
+        if not self._write_with_retry(report):
+            if cache is not None:
+                cache.invalidate(self.state_key())
+            result['error'] = self._deadline_error("Failed to send command to device")
+            return result
+        if cache is not None:
+            cache.update(self.state_key(), **{field: value})
+        result['ok'] = True
+        result[field] = value
+        return result
+    
+    def _write_with_retry(self, report: bytes) -> bool:
+        """Write a report; under a deadline, reopen and retry a failed write while time is left."""
+        if self.write(report):
+            return True
+        if self.deadline is None or self.transport is not None:
+            return False
+        for _ in range(self.max_retries):
+            if monotonic() >= self.deadline:
+                break
+            # The light may have been re-enumerated; reopen it by path
+            self.disconnect()
+            if self.connect() and self.write(report):
+                return True
+        return False
+    
+    def execute(self, command: str, value: Optional[int] = None) -> dict:
+        """
+        Execute one high-level command on the open device.
+        
+        When a state_cache is attached, toggles and relative adjustments are
+        answered from it while it is fresh, and writes that would not change
+        the cached state are skipped (reported with 'skipped': True).
+        
+        Args:
+            command: One of 'on', 'off', 'toggle', 'brightness', 'temperature',
+                'brightness_delta', 'temperature_delta', 'status'
+            value: Lumens for 'brightness', Kelvin for 'temperature', or the
+                signed change for the '_delta' commands
+            
+        Returns:
+            Result dictionary with 'command', 'ok' and either result fields
+            ('power', 'brightness_lumen', 'temperature_kelvin', 'status') or 'error'
+            
+        Raises:
+            ValueError: If the command or value is not valid
+        """
+        result = {'command': command}
+        if value is not None:
+            result['value'] = value
+        result['ok'] = False
+        
+        if command == 'status':
+            status = self.query_status()
+            if 'error' in status:
+                result['error'] = status['error']
+                return result
+            result['ok'] = True
+            result['status'] = status.to_dict()
+            return result
+        
+        field, target, error = self.plan(command, value)
+        if error:
+            result['error'] = error
+            return result
+        return self._apply(result, field, target)
+    
+    def plan(self, command: str, value: Optional[int] = None) -> Tuple[Optional[str], object, Optional[str]]:
+        """
+        Work out the state change a command makes, without sending it.
+        
+        Toggles and relative adjustments need the current state, which comes
+        from the shadow cache while it is fresh, otherwise from a status read.
+        
+        Args:
+            command: Any command of execute() except 'status'
+            value: Command value, as for execute()
+            
+        Returns:
+            Tuple of (field, target value, error); field and target are None
+            if the current state could not be read
+            
+        Raises:
+            ValueError: If the command is not valid
+        """
+        if command == 'on' or command == 'off':
+            return 'power', command, None
+        if command == 'brightness':
+            return 'brightness_lumen', value, None
+        if command == 'temperature':
+            return 'temperature_kelvin', value, None
+        
+        if command == 'toggle':
+            field = 'power'
+        elif command == 'brightness_delta':
+            field = 'brightness_lumen'
+        elif command == 'temperature_delta':
+            field = 'temperature_kelvin'
+        else:
+            raise ValueError(f"Unknown command '{command}'")
+        
+        current, error = self._current(field)
+        if error:
+            return None, None, error
+        
+        if command == 'toggle':
+            target = 'off' if current == 'on' else 'on'
+        elif command == 'brightness_delta':
+            target = min(max(current + value, self.MIN_BRIGHTNESS_LUMEN), self.MAX_BRIGHTNESS_LUMEN)
+        else:
+            target = min(max(current + value, self.MIN_TEMPERATURE_KELVIN), self.MAX_TEMPERATURE_KELVIN)
+            target = round(target / self.TEMPERATURE_STEP) * self.TEMPERATURE_STEP
+        return field, target, None
+    
+    def execute_many(self, commands: Iterable[Tuple[str, Optional[int]]],
+                     stop_on_error: bool = True) -> List[dict]:
+        """
+        Execute a sequence of commands back-to-back on the open device.
+        
+        Args:
+            commands: (command, value) pairs, already validated
+            stop_on_error: Stop at the first failed command
+            
+        Returns:
+            List of result dictionaries as returned by execute()
+        """
+        results = []
+        for command, value in commands:
+            result = self.execute(command, value)
+            results.append(result)
+            if stop_on_error and not result['ok']:
+                break
+        return results
     
     def __enter__(self):
-        """Context manager entry."""
-        self.connect()
+        """Context manager entry; connects unless already connected."""
+        if self.device is None:
+            self.connect()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -108,38 +571,35 @@ class LitraDevice:
         self.disconnect()
 
 
-def find_litra_devices() -> List[dict]:
+def find_litra_devices(refresh: bool = False) -> List[dict]:
     """
     Find all connected Litra Glow devices.
     
+    Results come from the process-wide device registry, which caches the
+    enumeration for a few seconds (see litra.registry).
+    
+    Args:
+        refresh: Rescan the USB bus even if the cached enumeration is fresh
+    
     Returns:
         List of device info dictionaries
     """
-    devices = []
-    
-    try:
-        for device_info in hid.enumerate(LitraDevice.VENDOR_ID, LitraDevice.PRODUCT_ID_GLOW):
-            if device_info.get('usage_page') == LitraDevice.USAGE_PAGE:
-                devices.append({
-                    'path': device_info['path'],
-                    'serial_number': device_info.get('serial_number', 'Unknown'),
-                    'manufacturer': device_info.get('manufacturer_string', 'Logitech'),
-                    'product': device_info.get('product_string', 'Litra Glow')
-                })
-    except Exception:
-        pass
-    
-    return devices
+    from .registry import get_registry
+    return get_registry().devices(refresh)
 
 
-def get_device() -> Optional[LitraDevice]:
+def get_device(serial_number: Optional[str] = None) -> Optional[LitraDevice]:
     """
     Get a connected Litra Glow device.
     
+    Only the Litra Glow control interface (USAGE_PAGE) is considered, so a
+    light exposing several HID interfaces is opened on the right one.
+    
+    Args:
+        serial_number: Serial number of the light to open; the first light if omitted
+    
     Returns:
         LitraDevice instance if found and connected, None otherwise
     """
-    device = LitraDevice()
-    if device.connect():
-        return device
-    return None
+    from .registry import get_registry
+    return get_registry().open(serial_number)
@@ -0,0 +1,315 @@
+"""
+Report dispatcher: request/reply correlation for one Litra Glow
+
+A LitraDevice on its own can only have one request outstanding, because
+read() returns whichever report arrives next. ReportDispatcher runs a
+reader thread that owns every read on the device, matches each incoming
+report to the oldest outstanding request with the same header bytes
+(``0x11 0xff 0x04 <function>``), and hands unsolicited reports, such as
+presses of the light's buttons, to subscribers. Any number of requests
+can then be in flight, and each caller waits only for its own reply.
+
+Replies carry no request ID, so a request that timed out keeps its place
+in the queue as a placeholder until its late reply arrives (or until no
+reply could still be that late). The late reply is absorbed there
+instead of answering a newer request with state from before it; replies
+that may have been shifted this way are not used as round-trip samples.
+
+Author: RKaushik
+License: MIT
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import Future
+from time import monotonic, perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import metrics as _metrics
+from . import timeouts as _timeouts
+from .commands import REPORT_LENGTH, is_notification, report_header
+from .device import LitraDevice
+
+POLL_INTERVAL_MS = 50
+
+
+class _LateReply:
+    """Queue slot of a timed-out request whose reply may still arrive."""
+
+    __slots__ = ('expires',)
+
+    def __init__(self, expires: float):
+        self.expires = expires
+
+
+class ReportDispatcher:
+    """Reader thread routing a device's input reports to requests and subscribers."""
+
+    def __init__(self, device: LitraDevice, poll_interval_ms: int = POLL_INTERVAL_MS):
+        """
+        Initialize a stopped dispatcher.
+
+        Args:
+            device: Connected device; while the dispatcher runs, nothing else
+                may read from it
+            poll_interval_ms: Read timeout of the reader thread, which bounds
+                how long stop() takes
+        """
+        self.device = device
+        self.poll_interval_ms = poll_interval_ms
+        self.notifications = 0
+        self.unmatched = 0
+        self._pending: Dict[bytes, deque] = {}
+        # Late replies absorbed per header, to tell whether one arrived while a request waited
+        self._absorbed: Dict[bytes, int] = {}
+        self._subscribers: List[Callable[[bytes], None]] = []
+        self._lock = threading.Lock()
+        # hidapi handles are not safe for concurrent writes from several threads
+        self._write_lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Start the reader thread and route the device's status queries through it."""
+        if self._running:
+            return
+        self._running = True
+        self.device.dispatcher = self
+        self._thread = threading.Thread(target=self._read_loop, name='litra-dispatch', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the reader thread and fail every outstanding request."""
+        if not self._running:
+            return
+        self._running = False
+        self._thread.join()
+        self._thread = None
+        if self.device.dispatcher is self:
+            self.device.dispatcher = None
+        self._fail_pending(ConnectionError("Dispatcher stopped"))
+
+    def subscribe(self, callback: Callable[[bytes], None]) -> Callable[[], None]:
+        """
+        Receive the reports the light sends on its own, such as button presses.
+
+        Callbacks run on the reader thread and should return quickly. The
+        reports can be decoded with litra.commands.parse_event().
+
+        Args:
+            callback: Called with the raw 20-byte notification report
+
+        Returns:
+            Callable that removes the subscription
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def submit(self, report: bytes) -> Future:
+        """
+        Send a request without waiting for its reply.
+
+        Args:
+            report: 20-byte request report
+
+        Returns:
+            Future resolving to the reply bytes. It fails with OSError if
+            the request could not be written or the device stopped answering.
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+        future.sent_at = perf_counter()
+        header = report_header(report)
+        with self._lock:
+            if not self._running:
+                future.set_exception(ConnectionError("Dispatcher is not running"))
+                return future
+            queue = self._pending.setdefault(header, deque())
+            # Behind a late reply the next reply may be shifted: no round-trip sample
+            future.clean = not any(type(waiter) is _LateReply for waiter in queue)
+            future.absorbed = self._absorbed.get(header, 0)
+            queue.append(future)
+        with self._write_lock:
+            written = self.device.write(report)
+        if not written:
+            self._forget(header, future)
+            if not future.done():
+                future.set_exception(OSError("Failed to send command to device"))
+        return future
+
+    def request(self, report: bytes, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Send a request and wait for its reply, asking again if it is lost.
+
+        Args:
+            report: 20-byte request report
+            timeout: Seconds for all attempts together, see exchange()
+
+        Returns:
+            Reply bytes, or None if the request failed or timed out
+        """
+        return self.exchange(report, timeout)[0]
+
+    def exchange(self, report: bytes, timeout: Optional[float] = None) -> Tuple[Optional[bytes], str]:
+        """
+        Send a request and wait for its reply, reporting how it went.
+
+        Behaves like LitraDevice._request_status(): the first wait is the
+        device's adaptive read timeout and every retry (up to its
+        max_retries) doubles it. Replies to first attempts feed the
+        timeout (see litra.timeouts); a lost reply backs it off.
+
+        Args:
+            report: 20-byte request report
+            timeout: Seconds for all attempts together (default: what is
+                left of the device's deadline, or timeout_ceiling_ms without one)
+
+        Returns:
+            (reply, outcome): outcome is 'ok' with the reply bytes, or, with
+            None, 'error' if the request could not be sent and 'timeout' if
+            no reply arrived
+        """
+        device = self.device
+        rtt = _timeouts.get_rtt_table()
+        key = device.state_key()
+        header = report_header(report)
+        wait = device.read_timeout_ms() / 1000.0
+        if timeout is not None:
+            budget_end = monotonic() + timeout
+        elif device.deadline is not None:
+            budget_end = device.deadline
+        else:
+            budget_end = monotonic() + device.timeout_ceiling_ms / 1000.0
+        for attempt in range(device.max_retries + 1):
+            future = self.submit(report)
+            try:
+                reply = future.result(max(0.0, min(wait, budget_end - monotonic())))
+            except Exception:
+                if future.done() or not self._give_up(header, future):
+                    # Failed, or the reply came in just as the wait ended (too close to sample)
+                    error = future.exception()
+                    if error is None:
+                        return future.result(), 'ok'
+                    if not isinstance(error, OSError):
+                        raise error
+                    return None, 'error'
+                rtt.back_off(key)
+                recorder = _metrics.recorder
+                if recorder is not None:
+                    recorder.observe('read', key, perf_counter() - future.sent_at, 'timeout')
+                wait *= 2
+                if monotonic() >= budget_end:
+                    break
+                continue
+            # A retried reply could answer either request, so it is no sample
+            if attempt == 0 and future.clean and self._absorbed.get(header, 0) == future.absorbed:
+                rtt.observe(key, (perf_counter() - future.sent_at) * 1000.0)
+            return reply, 'ok'
+        return None, 'timeout'
+
+    def pending(self) -> int:
+        """Number of requests waiting for a reply."""
+        with self._lock:
+            return sum(type(waiter) is Future for queue in self._pending.values() for waiter in queue)
+
+    def _forget(self, header: bytes, future: Future):
+        with self._lock:
+            queue = self._pending.get(header)
+            if queue is not None and future in queue:
+                queue.remove(future)
+
+    def _give_up(self, header: bytes, future: Future) -> bool:
+        """
+        Stop waiting for a timed-out request.
+
+        Its place in the queue is kept for its late reply, unless a late
+        reply was absorbed while it waited: that one may have been its own
+        reply, and keeping the place as well would swallow the next reply.
+
+        Returns:
+            False if the reply arrived after all
+        """
+        with self._lock:
+            queue = self._pending.get(header)
+            if queue is None or future not in queue:
+                return False
+            index = queue.index(future)
+            if self._absorbed.get(header, 0) != future.absorbed:
+                del queue[index]
+            else:
+                # No reply arrives later than the longest wait for one
+                queue[index] = _LateReply(monotonic() + self.device.timeout_ceiling_ms / 1000.0)
+            return True
+
+    def _fail_pending(self, error: Exception):
+        with self._lock:
+            futures = [waiter for queue in self._pending.values() for waiter in queue
+                       if type(waiter) is Future]
+            self._pending.clear()
+        for future in futures:
+            future.set_exception(error)
+
+    def _dispatch(self, report: bytes):
+        header = report_header(report)
+        late = False
+        with self._lock:
+            queue = self._pending.get(header)
+            future = None
+            while queue:
+                waiter = queue.popleft()
+                if type(waiter) is Future:
+                    future = waiter
+                    break
+                if waiter.expires > monotonic():
+                    self._absorbed[header] = self._absorbed.get(header, 0) + 1
+                    late = True
+                    break
+            subscribers = list(self._subscribers) if future is None else None
+        if late:
+            self.unmatched += 1
+            return
+        if future is not None:
+            recorder = _metrics.recorder
+            if recorder is not None:
+                recorder.observe('read', self.device.state_key(), perf_counter() - future.sent_at)
+            future.set_result(report)
+            return
+
+        if not is_notification(report):
+            # A late reply, or the acknowledgement of a write nobody waits for
+            self.unmatched += 1
+            return
+        self.notifications += 1
+        self.device.handle_notification(report)
+        for callback in subscribers:
+            try:
+                callback(report)
+            except Exception:
+                # A broken subscriber must not stop replies from being routed
+                pass
+
+    def _read_loop(self):
+        # Read through the device so the history and capture see dispatched traffic
+        read_report = self.device.read_report
+        while self._running:
+            try:
+                data = read_report(REPORT_LENGTH, self.poll_interval_ms, poll=True)
+            except (IOError, OSError) as e:
+                self._running = False
+                self._fail_pending(e)
+                return
+            if data:
+                self._dispatch(bytes(data))
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,511 @@
+"""
+In-memory Litra Glow emulator for testing and benchmarking
+
+EmulatedLitra models one light: it implements the protocol in
+docs/PROTOCOL.md and can inject per-report latency, jitter, dropped status
+replies and disconnects. EmulatorBackend exposes any number of them through
+the transport interface, so the whole library (and the CLI, via
+``LITRA_BACKEND=emulator:N``) can run without hardware.
+
+Author: RKaushik
+License: MIT
+"""
+
+import functools
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from .commands import BRIGHTNESS_EVENT, POWER_EVENT, TEMPERATURE_EVENT
+from .device import LitraDevice
+from .transport import Backend, Transport
+
+PATH_PREFIX = b"emulator:"
+
+# State change per press of the brightness and temperature buttons
+BUTTON_BRIGHTNESS_STEP = 10
+BUTTON_TEMPERATURE_STEP = 100
+
+
+class EmulatedLitra:
+    """
+    In-memory model of a Litra Glow.
+
+    Power, brightness and temperature commands update the emulated state,
+    and a status query queues a 20-byte reply for the next ``read()``. The
+    class also quacks like an open ``hid.Device`` for direct use.
+    """
+
+    REPORT_LENGTH = 20
+
+    def __init__(self, serial_number: str = "EMULATED0001", power: bool = False,
+                 brightness_lumen: int = 100, temperature_kelvin: int = 4000,
+                 open_latency: float = 0.0, report_latency: float = 0.0,
+                 jitter: float = 0.0, drop_rate: float = 0.0,
+                 disconnect_after: Optional[int] = None, seed: Optional[int] = None,
+                 ack_writes: bool = False):
+        """
+        Initialize an emulated light.
+
+        Args:
+            serial_number: Serial number reported by the emulated device
+            power: Initial power state
+            brightness_lumen: Initial brightness in lumens
+            temperature_kelvin: Initial color temperature in Kelvin
+            open_latency: Seconds to sleep when the device is opened
+            report_latency: Seconds to sleep for every report written
+            jitter: Up to this many extra seconds, uniformly random, per report
+            drop_rate: Probability (0-1) that a status reply is lost
+            disconnect_after: Unplug the light after this many reports
+            seed: Seed for the jitter and drop random generator
+            ack_writes: Answer power, brightness and temperature commands with
+                an echo of the request, as HID++ devices do
+        """
+        self.serial_number = serial_number
+        self.power = power
+        self.brightness_lumen = brightness_lumen
+        self.temperature_kelvin = temperature_kelvin
+        self.open_latency = open_latency
+        self.report_latency = report_latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.disconnect_after = disconnect_after
+        self.ack_writes = ack_writes
+        self.connected = True
+        self.writes = 0
+        self.reads = 0
+        self.opens = 0
+        self.dropped = 0
+        self._random = random.Random(seed)
+        self._replies = deque()
+        self._cond = threading.Condition()
+
+    @property
+    def serial(self) -> str:
+        """Serial number, mirroring ``hid.Device.serial``."""
+        return self.serial_number
+
+    @property
+    def path(self) -> bytes:
+        """Device path used by EmulatorBackend."""
+        return PATH_PREFIX + self.serial_number.encode()
+
+    def unplug(self):
+        """Simulate pulling the USB cable; pending and future I/O fails."""
+        with self._cond:
+            self.connected = False
+            self._replies.clear()
+            self._cond.notify_all()
+
+    def plug(self):
+        """Simulate plugging the light back in."""
+        with self._cond:
+            self.connected = True
+
+    def _check_connected(self):
+        if not self.connected:
+            raise OSError(f"Emulated device {self.serial_number} is disconnected")
+
+    def open(self):
+        """Simulate opening the HID handle."""
+        if self.open_latency:
+            time.sleep(self.open_latency)
+        self._check_connected()
+        self.opens += 1
+
+    def close(self):
+        """Simulate closing the HID handle."""
+
+    def state(self) -> dict:
+        """
+        Get the emulated state.
+
+        Returns:
+            Dictionary with 'power', 'brightness_lumen' and 'temperature_kelvin'
+        """
+        return {
+            'power': self.power,
+            'brightness_lumen': self.brightness_lumen,
+            'temperature_kelvin': self.temperature_kelvin,
+        }
+
+    def status_report(self) -> bytes:
+        """
+        Build the status reply for the current emulated state.
+
+        Returns:
+            20-byte status report
+        """
+        report = bytearray(self.REPORT_LENGTH)
+        report[0:4] = b"\x11\xff\x04\x01"
+        report[4] = 1 if self.power else 0
+        report[5:7] = self.brightness_lumen.to_bytes(2, "big")
+        report[7:9] = self.temperature_kelvin.to_bytes(2, "big")
+        return bytes(report)
+
+    def queue_report(self, report: bytes):
+        """
+        Queue an input report for the host to read.
+
+        Args:
+            report: Report bytes
+        """
+        with self._cond:
+            self._replies.append(report)
+            self._cond.notify()
+
+    def set_state(self, power: Optional[bool] = None, brightness_lumen: Optional[int] = None,
+                  temperature_kelvin: Optional[int] = None):
+        """
+        Change the emulated state without notifying the host, as another
+        application talking to the light would.
+
+        Args:
+            power: New power state, or None to keep it
+            brightness_lumen: New brightness, or None to keep it
+            temperature_kelvin: New temperature, or None to keep it
+        """
+        with self._cond:
+            if power is not None:
+                self.power = power
+            if brightness_lumen is not None:
+                self.brightness_lumen = brightness_lumen
+            if temperature_kelvin is not None:
+                self.temperature_kelvin = temperature_kelvin
+
+    def press_button(self, button: str):
+        """
+        Simulate a press of one of the light's physical buttons.
+
+        The state changes and a notification report is queued for the host,
+        without any request from it.
+
+        Args:
+            button: 'power', 'brightness_up', 'brightness_down',
+                'temperature_up' or 'temperature_down'
+
+        Raises:
+            ValueError: If the button is unknown
+            OSError: If the light is unplugged
+        """
+        with self._cond:
+            self._check_connected()
+            if button == 'power':
+                self.power = not self.power
+                event = bytes([0x11, 0xff, 0x04, POWER_EVENT, 1 if self.power else 0])
+            elif button in ('brightness_up', 'brightness_down'):
+                step = BUTTON_BRIGHTNESS_STEP if button == 'brightness_up' else -BUTTON_BRIGHTNESS_STEP
+                self.brightness_lumen = min(max(self.brightness_lumen + step, 20), 250)
+                event = bytes([0x11, 0xff, 0x04, BRIGHTNESS_EVENT]) + self.brightness_lumen.to_bytes(2, "big")
+            elif button in ('temperature_up', 'temperature_down'):
+                step = BUTTON_TEMPERATURE_STEP if button == 'temperature_up' else -BUTTON_TEMPERATURE_STEP
+                self.temperature_kelvin = min(max(self.temperature_kelvin + step, 2700), 6500)
+                event = bytes([0x11, 0xff, 0x04, TEMPERATURE_EVENT]) + self.temperature_kelvin.to_bytes(2, "big")
+            else:
+                raise ValueError(f"Unknown button '{button}'")
+            self._replies.append(event.ljust(self.REPORT_LENGTH, b"\x00"))
+            self._cond.notify()
+
+    def write(self, data: bytes) -> int:
+        """
+        Handle an output report sent by the host.
+
+        Args:
+            data: Report bytes
+
+        Returns:
+            Number of bytes written
+        """
+        self._check_connected()
+        if len(data) < 4 or data[0:3] != b"\x11\xff\x04":
+            raise OSError("Malformed report")
+
+        delay = self.report_latency
+        if self.jitter:
+            delay += self._random.uniform(0.0, self.jitter)
+        if delay:
+            time.sleep(delay)
+
+        function = data[3]
+        with self._cond:
+            self._check_connected()
+            self.writes += 1
+            if function in (0x1c, 0x4c, 0x9c):
+                if function == 0x1c:
+                    self.power = data[4] == 0x01
+                elif function == 0x4c:
+                    self.brightness_lumen = (data[4] << 8) | data[5]
+                else:
+                    self.temperature_kelvin = (data[4] << 8) | data[5]
+                if self.ack_writes:
+                    self._replies.append(bytes(data[:self.REPORT_LENGTH]))
+                    self._cond.notify()
+            elif function == 0x01:
+                if self.drop_rate and self._random.random() < self.drop_rate:
+                    self.dropped += 1
+                else:
+                    self._replies.append(self.status_report())
+                    self._cond.notify()
+            if self.disconnect_after is not None and self.writes >= self.disconnect_after:
+                self.connected = False
+                self._replies.clear()
+                self._cond.notify_all()
+        return len(data)
+
+    def read(self, size: int, timeout: Optional[int] = None) -> bytes:
+        """
+        Return the next queued input report.
+
+        Args:
+            size: Maximum number of bytes to return
+            timeout: Milliseconds to wait for a report, None to wait forever
+
+        Returns:
+            Report bytes, or empty bytes if the timeout expired
+        """
+        with self._cond:
+            self._check_connected()
+            if not self._replies:
+                wait = None if timeout is None else timeout / 1000.0
+                self._cond.wait_for(lambda: self._replies or not self.connected, timeout=wait)
+                self._check_connected()
+            if not self._replies:
+                return b""
+            self.reads += 1
+            return self._replies.popleft()[:size]
+
+
+class EmulatorTransport(Transport):
+    """One open handle to an EmulatedLitra."""
+
+    def __init__(self, light: EmulatedLitra, on_close=None):
+        """
+        Initialize an unopened transport.
+
+        Args:
+            light: Emulated light to talk to
+            on_close: Optional callable invoked after the handle is closed
+        """
+        self.light = light
+        self.on_close = on_close
+        self.is_open = False
+
+    @property
+    def serial(self) -> str:
+        return self.light.serial_number
+
+    def open(self):
+        self.light.open()
+        self.is_open = True
+
+    def close(self):
+        if self.is_open:
+            self.is_open = False
+            if self.on_close is not None:
+                self.on_close()
+
+    def write(self, data: bytes) -> int:
+        if not self.is_open:
+            raise OSError("Transport is closed")
+        return self.light.write(data)
+
+    def read(self, size: int, timeout: Optional[int] = None) -> bytes:
+        if not self.is_open:
+            raise OSError("Transport is closed")
+        return self.light.read(size, timeout)
+
+
+class EmulatorBackend(Backend):
+    """Backend serving a set of emulated lights."""
+
+    name = 'emulator'
+
+    def __init__(self, lights: List[EmulatedLitra], state_path: Optional[str] = None):
+        """
+        Initialize the backend.
+
+        Args:
+            lights: Emulated lights, enumerated in this order
+            state_path: Optional JSON file the lights' state is loaded from and
+                saved to whenever a handle is closed, so that separate processes
+                see the same emulated lights
+        """
+        self.lights = list(lights)
+        self.state_path = state_path
+        self._by_path: Dict[bytes, EmulatedLitra] = {light.path: light for light in self.lights}
+        self._save_lock = threading.Lock()
+        if state_path:
+            self._load()
+
+    def play_script(self, steps: List[dict], sleep: Callable[[float], None] = time.sleep) -> threading.Thread:
+        """
+        Change the lights' state on a schedule, on a background thread.
+
+        Each step is a dictionary with 'at' (seconds after the call), an
+        optional 'serial' (default: the first light) and one action:
+        'press' (a button name for EmulatedLitra.press_button), 'set' (keyword
+        arguments for EmulatedLitra.set_state), 'unplug' or 'plug'.
+
+        Args:
+            steps: Script steps, in any order
+            sleep: Sleep function, replaceable for tests
+
+        Returns:
+            The started daemon thread
+
+        Raises:
+            ValueError: If a step names an unknown light or has no action
+        """
+        plan = []
+        for step in sorted(steps, key=lambda step: step.get('at', 0)):
+            light = self.light(step['serial']) if 'serial' in step else self.lights[0]
+            if light is None:
+                raise ValueError(f"Script step for unknown light {step['serial']!r}")
+            if 'press' in step:
+                action = functools.partial(light.press_button, step['press'])
+            elif 'set' in step:
+                action = functools.partial(light.set_state, **step['set'])
+            elif step.get('unplug'):
+                action = light.unplug
+            elif step.get('plug'):
+                action = light.plug
+            else:
+                raise ValueError(f"Script step without an action: {step!r}")
+            plan.append((float(step.get('at', 0)), action))
+
+        start = time.monotonic()
+
+        def play():
+            for at, action in plan:
+                delay = start + at - time.monotonic()
+                if delay > 0:
+                    sleep(delay)
+                try:
+                    action()
+                except OSError:
+                    pass  # Button pressed on an unplugged light
+
+        thread = threading.Thread(target=play, name='litra-emulator-script', daemon=True)
+        thread.start()
+        return thread
+
+    @classmethod
+    def create(cls, count: int = 1, state_path: Optional[str] = None, **options) -> 'EmulatorBackend':
+        """
+        Create a backend with N identical emulated lights.
+
+        Args:
+            count: Number of lights, with serials EMU0001, EMU0002, ...
+            state_path: See __init__
+            **options: Keyword arguments for every EmulatedLitra
+
+        Returns:
+            New backend
+        """
+        options = dict(options_from_env(), **options)
+        lights = [EmulatedLitra(serial_number=f"EMU{i:04d}", **options) for i in range(1, count + 1)]
+        return cls(lights, state_path)
+
+    def light(self, serial_number: str) -> Optional[EmulatedLitra]:
+        """Get an emulated light by serial number."""
+        for light in self.lights:
+            if light.serial_number == serial_number:
+                return light
+        return None
+
+    def enumerate(self, vendor_id: int, product_id: int) -> List[dict]:
+        if (vendor_id, product_id) not in ((0, 0), (LitraDevice.VENDOR_ID, LitraDevice.PRODUCT_ID_GLOW)):
+            return []
+        infos = []
+        for light in self.lights:
+            if not light.connected:
+                continue
+            info = {
+                'path': light.path,
+                'vendor_id': LitraDevice.VENDOR_ID,
+                'product_id': LitraDevice.PRODUCT_ID_GLOW,
+                'serial_number': light.serial_number,
+                'manufacturer_string': 'Logitech',
+                'product_string': 'Litra Glow (emulated)',
+                'usage_page': LitraDevice.USAGE_PAGE,
+                'interface_number': 0,
+            }
+            # Like the real light, also list a generic HID collection that
+            # does not accept Litra reports
+            infos.append(dict(info, path=light.path + b"/generic", usage_page=0x0001))
+            infos.append(info)
+        return infos
+
+    def open(self, path: Optional[bytes], vendor_id: int, product_id: int) -> EmulatorTransport:
+        if path:
+            light = self._by_path.get(path)
+        else:
+            light = next((light for light in self.lights if light.connected), None)
+        if light is None:
+            raise OSError("No such emulated device")
+        transport = EmulatorTransport(light, self.save if self.state_path else None)
+        transport.open()
+        return transport
+
+    def _load(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as fh:
+                states = json.load(fh)
+        except (OSError, ValueError):
+            return
+        for light in self.lights:
+            state = states.get(light.serial_number)
+            if isinstance(state, dict):
+                light.power = bool(state.get('power', light.power))
+                light.brightness_lumen = int(state.get('brightness_lumen', light.brightness_lumen))
+                light.temperature_kelvin = int(state.get('temperature_kelvin', light.temperature_kelvin))
+
+    def save(self):
+        """Write the lights' state to state_path."""
+        if not self.state_path:
+            return
+        with self._save_lock:
+            tmp_path = f"{self.state_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump({light.serial_number: light.state() for light in self.lights}, fh)
+            os.replace(tmp_path, self.state_path)
+
+
+def options_from_env() -> dict:
+    """
+    Read emulated fault injection settings from the environment.
+
+    Supported variables: LITRA_EMULATOR_LATENCY_MS, LITRA_EMULATOR_JITTER_MS,
+    LITRA_EMULATOR_OPEN_LATENCY_MS and LITRA_EMULATOR_DROP_RATE.
+
+    Returns:
+        Keyword arguments for EmulatedLitra
+    """
+    options = {}
+    for variable, option, scale in (('LITRA_EMULATOR_LATENCY_MS', 'report_latency', 1000.0),
+                                    ('LITRA_EMULATOR_JITTER_MS', 'jitter', 1000.0),
+                                    ('LITRA_EMULATOR_OPEN_LATENCY_MS', 'open_latency', 1000.0),
+                                    ('LITRA_EMULATOR_DROP_RATE', 'drop_rate', 1.0)):
+        value = os.environ.get(variable)
+        if value:
+            options[option] = float(value) / scale
+    return options
+
+
+class EmulatedLitraDevice(LitraDevice):
+    """LitraDevice wired to an EmulatedLitra instead of a USB HID handle."""
+
+    def __init__(self, light: Optional[EmulatedLitra] = None):
+        """
+        Initialize an emulated device connection.
+
+        Args:
+            light: Emulated light to talk to; a fresh one is created if omitted
+        """
+        self.light = light or EmulatedLitra()
+        super().__init__(self.light.path, self.light.serial_number,
+                         transport=EmulatorTransport(self.light))
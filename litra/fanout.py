@@ -0,0 +1,129 @@
+"""
+Parallel command fan-out across several Litra Glow devices
+
+Each selected device is opened and driven on its own worker thread, so the
+total latency of a command is bounded by the slowest light rather than the
+sum of all of them. The workers are daemon threads and every device gets
+the fan-out's timeout as its deadline, so a light that is reported as
+timed out is not written to afterwards and cannot keep the process alive.
+
+Author: RKaushik
+License: MIT
+"""
+
+import threading
+import time
+from concurrent.futures import Future, wait
+from typing import Callable, ContextManager, Iterable, List, Optional
+
+from .device import LitraDevice
+
+DEFAULT_TIMEOUT = 5.0
+
+
+def select_devices(devices: List[dict], serials: Optional[Iterable[str]] = None) -> List[dict]:
+    """
+    Filter device info dictionaries by serial number.
+
+    Args:
+        devices: Device info dictionaries from find_litra_devices()
+        serials: Serial numbers to keep, or None to keep every device
+
+    Returns:
+        Matching device info dictionaries, in the order of `devices`
+    """
+    if serials is None:
+        return list(devices)
+    wanted = set(serials)
+    return [info for info in devices if info['serial_number'] in wanted]
+
+
+def _open_device(info: dict) -> LitraDevice:
+    return LitraDevice(info['path'], info['serial_number'])
+
+
+def _worker(future: Future, info: dict, action: Callable[[LitraDevice], dict],
+            device_factory: Callable[[dict], LitraDevice],
+            lock_factory: Optional[Callable[[dict], ContextManager]], deadline: float):
+    start = time.perf_counter()
+    try:
+        if lock_factory is None:
+            result = _run_unlocked(info, action, device_factory, deadline)
+        else:
+            with lock_factory(info):
+                result = _run_unlocked(info, action, device_factory, deadline)
+    except (IOError, OSError) as e:
+        # Includes litra.locks.LockTimeout
+        result = {'ok': False, 'error': str(e)}
+    except ValueError as e:
+        result = {'ok': False, 'error': str(e)}
+    except Exception as e:
+        # One broken device must not take the others' results down with it
+        result = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+    result['elapsed_ms'] = round((time.perf_counter() - start) * 1000.0, 3)
+    future.set_result(result)
+
+
+def _run_unlocked(info: dict, action: Callable[[LitraDevice], dict],
+                  device_factory: Callable[[dict], LitraDevice], deadline: float) -> dict:
+    device = device_factory(info)
+    if device.deadline is None or deadline < device.deadline:
+        device.deadline = deadline
+    if not device.connect():
+        if time.monotonic() >= deadline:
+            return {'ok': False, 'error': "Deadline exceeded"}
+        return {'ok': False, 'error': "Failed to open device"}
+    try:
+        return action(device)
+    except (IOError, OSError) as e:
+        return {'ok': False, 'error': f"Communication failed - {e}"}
+    finally:
+        device.disconnect()
+
+
+def run_parallel(devices: List[dict], action: Callable[[LitraDevice], dict],
+                 timeout: float = DEFAULT_TIMEOUT,
+                 device_factory: Callable[[dict], LitraDevice] = _open_device,
+                 lock_factory: Optional[Callable[[dict], ContextManager]] = None) -> List[dict]:
+    """
+    Open every device concurrently and apply an action to each.
+
+    Args:
+        devices: Device info dictionaries from find_litra_devices()
+        action: Called with each connected LitraDevice; returns a result
+            dictionary containing at least 'ok'. An exception it raises
+            becomes an 'ok': False result for that device.
+        timeout: Seconds to wait for the devices before reporting them as
+            timed out; also each device's deadline (an earlier deadline set
+            by device_factory is kept), so no device is written to later
+        device_factory: Builds an unconnected LitraDevice from a device info dictionary
+        lock_factory: Optional callable returning a context manager that is
+            held around each device's session, e.g. litra.locks.device_lock
+
+    Returns:
+        One result dictionary per device, in the order of `devices`, each
+        extended with 'serial_number' and 'elapsed_ms'
+    """
+    if not devices:
+        return []
+
+    deadline = time.monotonic() + timeout
+    futures = []
+    for info in devices:
+        future = Future()
+        # Daemon threads: a device stuck in I/O past the timeout is reported
+        # as timed out below and must not hold up the exit of the process
+        threading.Thread(target=_worker, daemon=True, name=f"litra-fanout-{info['serial_number']}",
+                         args=(future, info, action, device_factory, lock_factory, deadline)).start()
+        futures.append(future)
+    wait(futures, timeout=timeout)
+
+    results = []
+    for info, future in zip(devices, futures):
+        if future.done():
+            result = future.result()
+        else:
+            result = {'ok': False, 'error': f"Timed out after {timeout:g}s",
+                      'elapsed_ms': timeout * 1000.0}
+        results.append(dict({'serial_number': info['serial_number']}, **result))
+    return results
@@ -0,0 +1,384 @@
+"""
+Synchronized control of a group of Litra Glow lights
+
+Setting several lights one after another makes a multi-light set visibly
+step from light to light. A LightGroup keeps every member open on its own
+worker thread, works out and encodes each member's report first (reading
+the current state where a toggle or relative change needs it), and then
+releases all writes from a shared barrier. Every apply measures the skew
+between the first and the last write, which stays roughly constant as
+the group grows instead of adding one write time per light.
+
+Groups can be saved by name in a JSON file (LITRA_GROUPS_FILE, default
+~/.config/litra-control/groups.json) for ``litra-control group``.
+
+Author: RKaushik
+License: MIT
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .commands import state_report
+from .device import LitraDevice
+from .fanout import DEFAULT_TIMEOUT, _open_device
+from .state import file_lock
+
+
+def default_groups_path() -> str:
+    """
+    Get the path of the group file.
+
+    Returns:
+        Value of LITRA_GROUPS_FILE if set, otherwise ~/.config/litra-control/groups.json
+    """
+    path = os.environ.get('LITRA_GROUPS_FILE')
+    if path:
+        return path
+    return os.path.join(os.path.expanduser('~'), '.config', 'litra-control', 'groups.json')
+
+
+# State field set by each absolute command
+_FIELDS = {'on': 'power', 'off': 'power', 'brightness': 'brightness_lumen',
+           'temperature': 'temperature_kelvin'}
+
+
+class _Member:
+    __slots__ = ('info', 'serial_number', 'device', 'jobs', 'error')
+
+    def __init__(self, info: dict):
+        self.info = info
+        self.serial_number = info['serial_number']
+        self.device: Optional[LitraDevice] = None
+        self.jobs = queue.SimpleQueue()
+        self.error: Optional[str] = None
+
+
+class LightGroup:
+    """Lights opened together and written from a shared start barrier."""
+
+    def __init__(self, devices: List[dict], timeout: float = DEFAULT_TIMEOUT,
+                 device_factory: Callable[[dict], LitraDevice] = _open_device,
+                 state_cache=None):
+        """
+        Initialize a closed group.
+
+        Args:
+            devices: Device info dictionaries from find_litra_devices()
+            timeout: Seconds to wait for each member to open, read its state or write
+            device_factory: Builds an unconnected LitraDevice from a device info dictionary
+            state_cache: Optional litra.state.StateCache shared by the members
+        """
+        self.timeout = timeout
+        self.device_factory = device_factory
+        self.state_cache = state_cache
+        self.members = [_Member(info) for info in devices]
+        self._results = queue.SimpleQueue()
+        self._round = 0
+        self._threads: List[threading.Thread] = []
+
+    def _worker(self, member: _Member):
+        device = self.device_factory(member.info)
+        device.state_cache = self.state_cache
+        try:
+            opened = device.connect()
+        except (IOError, OSError):
+            opened = False
+        if opened:
+            member.device = device
+        else:
+            member.error = "Failed to open device"
+        self._results.put((0, member, opened))
+        if not opened:
+            return
+        try:
+            while True:
+                job = member.jobs.get()
+                if job is None:
+                    break
+                round_id, function = job
+                try:
+                    outcome = function(member)
+                except (IOError, OSError) as e:
+                    outcome = {'ok': False, 'error': f"Communication failed - {e}"}
+                except ValueError as e:
+                    outcome = {'ok': False, 'error': str(e)}
+                self._results.put((round_id, member, outcome))
+        finally:
+            member.device = None
+            device.disconnect()
+
+    def _collect(self, round_id: int, members: List[_Member]) -> Dict[int, object]:
+        """Wait for one outcome per member; members that miss the deadline are left out."""
+        outcomes = {}
+        deadline = time.monotonic() + self.timeout
+        while len(outcomes) < len(members):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                result_round, member, outcome = self._results.get(timeout=remaining)
+            except queue.Empty:
+                break
+            # Late outcomes of an earlier, timed-out round are dropped
+            if result_round == round_id:
+                outcomes[id(member)] = outcome
+        return outcomes
+
+    def _run(self, members: List[_Member], function: Callable[[_Member], dict]) -> Dict[int, dict]:
+        self._round += 1
+        for member in members:
+            member.jobs.put((self._round, function))
+        return self._collect(self._round, members)
+
+    def open(self) -> List[str]:
+        """
+        Open every member concurrently, each on its own worker thread.
+
+        Returns:
+            Serial numbers of the members that could not be opened
+        """
+        for member in self.members:
+            thread = threading.Thread(target=self._worker, args=(member,), daemon=True,
+                                      name=f"litra-group-{member.serial_number}")
+            thread.start()
+            self._threads.append(thread)
+        opened = self._collect(0, self.members)
+        for member in self.members:
+            if id(member) not in opened:
+                member.error = f"Timed out after {self.timeout:g}s opening device"
+        return [member.serial_number for member in self.members if member.device is None]
+
+    @property
+    def connected(self) -> List[_Member]:
+        """Members that are open."""
+        return [member for member in self.members if member.device is not None and member.error is None]
+
+    def apply(self, command: str, value: Optional[int] = None) -> dict:
+        """
+        Apply one command to every member at the same moment.
+
+        Each member's target and report are worked out first: absolute
+        commands need no I/O, while 'toggle' and the '_delta' commands read
+        each member's state (from the shadow cache if fresh) in parallel.
+        The writes are then released together from a barrier, and every
+        member is written even if it already has the target value.
+
+        Args:
+            command: 'on', 'off', 'toggle', 'brightness', 'temperature',
+                'brightness_delta' or 'temperature_delta'
+            value: Command value, as for LitraDevice.execute()
+
+        Returns:
+            Dictionary with 'command', 'ok' (every member succeeded),
+            'members' (per-member result dictionaries with 'serial_number',
+            'ok' and the written field, or 'error'), 'skew_ms' (time between
+            the first and last write completing), 'issue_skew_ms' (time
+            between the first and last write starting) and 'elapsed_ms'
+
+        Raises:
+            ValueError: If the command or value is not valid
+        """
+        if command not in _FIELDS and command not in ('toggle', 'brightness_delta', 'temperature_delta'):
+            raise ValueError(f"Unknown group command '{command}'")
+        if command.endswith('_delta') and not isinstance(value, int):
+            raise ValueError(f"'{command}' needs an integer change")
+        start = time.perf_counter()
+        members = self.connected
+        plans: Dict[int, tuple] = {}
+        errors = {id(member): member.error for member in self.members if member.error}
+
+        if command in ('on', 'off', 'brightness', 'temperature'):
+            # The same report for everyone; validate and encode it once
+            field = _FIELDS[command]
+            target = command if field == 'power' else value
+            report = state_report(field, target)
+            for member in members:
+                plans[id(member)] = (field, target, report)
+        else:
+            def prepare(member: _Member) -> dict:
+                field, target, error = member.device.plan(command, value)
+                if error:
+                    return {'ok': False, 'error': error}
+                return {'ok': True, 'plan': (field, target, state_report(field, target))}
+
+            prepared = self._run(members, prepare)
+            for member in members:
+                outcome = prepared.get(id(member))
+                if outcome is None:
+                    member.error = errors[id(member)] = f"Timed out after {self.timeout:g}s reading device state"
+                elif outcome['ok']:
+                    plans[id(member)] = outcome['plan']
+                else:
+                    errors[id(member)] = outcome['error']
+
+        writers = [member for member in members if id(member) in plans]
+        written = {}
+        if writers:
+            barrier = threading.Barrier(len(writers))
+            timeout = self.timeout
+
+            def write(member: _Member) -> dict:
+                report = plans[id(member)][2]
+                try:
+                    barrier.wait(timeout)
+                except threading.BrokenBarrierError:
+                    return {'ok': False, 'error': "Another member of the group did not get ready in time"}
+                issued = time.perf_counter()
+                ok = member.device.write(report)
+                done = time.perf_counter()
+                if not ok:
+                    return {'ok': False, 'error': "Failed to send command to device"}
+                return {'ok': True, 'issued': issued, 'done': done}
+
+            written = self._run(writers, write)
+            for member in writers:
+                outcome = written.get(id(member))
+                if outcome is None:
+                    member.error = errors[id(member)] = f"Timed out after {self.timeout:g}s writing to device"
+                elif not outcome['ok']:
+                    errors[id(member)] = outcome['error']
+
+        results, issued, done = [], [], []
+        for member in self.members:
+            result = {'serial_number': member.serial_number}
+            outcome = written.get(id(member))
+            if outcome is not None and outcome['ok']:
+                field, target, _ = plans[id(member)]
+                result.update({'ok': True, field: target,
+                               'write_ms': round((outcome['done'] - outcome['issued']) * 1000.0, 3)})
+                issued.append(outcome['issued'])
+                done.append(outcome['done'])
+                if self.state_cache is not None:
+                    self.state_cache.update(member.device.state_key(), **{field: target})
+            else:
+                result.update({'ok': False, 'error': errors.get(id(member), "Device did not respond")})
+                if self.state_cache is not None and id(member) in plans and member.device is not None:
+                    self.state_cache.invalidate(member.device.state_key())
+            results.append(result)
+
+        return {
+            'command': command,
+            'ok': bool(results) and all(result['ok'] for result in results),
+            'members': results,
+            'skew_ms': round((max(done) - min(done)) * 1000.0, 3) if done else None,
+            'issue_skew_ms': round((max(issued) - min(issued)) * 1000.0, 3) if issued else None,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000.0, 3),
+        }
+
+    def close(self):
+        """
+        Close every member and wait for the worker threads to exit.
+
+        Each worker disconnects its device before it exits, so once close()
+        returns the devices are closed and locks held around the group can
+        be released. A worker still stuck in I/O is waited for at most
+        timeout seconds in total.
+        """
+        for member in self.members:
+            member.jobs.put(None)
+        deadline = time.monotonic() + self.timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class GroupStore:
+    """Named groups of serial numbers, saved as JSON."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the store.
+
+        Args:
+            path: Group file; defaults to default_groups_path()
+        """
+        self.path = path or default_groups_path()
+
+    def load(self) -> Dict[str, List[str]]:
+        """
+        Read every group.
+
+        Returns:
+            Group name -> serial numbers, in the order the groups were saved
+
+        Raises:
+            ValueError: If the file is not a valid group file
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                groups = json.load(fh)
+        except FileNotFoundError:
+            return {}
+        if not isinstance(groups, dict) or not all(
+                isinstance(serials, list) and all(isinstance(serial, str) for serial in serials)
+                for serials in groups.values()):
+            raise ValueError(f"{self.path} is not a valid group file")
+        return groups
+
+    def get(self, name: str) -> Optional[List[str]]:
+        """
+        Look up a group.
+
+        Args:
+            name: Group name
+
+        Returns:
+            Serial numbers, or None if there is no such group
+        """
+        return self.load().get(name)
+
+    def save(self, name: str, serials: List[str]):
+        """
+        Add a group, replacing any group with the same name.
+
+        Args:
+            name: Group name
+            serials: Serial numbers of the members
+
+        Raises:
+            ValueError: If the name is empty or the group has no members
+        """
+        if not name:
+            raise ValueError("Group names must not be empty")
+        if not serials:
+            raise ValueError("A group needs at least one light")
+        # Re-read under the lock so concurrent saves keep each other's groups
+        with file_lock(self.path):
+            groups = self.load()
+            groups[name] = list(dict.fromkeys(serials))
+            self._write(groups)
+
+    def delete(self, name: str) -> bool:
+        """
+        Remove a group.
+
+        Args:
+            name: Group name
+
+        Returns:
+            True if the group existed
+        """
+        with file_lock(self.path):
+            groups = self.load()
+            if groups.pop(name, None) is None:
+                return False
+            self._write(groups)
+        return True
+
+    def _write(self, groups: Dict[str, List[str]]):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(groups, fh, indent=2)
+        os.replace(tmp_path, self.path)
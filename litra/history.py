@@ -0,0 +1,362 @@
+"""
+Bounded in-memory history of device events
+
+Answers "what did this light do in the last hour, and how long did each
+step take" for long-running processes such as litrad and the HTTP
+server. When enabled, LitraDevice records every report written, every
+read (including timeouts) and every status request it decoded, with a
+wall-clock timestamp, the device serial, the HID function byte
+('opcode'), the value carried, the latency and the outcome.
+
+Events live in a ring of preallocated arrays, one per field (25 bytes an
+event), so memory is fixed by the capacity however long the process
+runs; the oldest events are overwritten first. EventHistory.query()
+filters by time range, serial, kind, opcode name and outcome, and
+export_ndjson() writes the matches as one JSON object per line.
+
+Recording is off by default; the instrumented code then only checks a
+module global. Enable it with enable(), ``litrad --history`` or
+``litra-control serve --history``, or LITRA_HISTORY=CAPACITY.
+
+Usage: python -m litra.history [--since SECONDS] [--serial S] [--op OP] [--socket PATH]
+    prints the recent events of a running ``litrad --history`` as NDJSON.
+
+Author: RKaushik
+License: MIT
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+from typing import IO, Iterator, List, Optional
+
+DEFAULT_CAPACITY = 10000
+
+# Event kinds
+WRITE = 0
+READ = 1
+STATUS = 2
+KINDS = ('write', 'read', 'status')
+
+# Outcomes, as in litra.metrics
+OK = 0
+ERROR = 1
+TIMEOUT = 2
+RESULTS = ('ok', 'error', 'timeout')
+
+# Byte 3 of a report: function and software ID (0 for button notifications)
+OPCODES = {
+    0x01: 'status',
+    0x1c: 'power',
+    0x4c: 'brightness',
+    0x9c: 'temperature',
+    0x00: 'power_button',
+    0x10: 'brightness_button',
+    0x20: 'temperature_button',
+}
+
+
+def _decode_value(opcode: int, report) -> int:
+    """Value carried by a report; a status reply packs all three fields."""
+    if len(report) < 6:
+        return 0
+    if opcode == 0x01:
+        if len(report) < 9:
+            return 0
+        return (report[4] << 32) | (report[5] << 24) | (report[6] << 16) | (report[7] << 8) | report[8]
+    if opcode == 0x1c or opcode == 0x00:
+        return report[4]
+    return (report[4] << 8) | report[5]
+
+
+def _value_fields(opcode: int, value: int) -> dict:
+    name = OPCODES.get(opcode, '').replace('_button', '')
+    if name == 'status':
+        return {'power': 'on' if value >> 32 == 1 else 'off',
+                'brightness_lumen': (value >> 16) & 0xffff or None,
+                'temperature_kelvin': value & 0xffff or None}
+    if name == 'power':
+        return {'power': 'on' if value == 1 else 'off'}
+    if name == 'brightness':
+        return {'brightness_lumen': value}
+    if name == 'temperature':
+        return {'temperature_kelvin': value}
+    return {}
+
+
+def _has_opcode(kind: int, result: int) -> bool:
+    """Failed reads have no report; writes and status requests know what they sent."""
+    return kind != READ or result == OK
+
+
+class EventHistory:
+    """Fixed-capacity ring of device events, stored column-wise in arrays."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, clock=time.time):
+        """
+        Initialize an empty history.
+
+        Args:
+            capacity: Number of events kept; older events are overwritten
+            clock: Wall-clock time in seconds since the epoch
+        """
+        if capacity <= 0:
+            raise ValueError("History capacity must be positive")
+        self.capacity = capacity
+        self.clock = clock
+        self._time = array('d', bytes(8 * capacity))
+        self._serial = array('H', bytes(2 * capacity))
+        self._kind = array('B', bytes(capacity))
+        self._opcode = array('B', bytes(capacity))
+        self._value = array('q', bytes(8 * capacity))
+        self._latency = array('f', bytes(4 * capacity))
+        self._result = array('B', bytes(capacity))
+        self._serials: List[str] = []
+        self._serial_index = {}
+        self._next = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    def record(self, kind: int, serial_number: str, report, latency: float, result: int = OK):
+        """
+        Record one event, overwriting the oldest one if the history is full.
+
+        Args:
+            kind: WRITE, READ or STATUS
+            serial_number: Device serial (or path)
+            report: Report written, read or decoded; for a failed status
+                request the request itself, for a failed read None
+            latency: Seconds the operation took
+            result: OK, ERROR or TIMEOUT
+        """
+        if report:
+            opcode = report[3] if len(report) > 3 else 0
+            value = _decode_value(opcode, report)
+        else:
+            opcode = value = 0
+        now = self.clock()
+        with self._lock:
+            index = self._serial_index.get(serial_number)
+            if index is None:
+                index = self._serial_index[serial_number] = len(self._serials)
+                self._serials.append(serial_number)
+            i = self._next
+            self._time[i] = now
+            self._serial[i] = index
+            self._kind[i] = kind
+            self._opcode[i] = opcode
+            self._value[i] = value
+            self._latency[i] = latency
+            self._result[i] = result
+            self._next = (i + 1) % self.capacity
+            self.recorded += 1
+
+    def __len__(self) -> int:
+        return min(self.recorded, self.capacity)
+
+    @property
+    def overwritten(self) -> int:
+        """Events dropped to make room for newer ones."""
+        return max(0, self.recorded - self.capacity)
+
+    def _physical(self, position: int) -> int:
+        """Array index of the event at a position, 0 being the oldest."""
+        if self.recorded < self.capacity:
+            return position
+        return (self._next + position) % self.capacity
+
+    def _first_at(self, since: float) -> int:
+        """Position of the first event recorded at or after a time (binary search)."""
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._time[self._physical(middle)] < since:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _rows(self, since: Optional[float], until: Optional[float], serial_number: Optional[str],
+              kind: Optional[str], op: Optional[str], result: Optional[str]) -> Iterator[tuple]:
+        if kind is not None and kind not in KINDS:
+            raise ValueError(f"Unknown event kind '{kind}'")
+        if result is not None and result not in RESULTS:
+            raise ValueError(f"Unknown result '{result}'")
+        opcodes = None
+        if op is not None:
+            opcodes = {code for code, name in OPCODES.items() if name == op}
+            if not opcodes:
+                raise ValueError(f"Unknown opcode name '{op}'")
+        kind_code = None if kind is None else KINDS.index(kind)
+        result_code = None if result is None else RESULTS.index(result)
+
+        with self._lock:
+            serial_code = None
+            if serial_number is not None:
+                serial_code = self._serial_index.get(serial_number)
+                if serial_code is None:
+                    return
+            start = 0 if since is None else self._first_at(since)
+            for position in range(start, len(self)):
+                i = self._physical(position)
+                if until is not None and self._time[i] > until:
+                    break
+                if ((serial_code is not None and self._serial[i] != serial_code)
+                        or (kind_code is not None and self._kind[i] != kind_code)
+                        or (result_code is not None and self._result[i] != result_code)
+                        or (opcodes is not None and (self._opcode[i] not in opcodes
+                                                     or not _has_opcode(self._kind[i], self._result[i])))):
+                    continue
+                yield (self._time[i], self._serials[self._serial[i]], self._kind[i], self._opcode[i],
+                       self._value[i], self._latency[i], self._result[i])
+
+    @staticmethod
+    def _to_dict(row: tuple) -> dict:
+        timestamp, serial_number, kind, opcode, value, latency, result = row
+        event = {'time': round(timestamp, 6), 'serial_number': serial_number, 'kind': KINDS[kind]}
+        if _has_opcode(kind, result):
+            event['opcode'] = f"0x{opcode:02x}"
+            event['op'] = OPCODES.get(opcode)
+            # Status requests carry no value; the reply (read or status) does
+            if (result == OK or kind == WRITE) and not (kind == WRITE and opcode == 0x01):
+                event.update(_value_fields(opcode, value))
+        event['latency_ms'] = round(latency * 1000.0, 3)
+        event['result'] = RESULTS[result]
+        return event
+
+    def query(self, since: Optional[float] = None, until: Optional[float] = None,
+              serial_number: Optional[str] = None, kind: Optional[str] = None,
+              op: Optional[str] = None, result: Optional[str] = None,
+              limit: Optional[int] = None) -> List[dict]:
+        """
+        Get the recorded events matching every given filter, oldest first.
+
+        Args:
+            since: Only events at or after this time (seconds since the epoch)
+            until: Only events at or before this time
+            serial_number: Only events of this device
+            kind: 'write', 'read' or 'status'
+            op: Opcode name from OPCODES, such as 'brightness' or 'power_button'
+            result: 'ok', 'error' or 'timeout'
+            limit: Keep only the most recent matches
+
+        Returns:
+            Event dictionaries with 'time', 'serial_number', 'kind', the
+            'opcode' byte and its 'op' name with the decoded value fields,
+            'latency_ms' and 'result'; failed reads carry no opcode, and
+            failed reads and status requests no value
+
+        Raises:
+            ValueError: If kind, op or result is not known
+        """
+        rows = self._rows(since, until, serial_number, kind, op, result)
+        if limit is not None:
+            rows = deque(rows, maxlen=limit)
+        else:
+            rows = list(rows)
+        return [self._to_dict(row) for row in rows]
+
+    def export_ndjson(self, stream: IO[str], **filters) -> int:
+        """
+        Write the matching events as newline-delimited JSON.
+
+        Args:
+            stream: Text stream to write to
+            **filters: Filters as for query()
+
+        Returns:
+            Number of events written
+        """
+        events = self.query(**filters)
+        for event in events:
+            stream.write(json.dumps(event))
+            stream.write('\n')
+        return len(events)
+
+    def clear(self):
+        """Forget every recorded event."""
+        with self._lock:
+            self._next = 0
+            self.recorded = 0
+
+
+recorder: Optional[EventHistory] = None
+
+
+def enable(capacity: int = DEFAULT_CAPACITY) -> EventHistory:
+    """
+    Start recording, keeping anything recorded before.
+
+    Args:
+        capacity: Number of events kept, if recording was not on yet
+
+    Returns:
+        The active EventHistory
+    """
+    global recorder
+    if recorder is None:
+        recorder = EventHistory(capacity)
+    return recorder
+
+
+def disable():
+    """Stop recording and discard the recorded events."""
+    global recorder
+    recorder = None
+
+
+def get_history() -> Optional[EventHistory]:
+    """
+    Get the active recorder.
+
+    Returns:
+        EventHistory if recording is enabled, None otherwise
+    """
+    return recorder
+
+
+if os.environ.get('LITRA_HISTORY'):
+    try:
+        enable(int(os.environ['LITRA_HISTORY']))
+    except ValueError:
+        enable()
+
+
+def main(argv=None) -> int:
+    """Print the recent events of a running litrad as NDJSON."""
+    import argparse
+    from .daemon import send_request
+
+    parser = argparse.ArgumentParser(description="Print the event history of a running litrad --history")
+    parser.add_argument('--since', type=int, metavar='SECONDS',
+                        help='Only events from the last SECONDS (default: everything kept)')
+    parser.add_argument('--serial', help='Only events of this device')
+    parser.add_argument('--kind', choices=KINDS)
+    parser.add_argument('--op', choices=sorted(set(OPCODES.values())))
+    parser.add_argument('--result', choices=RESULTS)
+    parser.add_argument('--socket', help='Unix socket path (default: $LITRA_SOCKET or temp dir)')
+    args = parser.parse_args(argv)
+
+    reply = send_request('history', args.since, socket_path=args.socket)
+    if reply is None:
+        print("Error: litrad is not running", file=sys.stderr)
+        return 1
+    if not reply['ok']:
+        print(f"Error: {reply['error']}", file=sys.stderr)
+        return reply.get('exit_code', 3)
+    for event in reply['events']:
+        if ((args.serial and event['serial_number'] != args.serial)
+                or (args.kind and event['kind'] != args.kind)
+                or (args.op and event.get('op') != args.op)
+                or (args.result and event['result'] != args.result)):
+            continue
+        print(json.dumps(event))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Per-device advisory locks shared by concurrent litra-control processes
+
+Several Shortcuts automations can fire at once, and each starts its own
+litra-control. Without coordination they race to open the same light and
+read each other's replies. DeviceLock serializes them per light (keyed by
+serial number, or by path for lights without one):
+
+- Mutual exclusion comes from flock() on a per-light lock file, which
+  the kernel releases if the holder dies.
+- Fairness comes from a queue directory next to it. Every waiter drops a
+  ticket named after its arrival time, and only the oldest live ticket
+  may take the flock, so waiters are served first come, first served.
+  Tickets of processes that died are removed by the next waiter.
+- Waiting is bounded; LockTimeout is raised when the wait runs out.
+
+Locking is a no-op where fcntl is unavailable, or when LITRA_NO_LOCK is set.
+
+Author: RKaushik
+License: MIT
+"""
+
+import hashlib
+import itertools
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from . import metrics as _metrics
+from .device import LitraDevice
+from .registry import get_registry
+
+DEFAULT_TIMEOUT = 5.0
+# Poll interval of the waiter at the head of the queue, and the ceiling
+# the others back off to
+HEAD_POLL = 0.001
+MAX_POLL = 0.02
+
+_tickets = itertools.count()
+
+
+class LockTimeout(TimeoutError):
+    """Raised when a device lock is not acquired within its timeout."""
+
+
+def default_lock_dir() -> str:
+    """
+    Get the directory holding the lock and queue files.
+
+    Returns:
+        Value of LITRA_LOCK_DIR if set, otherwise a per-user directory in the temp dir
+    """
+    path = os.environ.get('LITRA_LOCK_DIR')
+    if path:
+        return path
+    return os.path.join(tempfile.gettempdir(), f"litra-locks-{os.getuid()}")
+
+
+def default_timeout() -> float:
+    """
+    Get the lock wait bound in seconds.
+
+    Returns:
+        Value of LITRA_LOCK_TIMEOUT if set and valid, otherwise DEFAULT_TIMEOUT
+    """
+    try:
+        return float(os.environ.get('LITRA_LOCK_TIMEOUT', DEFAULT_TIMEOUT))
+    except ValueError:
+        return DEFAULT_TIMEOUT
+
+
+def lock_key(serial_number: Optional[str], path: Optional[bytes] = None) -> str:
+    """
+    Get the file name stem identifying one light.
+
+    Args:
+        serial_number: Serial number of the light
+        path: HID path, used when the light has no serial number
+
+    Returns:
+        Serial number restricted to filename-safe characters, or a hash of the path
+    """
+    if serial_number:
+        return re.sub(r'[^A-Za-z0-9_.-]', '_', serial_number)
+    return 'path-' + hashlib.sha1(path or b'').hexdigest()[:16]
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class DeviceLock:
+    """FIFO advisory lock on one light, shared between processes."""
+
+    def __init__(self, key: str, timeout: Optional[float] = None, lock_dir: Optional[str] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Initialize an unlocked lock.
+
+        Args:
+            key: Light identifier from lock_key()
+            timeout: Seconds to wait for the lock (default: $LITRA_LOCK_TIMEOUT or 5)
+            lock_dir: Directory for the lock files (default: default_lock_dir())
+            clock: Monotonic clock in seconds
+            sleep: Sleep function in seconds
+        """
+        self.key = key
+        self.timeout = default_timeout() if timeout is None else timeout
+        self.lock_dir = lock_dir or default_lock_dir()
+        self.clock = clock
+        self.sleep = sleep
+        self.waited = 0.0
+        self._queue_dir = os.path.join(self.lock_dir, f"{key}.queue")
+        self._ticket = None
+        self._fd = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether this platform and environment support locking."""
+        return fcntl is not None and not os.environ.get('LITRA_NO_LOCK')
+
+    def _is_head(self) -> bool:
+        for name in sorted(os.listdir(self._queue_dir)):
+            if name >= self._ticket:
+                return True
+            try:
+                pid = int(name.split('-')[1])
+            except (IndexError, ValueError):
+                pid = None
+            if pid is not None and _alive(pid):
+                return False
+            # Left behind by a process that died while waiting or holding the lock
+            try:
+                os.unlink(os.path.join(self._queue_dir, name))
+            except OSError:
+                pass
+        return True
+
+    def acquire(self) -> float:
+        """
+        Wait for our turn and take the lock.
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            LockTimeout: If the lock was not acquired within the timeout
+            OSError: If the lock files cannot be created
+        """
+        if not self.enabled:
+            return 0.0
+        start = self.clock()
+        os.makedirs(self._queue_dir, mode=0o700, exist_ok=True)
+        # Arrival time first so that names sort in arrival order
+        self._ticket = f"{time.time_ns():020d}-{os.getpid()}-{next(_tickets)}"
+        ticket_path = os.path.join(self._queue_dir, self._ticket)
+        open(ticket_path, 'x').close()
+        fd = os.open(os.path.join(self.lock_dir, f"{self.key}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+
+        delay = HEAD_POLL
+        try:
+            while True:
+                if self._is_head():
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        # Our turn, but the previous holder is still finishing
+                        delay = HEAD_POLL
+                else:
+                    delay = min(delay * 2, MAX_POLL)
+                if self.clock() - start >= self.timeout:
+                    raise LockTimeout(f"Timed out after {self.timeout:g}s waiting for {self.key}, "
+                                      f"which another litra-control is using")
+                self.sleep(delay)
+        except BaseException as e:
+            os.close(fd)
+            self._remove_ticket()
+            self._record(start, 'timeout' if isinstance(e, LockTimeout) else 'error')
+            raise
+
+        self._fd = fd
+        self.waited = self.clock() - start
+        self._record(start, 'ok')
+        return self.waited
+
+    def release(self):
+        """Release the lock and leave the queue."""
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._remove_ticket()
+
+    def _remove_ticket(self):
+        if self._ticket is not None:
+            try:
+                os.unlink(os.path.join(self._queue_dir, self._ticket))
+            except OSError:
+                pass
+            self._ticket = None
+
+    def _record(self, start: float, outcome: str):
+        recorder = _metrics.recorder
+        if recorder is not None:
+            recorder.observe('lock', self.key, self.clock() - start, outcome)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+def device_lock(info: dict, timeout: Optional[float] = None) -> DeviceLock:
+    """
+    Get the lock for a light.
+
+    Args:
+        info: Device info dictionary with 'serial_number' and 'path'
+        timeout: Seconds to wait for the lock (default: $LITRA_LOCK_TIMEOUT or 5)
+
+    Returns:
+        Unlocked DeviceLock
+    """
+    return DeviceLock(lock_key(info['serial_number'], info['path']), timeout)
+
+
+@contextmanager
+def locked_device(serial_number: Optional[str] = None, timeout: Optional[float] = None,
+                  deadline: Optional[float] = None) -> Iterator[Optional[LitraDevice]]:
+    """
+    Lock a light, open it, and close and unlock it afterwards.
+
+    Args:
+        serial_number: Serial number of the light, or None for the first light
+        timeout: Seconds to wait for the lock (default: $LITRA_LOCK_TIMEOUT or 5)
+        deadline: time.monotonic() by which everything must be done; the
+            lock wait is cut short to meet it and the device inherits it
+
+    Yields:
+        Connected LitraDevice, or None if the light is not connected
+
+    Raises:
+        LockTimeout: If the lock was not acquired within the timeout
+    """
+    registry = get_registry()
+    info = registry.lookup(serial_number)
+    if info is None:
+        yield None
+        return
+    if deadline is not None:
+        if timeout is None:
+            timeout = default_timeout()
+        timeout = max(0.0, min(timeout, deadline - time.monotonic()))
+    with device_lock(info, timeout):
+        if info['serial_number']:
+            device = registry.open(info['serial_number'], deadline=deadline)
+        else:
+            device = registry.open(path=info['path'], deadline=deadline)
+        if device is None:
+            yield None
+            return
+        try:
+            yield device
+        finally:
+            device.disconnect()
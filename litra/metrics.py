@@ -0,0 +1,298 @@
+"""
+Opt-in latency histograms and outcome counters for device I/O
+
+When enabled, LitraDevice and find_litra_devices() record how long each
+enumerate, open, write, read and close took, together with its outcome
+('ok', 'error' or 'timeout'), per device serial. Waits for the per-device
+lock of litra.locks are recorded as 'lock'. Failed operations also
+count the exception type, which the CLI otherwise folds into a generic
+error message.
+
+Recording is off by default; the instrumented code then only checks a
+module global. Enable it with enable(), the CLI's --timings flag,
+``litrad --metrics`` or LITRA_METRICS=1.
+
+Usage: python -m litra.metrics [--format prometheus|json] [--socket PATH]
+    prints the metrics of a running ``litrad --metrics``.
+
+Author: RKaushik
+License: MIT
+"""
+
+import os
+import sys
+import threading
+from bisect import bisect_left
+from typing import Dict, Optional, Tuple
+
+OPERATIONS = ('enumerate', 'lock', 'open', 'write', 'read', 'close')
+OUTCOMES = ('ok', 'error', 'timeout')
+
+# Histogram bucket upper bounds in seconds, from 50 us up to 5 s
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+           0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram, in seconds."""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        """Record one sample."""
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile from the buckets.
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Upper bound of the bucket holding the quantile (the observed
+            maximum for the overflow bucket), or 0.0 if there are no samples
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        """Summary plus cumulative bucket counts keyed by upper bound."""
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(BUCKETS, self.counts):
+            cumulative += bucket_count
+            buckets[repr(bound)] = cumulative
+        buckets['+Inf'] = self.count
+        return {
+            'count': self.count,
+            'sum_ms': round(self.total * 1000.0, 3),
+            'mean_ms': round(self.total * 1000.0 / self.count, 3) if self.count else 0.0,
+            'p50_ms': round(self.quantile(0.5) * 1000.0, 3),
+            'p99_ms': round(self.quantile(0.99) * 1000.0, 3),
+            'max_ms': round(self.max * 1000.0, 3),
+            'buckets': buckets,
+        }
+
+
+class Metrics:
+    """Histograms and counters keyed by operation and device serial."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._outcomes: Dict[Tuple[str, str, str], int] = {}
+        self._errors: Dict[Tuple[str, str, str], int] = {}
+
+    def observe(self, operation: str, serial: Optional[str], seconds: float,
+                outcome: str = 'ok', error: Optional[BaseException] = None):
+        """
+        Record one operation.
+
+        Args:
+            operation: One of OPERATIONS
+            serial: Device serial number, or None for enumerate
+            seconds: How long the operation took
+            outcome: One of OUTCOMES
+            error: Exception that caused an 'error' outcome, if any
+        """
+        serial = serial or ''
+        with self._lock:
+            histogram = self._histograms.get((operation, serial))
+            if histogram is None:
+                histogram = self._histograms[(operation, serial)] = Histogram()
+            histogram.observe(seconds)
+            key = (operation, serial, outcome)
+            self._outcomes[key] = self._outcomes.get(key, 0) + 1
+            if error is not None:
+                key = (operation, serial, type(error).__name__)
+                self._errors[key] = self._errors.get(key, 0) + 1
+
+    def reset(self):
+        """Discard everything recorded so far."""
+        with self._lock:
+            self._histograms.clear()
+            self._outcomes.clear()
+            self._errors.clear()
+
+    def to_dict(self) -> dict:
+        """
+        Snapshot the metrics.
+
+        Returns:
+            Dictionary with 'operations': a list of per (operation, serial)
+            entries holding the histogram summary and outcome counts, and
+            'errors': a list of exception type counts
+        """
+        with self._lock:
+            operations = []
+            for (operation, serial), histogram in sorted(self._histograms.items()):
+                entry = {'operation': operation, 'serial_number': serial}
+                entry.update(histogram.to_dict())
+                entry['outcomes'] = {outcome: self._outcomes.get((operation, serial, outcome), 0)
+                                     for outcome in OUTCOMES}
+                operations.append(entry)
+            errors = [{'operation': operation, 'serial_number': serial, 'type': name, 'count': count}
+                      for (operation, serial, name), count in sorted(self._errors.items())]
+        return {'operations': operations, 'errors': errors}
+
+    def to_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            Text with litra_operation_seconds histograms and
+            litra_operations_total / litra_errors_total counters
+        """
+        return format_prometheus(self.to_dict())
+
+    def format_table(self) -> str:
+        """
+        Render a human-readable summary table.
+
+        Returns:
+            One line per (operation, serial) with counts and latencies
+        """
+        lines = [f"{'OPERATION':<10} {'SERIAL':<16} {'COUNT':>6} {'OK':>5} {'ERR':>5} {'T/O':>5} "
+                 f"{'MEAN':>10} {'P50':>10} {'P99':>10} {'MAX':>10}"]
+        snapshot = self.to_dict()
+        for entry in snapshot['operations']:
+            outcomes = entry['outcomes']
+            lines.append(f"{entry['operation']:<10} {entry['serial_number'] or '-':<16} {entry['count']:>6} "
+                         f"{outcomes['ok']:>5} {outcomes['error']:>5} {outcomes['timeout']:>5} "
+                         f"{entry['mean_ms']:>7.3f} ms {entry['p50_ms']:>7.3f} ms "
+                         f"{entry['p99_ms']:>7.3f} ms {entry['max_ms']:>7.3f} ms")
+        for error in snapshot['errors']:
+            lines.append(f"{error['operation']} {error['serial_number'] or '-'}: "
+                         f"{error['count']} x {error['type']}")
+        return "\n".join(lines)
+
+
+def _labels(**labels) -> str:
+    parts = []
+    for name, value in labels.items():
+        if value:
+            escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            parts.append(f'{name}="{escaped}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def format_prometheus(snapshot: dict) -> str:
+    """
+    Render a Metrics.to_dict() snapshot in the Prometheus text format.
+
+    Args:
+        snapshot: Dictionary as returned by Metrics.to_dict()
+
+    Returns:
+        Exposition text ending in a newline
+    """
+    lines = [
+        "# HELP litra_operation_seconds Latency of Litra Glow device operations",
+        "# TYPE litra_operation_seconds histogram",
+    ]
+    for entry in snapshot['operations']:
+        op, serial = entry['operation'], entry['serial_number']
+        for bound, cumulative in entry['buckets'].items():
+            lines.append(f"litra_operation_seconds_bucket{_labels(operation=op, serial=serial, le=bound)} "
+                         f"{cumulative}")
+        lines.append(f"litra_operation_seconds_sum{_labels(operation=op, serial=serial)} "
+                     f"{entry['sum_ms'] / 1000.0}")
+        lines.append(f"litra_operation_seconds_count{_labels(operation=op, serial=serial)} {entry['count']}")
+
+    lines.append("# HELP litra_operations_total Device operations by outcome")
+    lines.append("# TYPE litra_operations_total counter")
+    for entry in snapshot['operations']:
+        for outcome, count in entry['outcomes'].items():
+            labels = _labels(operation=entry['operation'], serial=entry['serial_number'], outcome=outcome)
+            lines.append(f"litra_operations_total{labels} {count}")
+
+    lines.append("# HELP litra_errors_total Failed device operations by exception type")
+    lines.append("# TYPE litra_errors_total counter")
+    for error in snapshot['errors']:
+        labels = _labels(operation=error['operation'], serial=error['serial_number'], type=error['type'])
+        lines.append(f"litra_errors_total{labels} {error['count']}")
+    return "\n".join(lines) + "\n"
+
+
+# The active recorder, or None when instrumentation is disabled. Hot paths
+# read this global directly so the disabled cost is one lookup.
+recorder: Optional[Metrics] = None
+
+
+def enable() -> Metrics:
+    """
+    Start recording, keeping anything recorded before.
+
+    Returns:
+        The active Metrics
+    """
+    global recorder
+    if recorder is None:
+        recorder = Metrics()
+    return recorder
+
+
+def disable():
+    """Stop recording and discard the recorded metrics."""
+    global recorder
+    recorder = None
+
+
+def get_metrics() -> Optional[Metrics]:
+    """
+    Get the active recorder.
+
+    Returns:
+        Metrics if recording is enabled, None otherwise
+    """
+    return recorder
+
+
+if os.environ.get('LITRA_METRICS'):
+    enable()
+
+
+def main(argv=None) -> int:
+    """Print the metrics of a running litrad."""
+    import argparse
+    import json
+    from .daemon import send_request
+
+    parser = argparse.ArgumentParser(description="Print metrics from a running litrad --metrics")
+    parser.add_argument('--format', choices=('prometheus', 'json'), default='prometheus')
+    parser.add_argument('--socket', help='Unix socket path (default: $LITRA_SOCKET or temp dir)')
+    args = parser.parse_args(argv)
+
+    reply = send_request('metrics', socket_path=args.socket)
+    if reply is None:
+        print("Error: litrad is not running", file=sys.stderr)
+        return 1
+    if not reply['ok']:
+        print(f"Error: {reply['error']}", file=sys.stderr)
+        return reply.get('exit_code', 3)
+    if args.format == 'json':
+        print(json.dumps(reply['metrics'], indent=2))
+    else:
+        sys.stdout.write(format_prometheus(reply['metrics']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Cached registry of connected Litra Glow devices
+
+Enumerating the USB bus is the slowest step of opening a light. The
+registry keeps the last enumeration, filtered to the Litra Glow control
+interface (USAGE_PAGE), in dictionaries indexed by serial number and by
+path, so opening a known light is one dictionary lookup plus an open.
+
+The cache is rescanned when it is older than its TTL, when a lookup
+misses (a light may just have been plugged in), when an open fails (the
+light may have been unplugged or re-enumerated under a new path), and
+when the process-wide backend is replaced. ``generation`` changes
+whenever a rescan finds a different set of devices.
+
+Author: RKaushik
+License: MIT
+"""
+
+import os
+import threading
+import time
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+from . import metrics as _metrics
+from .device import LitraDevice
+from .transport import Backend, get_backend
+
+DEFAULT_TTL = 5.0
+
+
+def default_ttl() -> float:
+    """
+    Get the enumeration cache TTL.
+
+    Returns:
+        LITRA_REGISTRY_TTL in seconds if set and valid, otherwise DEFAULT_TTL
+    """
+    try:
+        return float(os.environ.get('LITRA_REGISTRY_TTL', DEFAULT_TTL))
+    except ValueError:
+        return DEFAULT_TTL
+
+
+class DeviceRegistry:
+    """Enumeration cache indexed by serial number and device path."""
+
+    def __init__(self, backend: Optional[Backend] = None, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize an empty registry.
+
+        Args:
+            backend: Backend to enumerate; the process-wide backend if omitted
+            ttl: Seconds an enumeration is trusted (default: $LITRA_REGISTRY_TTL or 5)
+            clock: Monotonic time source, in seconds
+        """
+        self.backend = backend
+        self.ttl = default_ttl() if ttl is None else ttl
+        self.clock = clock
+        self.generation = 0
+        self.scans = 0
+        self._lock = threading.Lock()
+        self._devices: List[dict] = []
+        self._by_serial: Dict[str, dict] = {}
+        self._by_path: Dict[bytes, dict] = {}
+        self._scanned_at: Optional[float] = None
+        self._scanned_backend: Optional[Backend] = None
+
+    def _scan(self, backend: Backend):
+        """Enumerate the backend and rebuild the indexes. Caller holds the lock."""
+        recorder = _metrics.recorder
+        if recorder is not None:
+            start = perf_counter()
+        try:
+            infos = backend.enumerate(LitraDevice.VENDOR_ID, LitraDevice.PRODUCT_ID_GLOW)
+        except (IOError, OSError) as e:
+            if recorder is not None:
+                recorder.observe('enumerate', None, perf_counter() - start, 'error', e)
+            infos = []
+        else:
+            if recorder is not None:
+                recorder.observe('enumerate', None, perf_counter() - start)
+
+        devices, by_serial, by_path = [], {}, {}
+        for info in infos:
+            # Other interfaces of the same USB device do not accept our reports
+            if info.get('usage_page') != LitraDevice.USAGE_PAGE:
+                continue
+            entry = {
+                'path': info['path'],
+                'serial_number': info.get('serial_number', 'Unknown'),
+                'manufacturer': info.get('manufacturer_string', 'Logitech'),
+                'product': info.get('product_string', 'Litra Glow')
+            }
+            devices.append(entry)
+            by_path[entry['path']] = entry
+            if info.get('serial_number'):
+                by_serial.setdefault(info['serial_number'], entry)
+
+        if by_path.keys() != self._by_path.keys():
+            self.generation += 1
+        self._devices, self._by_serial, self._by_path = devices, by_serial, by_path
+        self._scanned_at = self.clock()
+        self._scanned_backend = backend
+        self.scans += 1
+
+    def _refresh(self, force: bool) -> bool:
+        """Rescan if forced or stale. Caller holds the lock. Returns True if it scanned."""
+        backend = self.backend or get_backend()
+        if (not force and self._scanned_at is not None and backend is self._scanned_backend
+                and self.clock() - self._scanned_at < self.ttl):
+            return False
+        self._scan(backend)
+        return True
+
+    def devices(self, refresh: bool = False) -> List[dict]:
+        """
+        List connected Litra Glow devices.
+
+        Args:
+            refresh: Rescan even if the cache is fresh
+
+        Returns:
+            Device info dictionaries with 'path', 'serial_number',
+            'manufacturer' and 'product'
+        """
+        with self._lock:
+            self._refresh(refresh)
+            return [dict(entry) for entry in self._devices]
+
+    def lookup(self, serial_number: Optional[str] = None, path: Optional[bytes] = None,
+               refresh: bool = False) -> Optional[dict]:
+        """
+        Find one device.
+
+        Args:
+            serial_number: Serial number to look up
+            path: Device path to look up, instead of a serial number
+            refresh: Rescan even if the cache is fresh
+
+        Returns:
+            Device info dictionary, the first device if neither serial_number
+            nor path is given, or None if no such device is connected
+        """
+        with self._lock:
+            scanned = self._refresh(refresh)
+            while True:
+                if path:
+                    entry = self._by_path.get(path)
+                elif serial_number:
+                    entry = self._by_serial.get(serial_number)
+                else:
+                    entry = self._devices[0] if self._devices else None
+                if entry is not None or scanned:
+                    return dict(entry) if entry is not None else None
+                # Not in a cached scan: the light may have just been plugged in
+                self._scan(self.backend or get_backend())
+                scanned = True
+
+    def open(self, serial_number: Optional[str] = None, path: Optional[bytes] = None,
+             deadline: Optional[float] = None) -> Optional[LitraDevice]:
+        """
+        Open a device by serial number or path.
+
+        Args:
+            serial_number: Serial number of the device
+            path: Device path, instead of a serial number
+            If neither is given, the first device is opened.
+            deadline: time.monotonic() by which the device must be opened;
+                also set as the deadline of the returned device
+
+        Returns:
+            Connected LitraDevice, or None if the device is not connected
+            or cannot be opened
+        """
+        info = self.lookup(serial_number, path)
+        for attempt in range(2):
+            if info is None:
+                return None
+            device = LitraDevice(info['path'], info['serial_number'])
+            device.deadline = deadline
+            if device.connect():
+                return device
+            self.invalidate()
+            if attempt == 0:
+                info = self.lookup(serial_number, path, refresh=True)
+        return None
+
+    def invalidate(self):
+        """Forget the cached enumeration so the next lookup rescans."""
+        with self._lock:
+            self._scanned_at = None
+
+
+_registry: Optional[DeviceRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> DeviceRegistry:
+    """
+    Get the process-wide registry, which follows the process-wide backend.
+
+    Returns:
+        Shared DeviceRegistry
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DeviceRegistry()
+        return _registry
+
+
+def invalidate_registry():
+    """Invalidate the process-wide registry, if one exists."""
+    registry = _registry
+    if registry is not None:
+        registry.invalidate()
@@ -0,0 +1,348 @@
+"""
+Named scenes stored as ready-to-send reports
+
+A scene is a named set of power, brightness and temperature values. It is
+validated once when saved and stored in a small binary file as the
+20-byte reports that produce it, so applying a scene is only a lookup in
+the memory-mapped file followed by writes. Reports for fields the light
+already has, according to its last known state, are skipped.
+
+File layout (little-endian):
+
+  header  4s magic 'LSCN', B version, x, H scene count
+  record  32s UTF-8 name (NUL padded), B field mask, B power,
+          H lumen, H kelvin, 2x, then three 20-byte reports
+          (power, brightness, temperature; zeroed when unset)
+
+Author: RKaushik
+License: MIT
+"""
+
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from .commands import (REPORT_LENGTH, TURN_OFF_REPORT, TURN_ON_REPORT, brightness_report,
+                       temperature_report)
+from .device import LitraDevice
+from .state import file_lock
+from .utils import validate_brightness, validate_temperature
+
+MAGIC = b'LSCN'
+VERSION = 1
+NAME_LENGTH = 32
+
+HEADER_STRUCT = struct.Struct('<4sBxH')
+RECORD_STRUCT = struct.Struct(f'<{NAME_LENGTH}sBBHH2x')
+RECORD_SIZE = RECORD_STRUCT.size + 3 * REPORT_LENGTH
+
+POWER_FIELD = 0x01
+BRIGHTNESS_FIELD = 0x02
+TEMPERATURE_FIELD = 0x04
+
+# Field name, mask bit and report slot, in the order the slots are stored
+_FIELDS = (('power', POWER_FIELD), ('brightness_lumen', BRIGHTNESS_FIELD),
+           ('temperature_kelvin', TEMPERATURE_FIELD))
+
+
+def default_scenes_path() -> str:
+    """
+    Get the path of the scene file.
+
+    Returns:
+        Value of LITRA_SCENES_FILE if set, otherwise ~/.config/litra-control/scenes.bin
+    """
+    path = os.environ.get('LITRA_SCENES_FILE')
+    if path:
+        return path
+    return os.path.join(os.path.expanduser('~'), '.config', 'litra-control', 'scenes.bin')
+
+
+class Scene:
+    """A named scene and the reports that apply it."""
+
+    __slots__ = ('name', 'power', 'brightness_lumen', 'temperature_kelvin', 'reports')
+
+    def __init__(self, name: str, power: Optional[str] = None, brightness_lumen: Optional[int] = None,
+                 temperature_kelvin: Optional[int] = None, reports: Optional[Dict[str, bytes]] = None):
+        """
+        Initialize a scene, building its reports unless they are given.
+
+        Args:
+            name: Scene name
+            power: 'on', 'off' or None to leave power alone
+            brightness_lumen: Brightness in lumens, or None to leave it alone
+            temperature_kelvin: Temperature in Kelvin, or None to leave it alone
+            reports: Field name -> report, as read from a scene file
+        """
+        self.name = name
+        self.power = power
+        self.brightness_lumen = brightness_lumen
+        self.temperature_kelvin = temperature_kelvin
+        if reports is None:
+            reports = {}
+            if power is not None:
+                reports['power'] = TURN_ON_REPORT if power == 'on' else TURN_OFF_REPORT
+            if brightness_lumen is not None:
+                reports['brightness_lumen'] = brightness_report(brightness_lumen)
+            if temperature_kelvin is not None:
+                reports['temperature_kelvin'] = temperature_report(temperature_kelvin)
+        self.reports = reports
+
+    def items(self) -> List[Tuple[str, object, bytes]]:
+        """
+        Get the scene's fields in the order they should be sent.
+
+        When turning on, brightness and temperature are sent before power,
+        so the light comes on with the new values instead of briefly
+        showing the previous ones. When turning off, power goes first, so
+        the light goes dark before the other values change.
+
+        Returns:
+            List of (field, value, report) tuples
+        """
+        items = [(field, getattr(self, field), self.reports[field])
+                 for field, _ in _FIELDS if field in self.reports]
+        if self.power == 'on':
+            items.append(items.pop(0))
+        return items
+
+    def to_dict(self) -> dict:
+        """
+        Get the scene as a JSON-friendly dictionary.
+
+        Returns:
+            Dictionary with 'name' and the fields the scene sets
+        """
+        result = {'name': self.name}
+        result.update((field, getattr(self, field)) for field, _ in _FIELDS if field in self.reports)
+        return result
+
+    def __repr__(self) -> str:
+        return f"Scene({self.to_dict()!r})"
+
+
+def make_scene(name: str, power: Optional[str] = None, brightness_lumen: Optional[int] = None,
+               temperature_kelvin: Optional[int] = None) -> Scene:
+    """
+    Validate scene values and build its reports.
+
+    Args:
+        name: Scene name, at most 32 bytes of UTF-8
+        power: 'on', 'off' or None
+        brightness_lumen: Brightness in lumens, or None
+        temperature_kelvin: Temperature in Kelvin, or None
+
+    Returns:
+        Scene
+
+    Raises:
+        ValueError: If the name or a value is invalid, or the scene sets nothing
+    """
+    encoded = name.encode('utf-8')
+    if not encoded or len(encoded) > NAME_LENGTH or b'\x00' in encoded:
+        raise ValueError(f"Scene names must be 1 to {NAME_LENGTH} bytes long")
+    if power is not None and power not in ('on', 'off'):
+        raise ValueError(f"Power must be 'on' or 'off', got {power!r}")
+    if brightness_lumen is not None:
+        valid, error = validate_brightness(brightness_lumen)
+        if not valid:
+            raise ValueError(error)
+    if temperature_kelvin is not None:
+        valid, error = validate_temperature(temperature_kelvin)
+        if not valid:
+            raise ValueError(error)
+    if power is None and brightness_lumen is None and temperature_kelvin is None:
+        raise ValueError("A scene must set power, brightness or temperature")
+    return Scene(name, power, brightness_lumen, temperature_kelvin)
+
+
+def _encode(scene: Scene) -> bytes:
+    mask = 0
+    for field, bit in _FIELDS:
+        if field in scene.reports:
+            mask |= bit
+    record = RECORD_STRUCT.pack(scene.name.encode('utf-8'), mask, 1 if scene.power == 'on' else 0,
+                                scene.brightness_lumen or 0, scene.temperature_kelvin or 0)
+    empty = bytes(REPORT_LENGTH)
+    return record + b''.join(scene.reports.get(field, empty) for field, _ in _FIELDS)
+
+
+class SceneStore:
+    """Scene file, memory-mapped for reading."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the store; the file is opened on first use.
+
+        Args:
+            path: Scene file; defaults to default_scenes_path()
+        """
+        self.path = path or default_scenes_path()
+        self._map = None
+        self._index: Optional[Dict[str, int]] = None
+
+    def _load(self):
+        if self._index is not None:
+            return
+        try:
+            with open(self.path, 'rb') as fh:
+                if os.fstat(fh.fileno()).st_size < HEADER_STRUCT.size:
+                    self._index = {}
+                    return
+                mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            self._index = {}
+            return
+
+        magic, version, count = HEADER_STRUCT.unpack_from(mapped)
+        if magic != MAGIC or version != VERSION or len(mapped) < HEADER_STRUCT.size + count * RECORD_SIZE:
+            mapped.close()
+            raise ValueError(f"{self.path} is not a valid version {VERSION} scene file")
+        index = {}
+        for i in range(count):
+            offset = HEADER_STRUCT.size + i * RECORD_SIZE
+            index[mapped[offset:offset + NAME_LENGTH].rstrip(b'\x00').decode('utf-8')] = offset
+        self._map = mapped
+        self._index = index
+
+    def names(self) -> List[str]:
+        """
+        List the saved scene names.
+
+        Returns:
+            Names in the order they were first saved
+        """
+        self._load()
+        return list(self._index)
+
+    def get(self, name: str) -> Optional[Scene]:
+        """
+        Look up a scene.
+
+        Args:
+            name: Scene name
+
+        Returns:
+            Scene, or None if there is no such scene
+        """
+        self._load()
+        offset = self._index.get(name)
+        if offset is None:
+            return None
+        _, mask, power, lumen, kelvin = RECORD_STRUCT.unpack_from(self._map, offset)
+        values, reports = {}, {}
+        slot = offset + RECORD_STRUCT.size
+        for (field, bit), value in zip(_FIELDS, ('on' if power else 'off', lumen, kelvin)):
+            if mask & bit:
+                values[field] = value
+                reports[field] = self._map[slot:slot + REPORT_LENGTH]
+            slot += REPORT_LENGTH
+        return Scene(name, reports=reports, **values)
+
+    def scenes(self) -> List[Scene]:
+        """
+        Get every saved scene.
+
+        Returns:
+            Scenes in the order they were first saved
+        """
+        return [self.get(name) for name in self.names()]
+
+    def save(self, scene: Scene):
+        """
+        Add a scene, replacing any scene with the same name.
+
+        The file is re-read and replaced under a lock, so concurrent saves
+        of different scenes keep each other's scenes.
+
+        Args:
+            scene: Scene from make_scene()
+        """
+        with file_lock(self.path):
+            self._write({**self._records(), scene.name: _encode(scene)})
+
+    def delete(self, name: str) -> bool:
+        """
+        Remove a scene.
+
+        Args:
+            name: Scene name
+
+        Returns:
+            True if the scene existed
+        """
+        with file_lock(self.path):
+            records = self._records()
+            if records.pop(name, None) is None:
+                return False
+            self._write(records)
+        return True
+
+    def _records(self) -> Dict[str, bytes]:
+        # Map the file again: another process may have replaced it since
+        self.close()
+        self._load()
+        return {name: self._map[offset:offset + RECORD_SIZE] for name, offset in self._index.items()}
+
+    def _write(self, records: Dict[str, bytes]):
+        data = HEADER_STRUCT.pack(MAGIC, VERSION, len(records)) + b''.join(records.values())
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as fh:
+            fh.write(data)
+        # Unmap first: some platforms refuse to replace a mapped file
+        self.close()
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        """Unmap the file; it is mapped again on next use."""
+        if self._map is not None:
+            self._map.close()
+        self._map = None
+        self._index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def apply_scene(device: LitraDevice, scene: Scene) -> dict:
+    """
+    Apply a scene to an open device, sending only what differs.
+
+    The device's last known state comes from its shadow state cache while
+    that is fresh, otherwise from one status read. If the state cannot be
+    read, every report of the scene is sent.
+
+    Args:
+        device: Connected LitraDevice
+        scene: Scene to apply
+
+    Returns:
+        Result dictionary with 'scene', 'ok', 'sent', 'unchanged' and the
+        scene's field values, or 'error'
+    """
+    result = {'scene': scene.name, 'ok': False, 'sent': 0, 'unchanged': 0}
+    current = device.current_state()
+    known = 'error' not in current
+    cache = device.state_cache
+    key = device.state_key()
+
+    for field, value, report in scene.items():
+        result[field] = value
+        if known and current[field] == value:
+            result['unchanged'] += 1
+            continue
+        if not device.write(report):
+            if cache is not None:
+                cache.invalidate(key)
+            result['error'] = "Failed to send command to device"
+            return result
+        result['sent'] += 1
+        if cache is not None:
+            cache.update(key, **{field: value})
+    result['ok'] = True
+    return result
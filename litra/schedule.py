@@ -0,0 +1,437 @@
+"""
+Daylight schedules: precompiled day curves driven by a timer wheel
+
+A day curve is a list of keyframes ("07:00: 80 lumens, 3000K") that is
+interpolated linearly, wrapping around midnight. compile_curve() turns it
+into a DayTable: one lumen and one kelvin entry per minute of the day,
+already clamped to the device's limits and snapped to its 100 K steps,
+stored as two array('H') of 1440 entries (under 6 KB per curve).
+
+ScheduleRunner drives any number of lights from a single thread. Every
+light knows, from its table, the minute its quantized value next changes
+and sits in that slot of a hashed timer wheel until then, so a tick only
+touches the lights that are due and lights whose value did not change
+are never written to.
+
+Author: RKaushik
+License: MIT
+"""
+
+import json
+import math
+import time
+from array import array
+from bisect import bisect_right
+from typing import Callable, List, Optional, Tuple, Union
+
+from .commands import BRIGHTNESS_REPORTS, TEMPERATURE_REPORTS
+from .device import LitraDevice
+from .utils import percentage_to_lumen
+
+MINUTES_PER_DAY = 24 * 60
+DEFAULT_TICK = 1.0
+DEFAULT_SLOTS = 64
+RETRY_SECONDS = 5.0
+
+MIN_LUMEN = LitraDevice.MIN_BRIGHTNESS_LUMEN
+MAX_LUMEN = LitraDevice.MAX_BRIGHTNESS_LUMEN
+MIN_KELVIN = LitraDevice.MIN_TEMPERATURE_KELVIN
+MAX_KELVIN = LitraDevice.MAX_TEMPERATURE_KELVIN
+TEMPERATURE_STEP = LitraDevice.TEMPERATURE_STEP
+
+
+def _parse_time(text: str) -> int:
+    try:
+        hours, minutes = (int(part) for part in str(text).split(':'))
+    except ValueError:
+        raise ValueError(f"Invalid time {text!r}, expected HH:MM") from None
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Invalid time {text!r}, expected HH:MM")
+    return hours * 60 + minutes
+
+
+def _number(point: dict, key: str) -> float:
+    value = point[key]
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"Invalid {key} {value!r} in point at {point['time']}, expected a number")
+    return float(value)
+
+
+def _quantize_lumen(value: float) -> int:
+    return min(max(int(round(value)), MIN_LUMEN), MAX_LUMEN)
+
+
+def _quantize_kelvin(value: float) -> int:
+    return min(max(int(round(value / TEMPERATURE_STEP)) * TEMPERATURE_STEP, MIN_KELVIN), MAX_KELVIN)
+
+
+def _compile_channel(keyframes: List[Tuple[int, float]], quantize: Callable[[float], int]) -> array:
+    table = array('H', bytes(2 * MINUTES_PER_DAY))
+    if not keyframes:
+        # Zero marks a channel the schedule leaves alone
+        return table
+    keyframes = sorted(keyframes)
+    for i, (minute, value) in enumerate(keyframes):
+        next_minute, next_value = keyframes[(i + 1) % len(keyframes)]
+        span = (next_minute - minute) % MINUTES_PER_DAY or MINUTES_PER_DAY
+        slope = (next_value - value) / span
+        # Fill the whole segment with one slice assignment; it may wrap past midnight
+        segment = array('H', [quantize(value + slope * k) for k in range(span)])
+        head = min(span, MINUTES_PER_DAY - minute)
+        table[minute:minute + head] = segment[:head]
+        table[0:span - head] = segment[head:]
+    return table
+
+
+class DayTable:
+    """Per-minute lumen and kelvin values of a compiled day curve."""
+
+    __slots__ = ('lumen', 'kelvin', '_changes')
+
+    def __init__(self, lumen: array, kelvin: array):
+        """
+        Initialize a table from per-minute values.
+
+        Args:
+            lumen: array('H') of 1440 brightness values; 0 leaves brightness alone
+            kelvin: array('H') of 1440 temperature values; 0 leaves temperature alone
+        """
+        if len(lumen) != MINUTES_PER_DAY or len(kelvin) != MINUTES_PER_DAY:
+            raise ValueError(f"Tables must have {MINUTES_PER_DAY} entries")
+        self.lumen = lumen
+        self.kelvin = kelvin
+        # Minutes whose value differs from the minute before, wrapping at midnight
+        self._changes = [minute for minute in range(MINUTES_PER_DAY)
+                         if lumen[minute] != lumen[minute - 1] or kelvin[minute] != kelvin[minute - 1]]
+
+    def at(self, minute: int) -> Tuple[int, int]:
+        """
+        Get the scheduled values for a minute of the day.
+
+        Args:
+            minute: Minutes since midnight
+
+        Returns:
+            Tuple of (lumen, kelvin); 0 means the channel is not scheduled
+        """
+        minute %= MINUTES_PER_DAY
+        return self.lumen[minute], self.kelvin[minute]
+
+    def minutes_until_change(self, minute: int) -> Optional[int]:
+        """
+        Get how long the value scheduled for a minute stays in effect.
+
+        Args:
+            minute: Minutes since midnight
+
+        Returns:
+            Minutes until the next minute with a different value, or None
+            if the curve is constant
+        """
+        if not self._changes:
+            return None
+        minute %= MINUTES_PER_DAY
+        index = bisect_right(self._changes, minute)
+        if index < len(self._changes):
+            return self._changes[index] - minute
+        return self._changes[0] + MINUTES_PER_DAY - minute
+
+    def changes(self) -> List[Tuple[int, int, int]]:
+        """
+        List every point at which the scheduled values change.
+
+        Returns:
+            List of (minute, lumen, kelvin) tuples in time order
+        """
+        return [(minute, self.lumen[minute], self.kelvin[minute]) for minute in self._changes]
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the per-minute tables in bytes."""
+        return (len(self.lumen) + len(self.kelvin)) * self.lumen.itemsize
+
+
+def compile_curve(curve: Union[dict, list]) -> DayTable:
+    """
+    Compile a day curve into a per-minute table.
+
+    The curve is a list of points (or a dictionary with a 'points' list).
+    Each point has a 'time' ("HH:MM") and any of 'brightness' (lumens),
+    'brightness_percent' and 'temperature' (Kelvin). Each channel is
+    interpolated linearly between the points that set it, wrapping around
+    midnight; a channel no point sets is left alone.
+
+    Args:
+        curve: Parsed curve
+
+    Returns:
+        DayTable
+
+    Raises:
+        ValueError: If a point is malformed (including values that are not
+            numbers) or two points set a channel at the same time
+    """
+    points = curve.get('points') if isinstance(curve, dict) else curve
+    if not isinstance(points, list) or not points:
+        raise ValueError("A curve needs a non-empty list of points")
+
+    lumen_keys, kelvin_keys = {}, {}
+    for point in points:
+        if not isinstance(point, dict) or 'time' not in point:
+            raise ValueError(f"Invalid point {point!r}, expected an object with a 'time'")
+        minute = _parse_time(point['time'])
+        values = []
+        if 'brightness' in point:
+            values.append((lumen_keys, _number(point, 'brightness')))
+        if 'brightness_percent' in point:
+            values.append((lumen_keys, float(percentage_to_lumen(_number(point, 'brightness_percent')))))
+        if 'temperature' in point:
+            values.append((kelvin_keys, _number(point, 'temperature')))
+        if not values:
+            raise ValueError(f"Point at {point['time']} sets neither brightness nor temperature")
+        for keys, value in values:
+            if minute in keys:
+                raise ValueError(f"More than one value for {point['time']}")
+            keys[minute] = value
+
+    return DayTable(_compile_channel(list(lumen_keys.items()), _quantize_lumen),
+                    _compile_channel(list(kelvin_keys.items()), _quantize_kelvin))
+
+
+def load_curve(path: str) -> DayTable:
+    """
+    Read and compile a JSON day curve.
+
+    Args:
+        path: Path of the curve file
+
+    Returns:
+        DayTable
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not a valid curve
+    """
+    with open(path, 'r', encoding='utf-8') as fh:
+        return compile_curve(json.load(fh))
+
+
+class TimerWheel:
+    """
+    Hashed timing wheel.
+
+    Scheduling is O(1), and advancing only visits the entries that hash
+    to the current slot. Entries due more than one revolution ahead carry
+    a count of the revolutions left.
+    """
+
+    __slots__ = ('_slots', '_position', '_size')
+
+    def __init__(self, slots: int = DEFAULT_SLOTS):
+        """
+        Initialize an empty wheel.
+
+        Args:
+            slots: Number of slots in one revolution
+        """
+        if slots < 1:
+            raise ValueError("A timer wheel needs at least one slot")
+        self._slots = [[] for _ in range(slots)]
+        self._position = 0
+        self._size = 0
+
+    def schedule(self, ticks: int, item):
+        """
+        Schedule an item.
+
+        Args:
+            ticks: Number of advance() calls until the item is due; values
+                below 1 mean the next one
+            item: Object returned by advance() when due
+        """
+        ticks = max(1, ticks)
+        count = len(self._slots)
+        self._slots[(self._position + ticks) % count].append([(ticks - 1) // count, item])
+        self._size += 1
+
+    def advance(self) -> list:
+        """
+        Move to the next slot.
+
+        Returns:
+            Items that are due, in the order they were scheduled
+        """
+        self._position = (self._position + 1) % len(self._slots)
+        bucket = self._slots[self._position]
+        if not bucket:
+            return []
+        due, waiting = [], []
+        for entry in bucket:
+            if entry[0]:
+                entry[0] -= 1
+                waiting.append(entry)
+            else:
+                due.append(entry[1])
+        self._slots[self._position] = waiting
+        self._size -= len(due)
+        return due
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class ScheduleStats:
+    """Counters collected while a schedule runs."""
+
+    __slots__ = ('ticks', 'wakeups', 'writes', 'unchanged', 'failed_writes')
+
+    def __init__(self):
+        self.ticks = 0
+        self.wakeups = 0
+        self.writes = 0
+        self.unchanged = 0
+        self.failed_writes = 0
+
+    def to_dict(self) -> dict:
+        """
+        Get the stats as a JSON-friendly dictionary.
+
+        Returns:
+            Dictionary of counters
+        """
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class _Binding:
+    __slots__ = ('device', 'table', 'lumen', 'kelvin')
+
+    def __init__(self, device: LitraDevice, table: DayTable):
+        self.device = device
+        self.table = table
+        # Last values successfully sent
+        self.lumen = None
+        self.kelvin = None
+
+
+class ScheduleRunner:
+    """Single-threaded scheduler applying day tables to connected lights."""
+
+    def __init__(self, tick: float = DEFAULT_TICK, slots: int = DEFAULT_SLOTS,
+                 clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], None] = time.sleep,
+                 localtime: Callable[[float], time.struct_time] = time.localtime,
+                 on_apply: Optional[Callable[[LitraDevice, int, int, int], None]] = None):
+        """
+        Initialize a runner with no lights.
+
+        Args:
+            tick: Scheduler resolution in seconds
+            slots: Timer wheel slots
+            clock: Wall clock in seconds since the epoch
+            sleep: Sleep function in seconds
+            localtime: Converts clock() values to local time
+            on_apply: Called with (device, minute, lumen, kelvin) after every
+                write, for logging
+        """
+        if tick <= 0:
+            raise ValueError("Tick must be positive")
+        self.tick_seconds = tick
+        self.clock = clock
+        self.sleep = sleep
+        self.localtime = localtime
+        self.on_apply = on_apply
+        self.stats = ScheduleStats()
+        self._wheel = TimerWheel(slots)
+
+    def add(self, device: LitraDevice, table: DayTable):
+        """
+        Drive a connected light from a table, starting at the next tick.
+
+        Args:
+            device: Connected LitraDevice
+            table: Compiled day table
+        """
+        self._wheel.schedule(1, _Binding(device, table))
+
+    def pending(self) -> int:
+        """Number of lights waiting for their next change."""
+        return len(self._wheel)
+
+    def tick(self, now: Optional[float] = None):
+        """
+        Advance the wheel by one tick and apply every light that is due.
+
+        Args:
+            now: Current clock() value; read from the clock if omitted
+        """
+        now = self.clock() if now is None else now
+        self.stats.ticks += 1
+        for binding in self._wheel.advance():
+            self.stats.wakeups += 1
+            self._apply(binding, now)
+
+    def run(self, duration: Optional[float] = None):
+        """
+        Tick at a fixed rate until the duration has elapsed.
+
+        Args:
+            duration: Seconds to run; None runs until interrupted
+        """
+        start = self.clock()
+        count = 0
+        while True:
+            due = start + count * self.tick_seconds
+            now = self.clock()
+            if now < due:
+                self.sleep(due - now)
+                now = self.clock()
+            if duration is not None and now - start >= duration:
+                return
+            # After a stall (e.g. a suspended laptop) the missed ticks run
+            # back to back; each only touches its own slot, so this is cheap
+            self.tick(now)
+            count += 1
+
+    def _apply(self, binding: _Binding, now: float):
+        local = self.localtime(now)
+        minute = local.tm_hour * 60 + local.tm_min
+        lumen, kelvin = binding.table.at(minute)
+        device = binding.device
+        written, failed = {}, False
+
+        if lumen and lumen != binding.lumen:
+            if device.write(BRIGHTNESS_REPORTS[lumen]):
+                binding.lumen = written['brightness_lumen'] = lumen
+            else:
+                failed = True
+        if kelvin and kelvin != binding.kelvin:
+            if device.write(TEMPERATURE_REPORTS[kelvin]):
+                binding.kelvin = written['temperature_kelvin'] = kelvin
+            else:
+                failed = True
+
+        self.stats.writes += len(written)
+        if not written and not failed:
+            self.stats.unchanged += 1
+        if device.state_cache is not None:
+            if failed:
+                device.state_cache.invalidate(device.state_key())
+            elif written:
+                device.state_cache.update(device.state_key(), **written)
+        if written and self.on_apply is not None:
+            self.on_apply(device, minute, binding.lumen or 0, binding.kelvin or 0)
+
+        if failed:
+            self.stats.failed_writes += 1
+            # Reopen in case the light was unplugged, and try again shortly
+            device.disconnect()
+            device.connect()
+            self._wheel.schedule(math.ceil(RETRY_SECONDS / self.tick_seconds), binding)
+            return
+
+        minutes = binding.table.minutes_until_change(minute)
+        if minutes is None:
+            # Constant curve: nothing left to do for this light
+            return
+        seconds = minutes * 60 - local.tm_sec - (now % 1.0)
+        self._wheel.schedule(math.ceil(seconds / self.tick_seconds), binding)
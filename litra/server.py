@@ -0,0 +1,411 @@
+"""
+HTTP/JSON control server for Litra Glow lights
+
+A small REST API for home-automation controllers and stream-deck plugins,
+built on http.server. Connections are kept alive (HTTP/1.1), and every
+light is opened once and kept open in a DevicePool. Requests for the same
+light are serialized on that light's lock, while requests for different
+lights run concurrently on their own connection threads.
+
+Endpoints (the /devices/SERIAL/... forms address one light, the short
+forms the first connected light):
+
+  GET  /devices                     connected lights
+  GET  /status, /devices/S/status   current status
+  POST /on, /off, /toggle
+  POST /brightness                  {"value": 150}, {"value": 60, "percentage": true}
+                                    or {"value": "+10"}
+  POST /temperature                 {"value": 4000} or {"value": "-200"}
+  GET  /metrics                     device I/O timings in Prometheus format,
+                                    when started with --metrics
+  GET  /history                     recent device events as NDJSON, when
+                                    started with --history; filters: since
+                                    (seconds), serial, kind, op, result, limit
+
+Values may also be given as query parameters (?value=150&percentage=1).
+Replies are JSON objects with "ok" plus the result fields, or "error".
+
+Author: RKaushik
+License: MIT
+"""
+
+import argparse
+import io
+import json
+import re
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from . import history, metrics
+from .batch import parse_command
+from .device import LitraDevice
+from .registry import DeviceRegistry, get_registry
+from .state import StateCache, default_ttl
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_BODY = 4096
+# Form of a 'value' parameter: an absolute value, or a change with its sign
+_INTEGER = re.compile(r'[+-]?[0-9]+')
+
+ACTIONS = ('on', 'off', 'toggle', 'brightness', 'temperature', 'status')
+
+# HTTP status for each litra-control exit code
+HTTP_STATUS = {
+    0: 200,
+    1: 404,  # Device not found
+    2: 400,  # Invalid parameter
+    3: 502,  # Communication error
+}
+
+
+def _error(message: str, exit_code: int) -> dict:
+    return {'ok': False, 'error': message, 'exit_code': exit_code}
+
+
+class _PoolEntry:
+    __slots__ = ('serial_number', 'path', 'device', 'lock')
+
+    def __init__(self, info: dict):
+        self.serial_number = info['serial_number']
+        self.path = info['path']
+        self.device: Optional[LitraDevice] = None
+        self.lock = threading.Lock()
+
+
+class DevicePool:
+    """One open LitraDevice per light, each used by one request at a time."""
+
+    def __init__(self, registry: Optional[DeviceRegistry] = None, state_ttl: Optional[float] = None):
+        """
+        Initialize an empty pool; lights are opened on first use.
+
+        Args:
+            registry: Device registry to look lights up in (default: the process-wide one)
+            state_ttl: Seconds to trust the in-memory shadow state (default: $LITRA_STATE_TTL or 30)
+        """
+        self.registry = registry or get_registry()
+        self.state_cache = StateCache(ttl=default_ttl() if state_ttl is None else state_ttl)
+        self._entries: Dict[object, _PoolEntry] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, serial_number: Optional[str]) -> Optional[_PoolEntry]:
+        info = self.registry.lookup(serial_number)
+        if info is None:
+            return None
+        key = info['serial_number'] or info['path']
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _PoolEntry(info)
+            return entry
+
+    def _open(self, entry: _PoolEntry) -> Optional[LitraDevice]:
+        if entry.device is None:
+            if entry.serial_number:
+                device = self.registry.open(entry.serial_number)
+            else:
+                device = self.registry.open(path=entry.path)
+            if device is not None:
+                device.state_cache = self.state_cache
+            entry.device = device
+        return entry.device
+
+    def _drop(self, entry: _PoolEntry):
+        if entry.device is not None:
+            self.state_cache.invalidate(entry.device.state_key())
+            try:
+                entry.device.disconnect()
+            except (IOError, OSError):
+                pass
+            entry.device = None
+
+    def execute(self, serial_number: Optional[str], command: str, value: Optional[int] = None) -> dict:
+        """
+        Run one validated command on a light.
+
+        Args:
+            serial_number: Serial number of the light, or None for the first light
+            command: Command for LitraDevice.execute()
+            value: Command value
+
+        Returns:
+            Reply dictionary with 'ok', 'serial_number' and the result fields,
+            or 'error' and 'exit_code'
+        """
+        entry = self._entry(serial_number)
+        if entry is None:
+            if serial_number:
+                return _error(f"No Litra Glow with serial number {serial_number}", 1)
+            return _error("Litra Glow device not found. Please check USB connection.", 1)
+
+        with entry.lock:
+            # A failure on a pooled handle usually means the light was
+            # unplugged and replugged, so reopen once before giving up
+            for attempt in range(2):
+                device = self._open(entry)
+                if device is None:
+                    return _error("Litra Glow device not found. Please check USB connection.", 1)
+                try:
+                    result = device.execute(command, value)
+                except (IOError, OSError) as e:
+                    result = {'ok': False, 'error': f"Communication failed - {e}"}
+                if result['ok']:
+                    del result['command']
+                    result.pop('value', None)
+                    result['serial_number'] = device.state_key()
+                    return result
+                if attempt:
+                    return _error(result['error'], 3)
+                self._drop(entry)
+
+    def devices(self) -> List[dict]:
+        """
+        List the connected lights.
+
+        Returns:
+            Dictionaries with 'serial_number', 'product', 'manufacturer' and
+            'open' (whether the pool holds a handle to the light)
+        """
+        with self._lock:
+            open_keys = {key for key, entry in self._entries.items() if entry.device is not None}
+        return [{'serial_number': info['serial_number'], 'product': info['product'],
+                 'manufacturer': info['manufacturer'],
+                 'open': (info['serial_number'] or info['path']) in open_keys}
+                for info in self.registry.devices()]
+
+    def close(self):
+        """Close every pooled handle."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            with entry.lock:
+                self._drop(entry)
+
+
+def parse_action(action: str, params: dict) -> Tuple[str, Optional[int]]:
+    """
+    Turn an endpoint and its parameters into a validated command.
+
+    Args:
+        action: One of ACTIONS
+        params: Request parameters; 'value' (an integer, or a string of
+            digits with an optional sign) and 'percentage' are used
+
+    Returns:
+        (command, value) pair for LitraDevice.execute()
+
+    Raises:
+        ValueError: If the value is missing or invalid
+    """
+    if action in ('brightness', 'temperature'):
+        value = params.get('value')
+        if value is None:
+            raise ValueError(f"'{action}' needs a value")
+        # Checked before it is pasted into a command line, where extra words would be flags
+        if isinstance(value, bool) or not (isinstance(value, int)
+                                           or (isinstance(value, str) and _INTEGER.fullmatch(value))):
+            raise ValueError(f"Invalid {action} value {value!r}. Must be an integer.")
+        percentage = params.get('percentage') in (True, 1, '1', 'true', 'yes')
+        return parse_command(f"{action} {value}" + (" -p" if percentage else ""))
+    return parse_command(action)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Routes REST requests to the server's DevicePool."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'litra-control'
+    # Headers and body go out in separate writes; without TCP_NODELAY a
+    # kept-alive connection stalls on delayed ACKs for ~40 ms per reply
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_POST(self):
+        self._route('POST')
+
+    def _route(self, method: str):
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.split('/') if part]
+        try:
+            params = self._params(url.query)
+        except ValueError as e:
+            return self._reply(_error(f"Invalid request - {e}", 2))
+
+        if parts == ['devices']:
+            if method != 'GET':
+                return self._not_allowed('GET')
+            return self._reply({'ok': True, 'devices': self.server.pool.devices()})
+
+        if parts == ['metrics'] and method == 'GET':
+            return self._metrics()
+
+        if parts == ['history'] and method == 'GET':
+            return self._history(params)
+
+        serial_number = None
+        if len(parts) == 3 and parts[0] == 'devices':
+            serial_number, parts = parts[1], parts[2:]
+        if len(parts) != 1 or parts[0] not in ACTIONS:
+            return self._reply(_error(f"No such endpoint {url.path}", 1), 404)
+        action = parts[0]
+        expected = 'GET' if action == 'status' else 'POST'
+        if method != expected:
+            return self._not_allowed(expected)
+
+        try:
+            command, value = parse_action(action, params)
+        except ValueError as e:
+            return self._reply(_error(str(e), 2))
+        self._reply(self.server.pool.execute(serial_number, command, value))
+
+    def _metrics(self):
+        recorder = metrics.get_metrics()
+        if recorder is None:
+            return self._reply(_error("Metrics are not enabled; start the server with --metrics", 2), 404)
+        body = recorder.to_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _history(self, params: dict):
+        events = history.get_history()
+        if events is None:
+            return self._reply(_error("History is not enabled; start the server with --history", 2), 404)
+        try:
+            since = float(params['since']) if 'since' in params else None
+            limit = int(params['limit']) if 'limit' in params else None
+            body = io.StringIO()
+            events.export_ndjson(body, since=None if since is None else time.time() - since,
+                                 serial_number=params.get('serial'), kind=params.get('kind'),
+                                 op=params.get('op'), result=params.get('result'), limit=limit)
+        except ValueError as e:
+            return self._reply(_error(f"Invalid request - {e}", 2))
+        data = body.getvalue().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _params(self, query: str) -> dict:
+        params = dict(parse_qsl(query))
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_BODY:
+            # The body is not read, so the connection cannot carry another request
+            self.close_connection = True
+            raise ValueError("request body too large" if length > 0 else "invalid Content-Length")
+        # Always drain the body so the next request on this connection parses
+        body = self.rfile.read(length) if length else b''
+        if body.strip():
+            decoded = json.loads(body)
+            if not isinstance(decoded, dict):
+                raise ValueError("body must be a JSON object")
+            params.update(decoded)
+        return params
+
+    def _not_allowed(self, allowed: str):
+        self._reply(_error(f"Use {allowed} for this endpoint", 2), 405, {'Allow': allowed})
+
+    def _reply(self, reply: dict, status: Optional[int] = None, headers: Optional[dict] = None):
+        body = json.dumps(reply).encode('utf-8')
+        self.send_response(status or HTTP_STATUS.get(reply.get('exit_code', 0), 500))
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class LitraHTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server sharing one DevicePool across connections."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int] = (DEFAULT_HOST, DEFAULT_PORT),
+                 pool: Optional[DevicePool] = None, verbose: bool = False):
+        """
+        Bind the server.
+
+        Args:
+            address: (host, port) to listen on; port 0 picks a free port
+            pool: Device pool (default: a new pool on the process-wide registry)
+            verbose: Log every request to stderr
+        """
+        self.pool = pool or DevicePool()
+        self.verbose = verbose
+        super().__init__(address, _Handler)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.close()
+
+
+def main(argv=None) -> int:
+    """Entry point for `litra-control serve`."""
+    parser = argparse.ArgumentParser(
+        description="Serve a REST API for the connected Litra Glow lights",
+        epilog="Author: RKaushik | License: MIT"
+    )
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help=f'Address to listen on (default: {DEFAULT_HOST}; the API has no authentication)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--state-ttl', type=float, metavar='SECONDS',
+                        help='Trust cached device state for this long (default: $LITRA_STATE_TTL or 30)')
+    parser.add_argument('--metrics', action='store_true', help='Record device I/O timings')
+    parser.add_argument('--history', type=int, nargs='?', const=history.DEFAULT_CAPACITY, metavar='EVENTS',
+                        help=f'Keep the last EVENTS device events for GET /history '
+                             f'(default: {history.DEFAULT_CAPACITY})')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args(argv)
+
+    if args.metrics:
+        metrics.enable()
+    if args.history is not None:
+        if args.history <= 0:
+            parser.error("--history needs a positive number of events")
+        history.enable(args.history)
+    try:
+        server = LitraHTTPServer((args.host, args.port), DevicePool(state_ttl=args.state_ttl), args.verbose)
+    except OSError as e:
+        print(f"Error: Cannot listen on {args.host}:{args.port} - {e}", file=sys.stderr)
+        return 1
+
+    def _stop(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    host, port = server.server_address[:2]
+    print(f"litra-control serving on http://{host}:{port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
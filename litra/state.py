@@ -0,0 +1,238 @@
+"""
+Shadow state cache for Litra Glow devices
+
+Remembers the last known power, brightness and temperature of each device,
+keyed by serial number, so that toggles and relative adjustments can be
+answered without a status round-trip and redundant writes can be skipped.
+Entries are only trusted for a limited time, since the light's own buttons
+change its state behind our back.
+
+Author: RKaushik
+License: MIT
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DEFAULT_TTL = 30.0
+
+FIELDS = ('power', 'brightness_lumen', 'temperature_kelvin')
+
+
+def default_state_path() -> str:
+    """
+    Get the path of the CLI state file.
+
+    Returns:
+        Value of LITRA_STATE_FILE if set, otherwise ~/.cache/litra-control/state.json
+    """
+    path = os.environ.get('LITRA_STATE_FILE')
+    if path:
+        return path
+    return os.path.join(os.path.expanduser('~'), '.cache', 'litra-control', 'state.json')
+
+
+def default_ttl() -> float:
+    """
+    Get the cache TTL in seconds.
+
+    Returns:
+        Value of LITRA_STATE_TTL if set and valid, otherwise DEFAULT_TTL
+    """
+    try:
+        return float(os.environ.get('LITRA_STATE_TTL', DEFAULT_TTL))
+    except ValueError:
+        return DEFAULT_TTL
+
+
+class StateCache:
+    """Per-device shadow state, optionally persisted to a JSON file."""
+
+    def __init__(self, path: Optional[str] = None, ttl: float = DEFAULT_TTL):
+        """
+        Initialize the cache.
+
+        Args:
+            path: JSON file to load from and save to; None keeps state in memory only
+            ttl: Seconds an entry is trusted after it was last updated; 0 disables the cache
+        """
+        self.path = path
+        self.ttl = ttl
+        self._entries = {}
+        self._loaded = path is None
+        # Keys changed since the last save -> new entry, or None if invalidated
+        self._changed: Dict[str, Optional[dict]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        self._entries = _read_entries(self.path)
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Get the cached state of a device if it is still fresh.
+
+        Args:
+            key: Device key, normally its serial number
+
+        Returns:
+            Dictionary with 'power', 'brightness_lumen' and 'temperature_kelvin'
+            (each possibly None if unknown), or None if there is no fresh entry
+        """
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry.get('updated', 0) > self.ttl:
+                return None
+            return {field: entry.get(field) for field in FIELDS}
+
+    def matches(self, key: str, field: str, value) -> bool:
+        """
+        Check whether a fresh entry already holds the given value.
+
+        Args:
+            key: Device key
+            field: One of 'power', 'brightness_lumen', 'temperature_kelvin'
+            value: Target value
+
+        Returns:
+            True if writing the value would not change the device
+        """
+        entry = self.get(key)
+        return entry is not None and entry[field] == value
+
+    def update(self, key: str, **fields):
+        """
+        Record newly written or read values and refresh the entry's age.
+
+        Args:
+            key: Device key
+            **fields: Any of 'power', 'brightness_lumen', 'temperature_kelvin'
+        """
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry.get('updated', 0) > self.ttl:
+                # Values from an expired entry can't be trusted alongside fresh ones
+                entry = {}
+            entry.update((field, fields[field]) for field in FIELDS if field in fields)
+            entry['updated'] = time.time()
+            self._entries[key] = entry
+            self._changed[key] = entry
+
+    def invalidate(self, key: str):
+        """
+        Forget a device's state, e.g. after a failed write.
+
+        Args:
+            key: Device key
+        """
+        with self._lock:
+            self._load()
+            if self._entries.pop(key, None) is not None:
+                self._changed[key] = None
+
+    def save(self):
+        """
+        Write the entries changed since the last save to the cache file.
+
+        The file is re-read and only the changed entries are replaced, so
+        concurrent processes working on different devices don't overwrite
+        each other's state.
+        """
+        with self._lock:
+            if self.path is None or not self._changed:
+                return
+            if merge_entries(self.path, self._changed):
+                self._changed = {}
+
+
+def _read_entries(path: str) -> Dict[str, dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            entries = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(entries, dict):
+        return {}
+    return {key: entry for key, entry in entries.items() if isinstance(entry, dict)}
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """
+    Hold an exclusive lock on ``<path>.lock`` around a read-modify-write of a file.
+
+    Processes that re-read the file under this lock before replacing it
+    don't lose each other's changes. Creates the file's directory if needed.
+
+    Args:
+        path: File about to be read and replaced
+
+    Raises:
+        OSError: If the directory or the lock file cannot be created
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    lock_fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(lock_fd)
+
+
+def merge_entries(path: str, changed: Dict[str, Optional[dict]]) -> bool:
+    """
+    Replace some entries of a JSON object file, keeping the others.
+
+    The file is re-read under file_lock() and replaced atomically, so
+    processes updating different keys of the same file don't lose each
+    other's entries.
+
+    Args:
+        path: JSON file holding an object of entries
+        changed: Key -> new entry, or None to remove the key
+
+    Returns:
+        True if the file was written
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with file_lock(path):
+            entries = _read_entries(path)
+            for key, entry in changed.items():
+                if entry is None:
+                    entries.pop(key, None)
+                else:
+                    entries[key] = entry
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(entries, fh)
+            os.replace(tmp_path, path)
+        return True
+    except OSError:
+        # These files are optimizations; failing to persist them is not an error
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        return False
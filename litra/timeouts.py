@@ -0,0 +1,269 @@
+"""
+Adaptive read timeouts and end-to-end deadlines
+
+A status request normally gets its reply within a few milliseconds, so
+waiting a fixed second for a reply that was lost makes a single dropped
+report cost far more than asking again. Every light gets an RttEstimator
+holding its recent round-trip times; its read timeout is a multiple of
+their high percentile, clamped between a floor and a ceiling
+(LITRA_TIMEOUT_FLOOR_MS and LITRA_TIMEOUT_CEILING_MS). Until enough
+round trips have been seen the ceiling is used, so a slow light is never
+cut short on its first requests.
+
+As in TCP (Karn's algorithm), a reply that only arrived after a retry
+could answer either request, so it is not used as a sample; instead the
+timeout doubles until a request is answered on its first attempt.
+
+The CLI keeps the history between runs in rtt.json next to the state
+file, which makes the very first request of each invocation adaptive too.
+
+Author: RKaushik
+License: MIT
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+DEFAULT_FLOOR_MS = 20
+DEFAULT_CEILING_MS = 1000
+# Round trips remembered per light
+WINDOW = 32
+# Round trips needed before the timeout adapts
+MIN_SAMPLES = 5
+PERCENTILE = 99
+# Headroom over the high percentile, so ordinary jitter is not a timeout
+MULTIPLIER = 2.0
+# Retries of a status request whose reply was lost
+DEFAULT_RETRIES = 2
+# Largest factor the timeout is stretched by after lost replies
+MAX_BACKOFF = 64
+
+
+def _env_ms(name: str, default: int) -> int:
+    try:
+        value = int(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+def default_floor_ms() -> int:
+    """
+    Get the shortest read timeout.
+
+    Returns:
+        Value of LITRA_TIMEOUT_FLOOR_MS if set, otherwise DEFAULT_FLOOR_MS
+    """
+    return _env_ms('LITRA_TIMEOUT_FLOOR_MS', DEFAULT_FLOOR_MS)
+
+
+def default_ceiling_ms() -> int:
+    """
+    Get the longest read timeout, also used until a light has history.
+
+    Returns:
+        Value of LITRA_TIMEOUT_CEILING_MS if set, otherwise DEFAULT_CEILING_MS
+    """
+    return _env_ms('LITRA_TIMEOUT_CEILING_MS', DEFAULT_CEILING_MS)
+
+
+def default_rtt_path() -> str:
+    """
+    Get the path of the CLI round-trip history file.
+
+    Returns:
+        rtt.json in the directory of the state file (see litra.state)
+    """
+    from .state import default_state_path
+    return os.path.join(os.path.dirname(default_state_path()), 'rtt.json')
+
+
+def remaining_ms(deadline: Optional[float]) -> Optional[int]:
+    """
+    Get the time left before a deadline.
+
+    Args:
+        deadline: time.monotonic() value, or None for no deadline
+
+    Returns:
+        Whole milliseconds left (0 once the deadline has passed), or None
+    """
+    if deadline is None:
+        return None
+    return max(0, int((deadline - time.monotonic()) * 1000))
+
+
+class RttEstimator:
+    """Recent round-trip times of one light and the read timeout they suggest."""
+
+    __slots__ = ('_samples', '_backoff')
+
+    def __init__(self, samples: Iterable[float] = ()):
+        """
+        Initialize the estimator.
+
+        Args:
+            samples: Earlier round-trip times in milliseconds, oldest first
+        """
+        self._samples = deque(samples, maxlen=WINDOW)
+        self._backoff = 1
+
+    def observe(self, rtt_ms: float):
+        """
+        Remember the round-trip time of a request answered on its first attempt.
+
+        Args:
+            rtt_ms: Milliseconds from sending a request to its reply
+        """
+        self._samples.append(rtt_ms)
+        self._backoff = 1
+
+    def back_off(self):
+        """Double the timeout after a lost reply, until the next clean sample."""
+        self._backoff = min(self._backoff * 2, MAX_BACKOFF)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Get a percentile of the remembered round-trip times (nearest rank).
+
+        Args:
+            q: Percentile (0-100)
+
+        Returns:
+            Milliseconds, or None without samples
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+        return ordered[rank - 1]
+
+    def timeout_ms(self, floor_ms: int, ceiling_ms: int) -> int:
+        """
+        Get the read timeout for the next request.
+
+        Args:
+            floor_ms: Shortest timeout
+            ceiling_ms: Longest timeout, used until MIN_SAMPLES round trips were seen
+
+        Returns:
+            Milliseconds
+        """
+        if len(self._samples) < MIN_SAMPLES:
+            return ceiling_ms
+        timeout = max(math.ceil(self.percentile(PERCENTILE) * MULTIPLIER), floor_ms)
+        return min(timeout * self._backoff, ceiling_ms)
+
+    def samples(self) -> list:
+        """Remembered round-trip times in milliseconds, oldest first."""
+        return list(self._samples)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class RttTable:
+    """RttEstimators of all lights, keyed like the state cache."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the table.
+
+        Args:
+            path: JSON file to load the history from and save it to; None
+                keeps it in memory only
+        """
+        self.path = path
+        self._estimators: Dict[str, RttEstimator] = {}
+        self._changed = set()
+        self._loaded = path is None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        from .state import _read_entries
+        for key, entry in _read_entries(self.path).items():
+            samples = entry.get('rtt_ms')
+            if isinstance(samples, list) and all(isinstance(s, (int, float)) for s in samples):
+                self._estimators[key] = RttEstimator(samples)
+
+    def get(self, key: str) -> RttEstimator:
+        """
+        Get the estimator of a light, creating an empty one if needed.
+
+        Args:
+            key: Device key (LitraDevice.state_key())
+
+        Returns:
+            RttEstimator
+        """
+        with self._lock:
+            self._load()
+            estimator = self._estimators.get(key)
+            if estimator is None:
+                estimator = self._estimators[key] = RttEstimator()
+            return estimator
+
+    def observe(self, key: str, rtt_ms: float):
+        """
+        Remember one round-trip time of a light.
+
+        Args:
+            key: Device key (LitraDevice.state_key())
+            rtt_ms: Milliseconds from sending a request to its reply
+        """
+        estimator = self.get(key)
+        with self._lock:
+            estimator.observe(round(rtt_ms, 3))
+            self._changed.add(key)
+
+    def back_off(self, key: str):
+        """
+        Stretch the timeout of a light whose reply was lost.
+
+        Args:
+            key: Device key (LitraDevice.state_key())
+        """
+        estimator = self.get(key)
+        with self._lock:
+            estimator.back_off()
+
+    def save(self):
+        """Write the histories changed since the last save to the file."""
+        from .state import merge_entries
+        with self._lock:
+            if self.path is None or not self._changed:
+                return
+            changed = {key: {'rtt_ms': self._estimators[key].samples()} for key in self._changed}
+            if merge_entries(self.path, changed):
+                self._changed = set()
+
+
+_table = RttTable()
+
+
+def get_rtt_table() -> RttTable:
+    """
+    Get the process-wide round-trip table.
+
+    Returns:
+        Shared RttTable; in memory only unless persist() was called
+    """
+    return _table
+
+
+def persist(path: Optional[str] = None):
+    """
+    Load the process-wide table from a file and let save() write it back.
+
+    Args:
+        path: History file (default: default_rtt_path())
+    """
+    global _table
+    _table = RttTable(path or default_rtt_path())
@@ -0,0 +1,214 @@
+"""
+Smooth brightness and color temperature transitions
+
+A fade is precomputed as a compact frame array of (lumen, kelvin) pairs,
+with temperatures snapped to the device's 100 K steps, and then played
+out by a fixed-rate scheduler on the monotonic clock. Frames that are
+already a full period late are dropped rather than queued, so a slow
+device or a descheduled process never makes the fade run long; the final
+frame is always sent so the light ends at the requested target.
+
+Author: RKaushik
+License: MIT
+"""
+
+import time
+from array import array
+from typing import Callable, Optional
+
+from .commands import BRIGHTNESS_REPORTS, TEMPERATURE_REPORTS
+from .device import LitraDevice
+
+DEFAULT_FPS = 30.0
+MAX_FPS = 200.0
+
+TEMPERATURE_STEP = LitraDevice.TEMPERATURE_STEP
+
+
+def build_frames(start_lumen: int, end_lumen: int, start_kelvin: int, end_kelvin: int,
+                 duration: float, fps: float = DEFAULT_FPS) -> array:
+    """
+    Precompute the frames of a linear fade.
+
+    Args:
+        start_lumen: Brightness at the start of the fade
+        end_lumen: Brightness at the end of the fade
+        start_kelvin: Temperature at the start of the fade
+        end_kelvin: Temperature at the end of the fade
+        duration: Fade length in seconds
+        fps: Frames per second
+
+    Returns:
+        array('H') of interleaved lumen/kelvin values, two entries per frame;
+        frame i is the state at time (i + 1) / count of the fade, so the
+        start state (which the light already shows) is not a frame and the
+        last frame is the target
+    """
+    count = max(1, int(round(duration * fps)))
+    lumen_span = end_lumen - start_lumen
+    kelvin_span = end_kelvin - start_kelvin
+
+    frames = array('H', bytes(4 * count))
+    for i in range(count):
+        t = (i + 1) / count
+        frames[2 * i] = int(round(start_lumen + lumen_span * t))
+        kelvin = start_kelvin + kelvin_span * t
+        frames[2 * i + 1] = int(round(kelvin / TEMPERATURE_STEP)) * TEMPERATURE_STEP
+    return frames
+
+
+class FadeStats:
+    """Timing instrumentation collected while a fade plays out."""
+
+    __slots__ = ('fps', 'frames_total', 'frames_sent', 'frames_dropped', 'writes',
+                 'failed_writes', 'elapsed', 'jitter_mean', 'jitter_max')
+
+    def __init__(self, fps: float, frames_total: int):
+        self.fps = fps
+        self.frames_total = frames_total
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.writes = 0
+        self.failed_writes = 0
+        self.elapsed = 0.0
+        self.jitter_mean = 0.0
+        self.jitter_max = 0.0
+
+    @property
+    def achieved_fps(self) -> float:
+        """Frames actually sent per second over the fade's wall time."""
+        span = max(self.elapsed, self.frames_total / self.fps)
+        return self.frames_sent / span if span > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        """
+        Get the stats as a JSON-friendly dictionary.
+
+        Returns:
+            Dictionary of counters, with times in milliseconds
+        """
+        return {
+            'target_fps': self.fps,
+            'achieved_fps': round(self.achieved_fps, 2),
+            'frames_total': self.frames_total,
+            'frames_sent': self.frames_sent,
+            'frames_dropped': self.frames_dropped,
+            'writes': self.writes,
+            'failed_writes': self.failed_writes,
+            'elapsed_ms': round(self.elapsed * 1000.0, 3),
+            'jitter_mean_ms': round(self.jitter_mean * 1000.0, 3),
+            'jitter_max_ms': round(self.jitter_max * 1000.0, 3),
+        }
+
+
+def play_frames(device: LitraDevice, frames: array, fps: float = DEFAULT_FPS,
+                clock: Callable[[], float] = time.monotonic,
+                sleep: Callable[[float], None] = time.sleep) -> FadeStats:
+    """
+    Send precomputed frames to an open device at a fixed rate.
+
+    Frame i is due (i + 1) / fps after the start, the moment of the fade
+    it holds, so the target is sent when the full duration has passed.
+    Only values that differ from the previous frame are written.
+
+    Args:
+        device: Connected LitraDevice, reused for every frame
+        frames: Frame array from build_frames()
+        fps: Target frames per second
+        clock: Monotonic clock in seconds
+        sleep: Sleep function in seconds
+
+    Returns:
+        FadeStats for the run
+    """
+    count = len(frames) // 2
+    period = 1.0 / fps
+    stats = FadeStats(fps, count)
+    write = device.write
+    last_lumen = last_kelvin = None
+    jitter_total = 0.0
+
+    start = clock()
+    for i in range(count):
+        due = start + (i + 1) * period
+        now = clock()
+        if now < due:
+            sleep(due - now)
+            now = clock()
+        elif now - due >= period and i < count - 1:
+            stats.frames_dropped += 1
+            continue
+
+        lateness = now - due
+        jitter_total += lateness
+        if lateness > stats.jitter_max:
+            stats.jitter_max = lateness
+
+        lumen = frames[2 * i]
+        kelvin = frames[2 * i + 1]
+        if lumen != last_lumen:
+            if write(BRIGHTNESS_REPORTS[lumen]):
+                stats.writes += 1
+                last_lumen = lumen
+            else:
+                stats.failed_writes += 1
+        if kelvin != last_kelvin:
+            if write(TEMPERATURE_REPORTS[kelvin]):
+                stats.writes += 1
+                last_kelvin = kelvin
+            else:
+                stats.failed_writes += 1
+        stats.frames_sent += 1
+
+    stats.elapsed = clock() - start
+    if stats.frames_sent:
+        stats.jitter_mean = jitter_total / stats.frames_sent
+
+    if device.state_cache is not None and count:
+        if stats.failed_writes:
+            device.state_cache.invalidate(device.state_key())
+        else:
+            device.state_cache.update(device.state_key(), brightness_lumen=frames[-2],
+                                      temperature_kelvin=frames[-1])
+    return stats
+
+
+def fade(device: LitraDevice, brightness_lumen: Optional[int] = None,
+         temperature_kelvin: Optional[int] = None, duration: float = 1.0,
+         fps: float = DEFAULT_FPS) -> dict:
+    """
+    Fade an open device from its current state to a target.
+
+    Args:
+        device: Connected LitraDevice
+        brightness_lumen: Target brightness, or None to keep the current one
+        temperature_kelvin: Target temperature, or None to keep the current one
+        duration: Fade length in seconds
+        fps: Target frames per second
+
+    Returns:
+        Result dictionary with 'ok', the final 'brightness_lumen' and
+        'temperature_kelvin', and 'stats' from FadeStats.to_dict(), or 'error'
+    """
+    current = device.current_state()
+    if 'error' in current:
+        return {'ok': False, 'error': current['error']}
+
+    start_lumen = min(max(current['brightness_lumen'] or 0, LitraDevice.MIN_BRIGHTNESS_LUMEN),
+                      LitraDevice.MAX_BRIGHTNESS_LUMEN)
+    start_kelvin = min(max(current['temperature_kelvin'] or 0, LitraDevice.MIN_TEMPERATURE_KELVIN),
+                       LitraDevice.MAX_TEMPERATURE_KELVIN)
+    end_lumen = start_lumen if brightness_lumen is None else brightness_lumen
+    end_kelvin = start_kelvin if temperature_kelvin is None else temperature_kelvin
+
+    frames = build_frames(start_lumen, end_lumen, start_kelvin, end_kelvin, duration, fps)
+    stats = play_frames(device, frames, fps)
+    result = {
+        'ok': stats.failed_writes == 0,
+        'brightness_lumen': end_lumen,
+        'temperature_kelvin': end_kelvin,
+        'stats': stats.to_dict(),
+    }
+    if not result['ok']:
+        result['error'] = f"{stats.failed_writes} write(s) failed during fade"
+    return result
@@ -0,0 +1,178 @@
+"""
+Transport backends for Litra Glow communication
+
+A backend enumerates lights and opens transports to them. A transport is
+an open HID channel with the same duck-typed interface as ``hid.Device``:
+``write(data)``, ``read(size, timeout)``, ``close()`` and ``serial``.
+
+The default backend uses hidapi. Setting ``LITRA_BACKEND=emulator`` (or
+``emulator:N`` for N lights) switches every LitraDevice, find_litra_devices()
+and get_device() in the process to in-memory emulated lights, which is how
+benchmarks and CLI runs work on machines without a light attached.
+
+Author: RKaushik
+License: MIT
+"""
+
+import os
+import threading
+from typing import List, Optional
+
+
+class Transport:
+    """Interface of an open channel to one light."""
+
+    serial = None
+
+    def open(self):
+        """
+        Open the channel.
+
+        Raises:
+            OSError: If the light cannot be opened
+        """
+
+    def close(self):
+        """Close the channel."""
+
+    def write(self, data: bytes) -> int:
+        """
+        Send one output report.
+
+        Args:
+            data: Report bytes
+
+        Returns:
+            Number of bytes written
+
+        Raises:
+            OSError: If the write failed
+        """
+        raise NotImplementedError
+
+    def read(self, size: int, timeout: Optional[int] = None) -> bytes:
+        """
+        Wait for one input report.
+
+        Args:
+            size: Maximum number of bytes to return
+            timeout: Milliseconds to wait, None to wait forever
+
+        Returns:
+            Report bytes, or empty bytes if the timeout expired
+
+        Raises:
+            OSError: If the read failed
+        """
+        raise NotImplementedError
+
+
+class Backend:
+    """Interface of a source of lights."""
+
+    name = 'base'
+
+    def enumerate(self, vendor_id: int, product_id: int) -> List[dict]:
+        """
+        List attached HID interfaces.
+
+        Args:
+            vendor_id: USB vendor ID to match
+            product_id: USB product ID to match
+
+        Returns:
+            Dictionaries in the format of ``hid.enumerate()``
+        """
+        raise NotImplementedError
+
+    def open(self, path: Optional[bytes], vendor_id: int, product_id: int) -> Transport:
+        """
+        Open a transport.
+
+        Args:
+            path: Device path from enumerate(), or None for the first matching light
+            vendor_id: USB vendor ID to match when no path is given
+            product_id: USB product ID to match when no path is given
+
+        Returns:
+            Open transport
+
+        Raises:
+            OSError: If the light cannot be opened
+        """
+        raise NotImplementedError
+
+
+class HidBackend(Backend):
+    """Real USB HID lights through hidapi."""
+
+    name = 'hid'
+
+    def enumerate(self, vendor_id: int, product_id: int) -> List[dict]:
+        import hid
+        return hid.enumerate(vendor_id, product_id)
+
+    def open(self, path: Optional[bytes], vendor_id: int, product_id: int):
+        import hid
+        if path:
+            return hid.Device(path=path)
+        # Find and connect to first available Litra Glow
+        return hid.Device(vendor_id, product_id)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def backend_from_env() -> Backend:
+    """
+    Create the backend selected by the LITRA_BACKEND environment variable.
+
+    Returns:
+        HidBackend by default, or an EmulatorBackend for 'emulator[:N]',
+        playing the JSON script named by LITRA_EMULATOR_SCRIPT if set
+
+    Raises:
+        ValueError: If LITRA_BACKEND names an unknown backend
+    """
+    spec = os.environ.get('LITRA_BACKEND', 'hid')
+    name, _, arg = spec.partition(':')
+    if name == 'hid':
+        return HidBackend()
+    if name == 'emulator':
+        from .emulator import EmulatorBackend
+        backend = EmulatorBackend.create(int(arg) if arg else 1,
+                                         state_path=os.environ.get('LITRA_EMULATOR_STATE'))
+        script = os.environ.get('LITRA_EMULATOR_SCRIPT')
+        if script:
+            import json
+            with open(script, 'r', encoding='utf-8') as fh:
+                backend.play_script(json.load(fh))
+        return backend
+    raise ValueError(f"Unknown LITRA_BACKEND '{spec}'")
+
+
+def get_backend() -> Backend:
+    """
+    Get the process-wide backend, creating it from the environment on first use.
+
+    Returns:
+        Current backend
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = backend_from_env()
+        return _backend
+
+
+def set_backend(backend: Optional[Backend]):
+    """
+    Replace the process-wide backend.
+
+    Args:
+        backend: New backend, or None to re-read LITRA_BACKEND on next use
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
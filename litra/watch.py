@@ -0,0 +1,170 @@
+"""
+Change-only status streaming with adaptive polling
+
+StatusWatcher keeps one connection per light open and polls its status on
+a worker thread per light. An event is produced only when power,
+brightness or temperature differs from the previous sample. While a
+light is idle its poll interval grows geometrically up to a ceiling, and
+it drops back to the floor as soon as a change is seen, so an idle light
+costs almost nothing and an active one is tracked closely.
+
+Author: RKaushik
+License: MIT
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Iterator, List, Optional
+
+from .device import LitraDevice
+from .state import FIELDS
+
+DEFAULT_MIN_INTERVAL = 0.25
+DEFAULT_MAX_INTERVAL = 5.0
+DEFAULT_BACKOFF = 1.5
+
+
+class AdaptiveInterval:
+    """Poll interval that backs off while nothing changes."""
+
+    def __init__(self, min_interval: float = DEFAULT_MIN_INTERVAL,
+                 max_interval: float = DEFAULT_MAX_INTERVAL, backoff: float = DEFAULT_BACKOFF):
+        """
+        Initialize the interval at its floor.
+
+        Args:
+            min_interval: Seconds between polls right after a change
+            max_interval: Ceiling for the interval while idle
+            backoff: Factor applied to the interval after every unchanged poll
+        """
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Intervals must satisfy 0 < min_interval <= max_interval")
+        if backoff < 1.0:
+            raise ValueError("Backoff factor must be at least 1")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.current = min_interval
+
+    def changed(self) -> float:
+        """Tighten back to the floor after a change. Returns the new interval."""
+        self.current = self.min_interval
+        return self.current
+
+    def idle(self) -> float:
+        """Back off after an unchanged poll. Returns the new interval."""
+        self.current = min(self.current * self.backoff, self.max_interval)
+        return self.current
+
+
+class StatusWatcher:
+    """Streams status changes of one or more connected lights."""
+
+    def __init__(self, devices: List[LitraDevice], min_interval: float = DEFAULT_MIN_INTERVAL,
+                 max_interval: float = DEFAULT_MAX_INTERVAL, backoff: float = DEFAULT_BACKOFF,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize a stopped watcher.
+
+        Args:
+            devices: Connected devices to watch
+            min_interval: Seconds between polls right after a change
+            max_interval: Ceiling for the poll interval while a light is idle
+            backoff: Factor applied to the interval after every unchanged poll
+            clock: Wall-clock source for event timestamps
+        """
+        AdaptiveInterval(min_interval, max_interval, backoff)  # Validate once up front
+        self.devices = list(devices)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.clock = clock
+        self.polls = 0
+        self._polls_lock = threading.Lock()
+        self._events = queue.Queue()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Start one polling thread per device."""
+        self._stop.clear()
+        for device in self.devices:
+            thread = threading.Thread(target=self._poll_loop, args=(device,),
+                                      name=f"litra-watch-{device.state_key()}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Stop polling and wait for the threads to exit."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def events(self, duration: Optional[float] = None) -> Iterator[dict]:
+        """
+        Yield change events as they happen.
+
+        The first sample of every light is always reported. Each event has
+        'time', 'serial_number', 'power', 'brightness_lumen',
+        'temperature_kelvin' and 'changed' (the fields that differ from the
+        previous sample). A light that stops answering produces one event
+        with 'error', and a fresh full event once it answers again.
+
+        Args:
+            duration: Stop after this many seconds; None runs until stop()
+
+        Yields:
+            Event dictionaries
+        """
+        deadline = None if duration is None else time.monotonic() + duration
+        while not self._stop.is_set():
+            timeout = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if timeout <= 0:
+                return
+            try:
+                yield self._events.get(timeout=timeout)
+            except queue.Empty:
+                if self._threads and not any(thread.is_alive() for thread in self._threads):
+                    return
+
+    def _poll_loop(self, device: LitraDevice):
+        interval = AdaptiveInterval(self.min_interval, self.max_interval, self.backoff)
+        serial = device.state_key()
+        last = None
+        failing = False
+        while not self._stop.is_set():
+            status = device.query_status()
+            with self._polls_lock:
+                self.polls += 1
+            if 'error' in status:
+                if not failing:
+                    self._events.put({'time': self.clock(), 'serial_number': serial,
+                                      'error': status['error']})
+                    failing = True
+                    last = None
+                # Reopen in case the light was unplugged and plugged back in,
+                # and poll again right away if that worked
+                device.disconnect()
+                wait = interval.changed() if device.connect() else interval.idle()
+            else:
+                failing = False
+                changed = [field for field in FIELDS if last is None or status[field] != last[field]]
+                if changed:
+                    event = {'time': self.clock(), 'serial_number': serial}
+                    event.update(status)
+                    event['changed'] = changed
+                    self._events.put(event)
+                    wait = interval.changed()
+                else:
+                    wait = interval.idle()
+                last = status
+            self._stop.wait(wait)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
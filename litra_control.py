@@ -9,24 +9,15 @@ Author: RKaushik
 License: MIT
 """
 
+import os
 import sys
-import argparse
-from typing import Optional
-
-from litra import (
-    get_device,
-    find_litra_devices,
-    turn_on_command,
-    turn_off_command,
-    get_status_command,
-    set_brightness_command,
-    set_temperature_command,
-    parse_status_response,
-    validate_brightness,
-    validate_temperature,
-    percentage_to_lumen,
-    format_status
-)
+from typing import Optional, Tuple
+
+# Only light modules are imported here: the device layer, json and argparse
+# are loaded on first use so --help, argument errors and validation failures
+# stay cheap (see --import-times).
+from litra.utils import validate_brightness, percentage_to_lumen, format_status
+from litra.batch import parse_batch, parse_command, parse_adjustment, BatchError
 
 
 # Exit codes
@@ -36,188 +27,993 @@ EXIT_INVALID_PARAMETER = 2
 EXIT_COMMUNICATION_ERROR = 3
 
 
-def cmd_on() -> int:
-    """Turn the light on."""
-    device = get_device()
-    if not device:
-        print("Error: Litra Glow device not found. Please check USB connection.", file=sys.stderr)
-        return EXIT_DEVICE_NOT_FOUND
+# Shadow state TTL from --state-ttl; None means $LITRA_STATE_TTL or the default
+STATE_TTL: Optional[float] = None
+
+# Device lock wait from --lock-timeout; None means $LITRA_LOCK_TIMEOUT or the default
+LOCK_TIMEOUT: Optional[float] = None
+
+# time.monotonic() by which the command must be done, from --deadline-ms or
+# $LITRA_DEADLINE_MS; None means no overall deadline
+DEADLINE: Optional[float] = None
+
+
+def _state_cache():
+    """Open the shadow state cache shared by CLI invocations."""
+    from litra import timeouts
+    from litra.state import StateCache, default_state_path, default_ttl
+    if timeouts.get_rtt_table().path is None:
+        # Keep each light's round-trip history between runs; main() saves it
+        timeouts.persist()
+    return StateCache(default_state_path(), default_ttl() if STATE_TTL is None else STATE_TTL)
+
+
+def _within_deadline(seconds: float) -> float:
+    """Cut a wait in seconds to what is left before DEADLINE."""
+    if DEADLINE is None:
+        return seconds
+    import time
+    return max(0.0, min(seconds, DEADLINE - time.monotonic()))
+
+
+def _lock_timeout() -> Optional[float]:
+    """Lock wait from --lock-timeout, cut to what is left before DEADLINE."""
+    if DEADLINE is None:
+        return LOCK_TIMEOUT
+    from litra.locks import default_timeout
+    return _within_deadline(default_timeout() if LOCK_TIMEOUT is None else LOCK_TIMEOUT)
+
+
+def _device_not_found() -> int:
+    """Report a light that could not be opened, telling a missed deadline apart."""
+    if DEADLINE is not None and _within_deadline(1.0) == 0:
+        print("Error: Deadline exceeded before the light could be opened", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR
+    print("Error: Litra Glow device not found. Please check USB connection.", file=sys.stderr)
+    return EXIT_DEVICE_NOT_FOUND
+
+
+def _daemon_request(command: str, value: Optional[int] = None) -> Optional[dict]:
+    """
+    Forward a command to litrad if it is running.
+
+    Returns:
+        Reply dictionary, or None if the command should go directly to the device
+    """
+    if os.environ.get('LITRA_NO_DAEMON'):
+        return None
+    from litra.daemon import send_request
+    # A zero socket timeout would make the socket non-blocking
+    return send_request(command, value, timeout=max(_within_deadline(5.0), 0.001))
+
+
+def _daemon_error(reply: dict) -> int:
+    """Print a failed daemon reply and return its exit code."""
+    print(f"Error: {reply['error']}", file=sys.stderr)
+    return reply.get('exit_code', EXIT_COMMUNICATION_ERROR)
+
+
+def _execute(command: str, value: Optional[int] = None) -> Tuple[int, Optional[dict]]:
+    """
+    Run one command through litrad if it is running, otherwise directly on the device.
+    
+    Errors are printed to stderr.
     
+    Returns:
+        Tuple of (exit_code, result); result is None if the command failed
+    """
+    reply = _daemon_request(command, value)
+    if reply is not None:
+        if not reply['ok']:
+            return _daemon_error(reply), None
+        return EXIT_SUCCESS, reply
+    
+    from litra.locks import LockTimeout, locked_device
+    cache = _state_cache()
     try:
-        with device:
-            if device.write(turn_on_command()):
-                print("Light turned ON")
-                return EXIT_SUCCESS
-            else:
-                print("Error: Failed to send command to device", file=sys.stderr)
-                return EXIT_COMMUNICATION_ERROR
+        with locked_device(timeout=LOCK_TIMEOUT, deadline=DEADLINE) as device:
+            if not device:
+                return _device_not_found(), None
+            try:
+                device.state_cache = cache
+                result = device.execute(command, value)
+            finally:
+                # Save before unlocking so the next process sees this state
+                cache.save()
+    except LockTimeout as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR, None
     except Exception as e:
         print(f"Error: Communication failed - {e}", file=sys.stderr)
-        return EXIT_COMMUNICATION_ERROR
+        return EXIT_COMMUNICATION_ERROR, None
+    
+    if not result['ok']:
+        print(f"Error: {result['error']}", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR, None
+    return EXIT_SUCCESS, result
+
+
+def cmd_on() -> int:
+    """Turn the light on."""
+    exit_code, result = _execute('on')
+    if result:
+        print("Light turned ON")
+    return exit_code
 
 
 def cmd_off() -> int:
     """Turn the light off."""
-    device = get_device()
-    if not device:
-        print("Error: Litra Glow device not found. Please check USB connection.", file=sys.stderr)
-        return EXIT_DEVICE_NOT_FOUND
-    
-    try:
-        with device:
-            if device.write(turn_off_command()):
-                print("Light turned OFF")
-                return EXIT_SUCCESS
-            else:
-                print("Error: Failed to send command to device", file=sys.stderr)
-                return EXIT_COMMUNICATION_ERROR
-    except Exception as e:
-        print(f"Error: Communication failed - {e}", file=sys.stderr)
-        return EXIT_COMMUNICATION_ERROR
+    exit_code, result = _execute('off')
+    if result:
+        print("Light turned OFF")
+    return exit_code
 
 
 def cmd_toggle() -> int:
     """Toggle the light on/off."""
-    device = get_device()
-    if not device:
-        print("Error: Litra Glow device not found. Please check USB connection.", file=sys.stderr)
-        return EXIT_DEVICE_NOT_FOUND
-    
-    try:
-        with device:
-            # Get current status
-            if not device.write(get_status_command()):
-                print("Error: Failed to get device status", file=sys.stderr)
-                return EXIT_COMMUNICATION_ERROR
-            
-            response = device.read()
-            if not response:
-                print("Error: Failed to read device status", file=sys.stderr)
-                return EXIT_COMMUNICATION_ERROR
-            
-            status = parse_status_response(response)
-            if 'error' in status:
-                print(f"Error: {status['error']}", file=sys.stderr)
-                return EXIT_COMMUNICATION_ERROR
-            
-            # Toggle based on current state
-            if status['power'] == 'on':
-                command = turn_off_command()
-                new_state = "OFF"
-            else:
-                command = turn_on_command()
-                new_state = "ON"
-            
-            if device.write(command):
-                print(f"Light toggled {new_state}")
-                return EXIT_SUCCESS
-            else:
-                print("Error: Failed to send command to device", file=sys.stderr)
-                return EXIT_COMMUNICATION_ERROR
-    except Exception as e:
-        print(f"Error: Communication failed - {e}", file=sys.stderr)
-        return EXIT_COMMUNICATION_ERROR
+    exit_code, result = _execute('toggle')
+    if result:
+        print(f"Light toggled {result['power'].upper()}")
+    return exit_code
 
 
 def cmd_brightness(value: str, is_percentage: bool = False) -> int:
-    """Set the brightness."""
+    """Set the brightness, or change it relative to the current value (+N/-N)."""
     try:
         brightness_value = int(value)
     except ValueError:
         print(f"Error: Invalid brightness value '{value}'. Must be an integer.", file=sys.stderr)
         return EXIT_INVALID_PARAMETER
     
-    # Convert percentage to lumens if needed
-    if is_percentage:
+    if value.strip()[0] in '+-':
+        command, brightness_value = parse_adjustment('brightness', brightness_value, is_percentage)
+    elif is_percentage:
+        # Convert percentage to lumens if needed
         if brightness_value < 0 or brightness_value > 100:
             print("Error: Brightness percentage must be between 0 and 100", file=sys.stderr)
             return EXIT_INVALID_PARAMETER
+        command = 'brightness'
         brightness_lumen = percentage_to_lumen(brightness_value)
         print(f"Setting brightness to {brightness_value}% ({brightness_lumen} lumens)")
+        brightness_value = brightness_lumen
     else:
-        brightness_lumen = brightness_value
-        is_valid, error_msg = validate_brightness(brightness_lumen)
+        command = 'brightness'
+        is_valid, error_msg = validate_brightness(brightness_value)
         if not is_valid:
             print(f"Error: {error_msg}", file=sys.stderr)
             return EXIT_INVALID_PARAMETER
     
-    device = get_device()
-    if not device:
+    exit_code, result = _execute(command, brightness_value)
+    if result:
+        print(f"Brightness set to {result['brightness_lumen']} lumens")
+    return exit_code
+
+
+def cmd_temperature(value: str) -> int:
+    """Set the color temperature, or change it relative to the current value (+N/-N)."""
+    try:
+        temperature = int(value)
+    except ValueError:
+        print(f"Error: Invalid temperature value '{value}'. Must be an integer.", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    
+    try:
+        if value.strip()[0] in '+-':
+            command, temperature = parse_adjustment('temperature', temperature)
+        else:
+            command, temperature = parse_command(f"temperature {temperature}")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    
+    exit_code, result = _execute(command, temperature)
+    if result:
+        print(f"Temperature set to {result['temperature_kelvin']}K")
+    return exit_code
+
+
+def cmd_status() -> int:
+    """Get the current device status."""
+    exit_code, result = _execute('status')
+    if result:
+        print(format_status(result['status']))
+    return exit_code
+
+
+def _daemon_batch(commands: list, keep_going: bool) -> Optional[list]:
+    """
+    Run batch commands over a single litrad connection if it is running.
+    
+    Returns:
+        List of result dictionaries, or None if no daemon is running
+    """
+    if os.environ.get('LITRA_NO_DAEMON'):
+        return None
+    from litra.daemon import DaemonClient
+    try:
+        client = DaemonClient()
+    except OSError:
+        return None
+    
+    results = []
+    with client:
+        for command, value in commands:
+            result = {'command': command}
+            if value is not None:
+                result['value'] = value
+            try:
+                result.update(client.request(command, value))
+            except (OSError, ValueError) as e:
+                result.update({'ok': False, 'error': f"Daemon request failed - {e}",
+                               'exit_code': EXIT_COMMUNICATION_ERROR})
+            results.append(result)
+            if not result['ok'] and not keep_going:
+                break
+    return results
+
+
+def cmd_batch(source: str = '-', keep_going: bool = False) -> int:
+    """Run a script of commands over one device session."""
+    try:
+        if source == '-':
+            commands = parse_batch(sys.stdin)
+        else:
+            with open(source, 'r', encoding='utf-8') as fh:
+                commands = parse_batch(fh)
+    except BatchError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    except OSError as e:
+        print(f"Error: Cannot read batch file - {e}", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    
+    if not commands:
+        return EXIT_SUCCESS
+    
+    results = _daemon_batch(commands, keep_going)
+    if results is None:
+        from litra.locks import LockTimeout, locked_device
+        cache = _state_cache()
+        try:
+            with locked_device(timeout=LOCK_TIMEOUT, deadline=DEADLINE) as device:
+                if not device:
+                    return _device_not_found()
+                try:
+                    device.state_cache = cache
+                    results = device.execute_many(commands, stop_on_error=not keep_going)
+                finally:
+                    cache.save()
+        except LockTimeout as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return EXIT_COMMUNICATION_ERROR
+        except Exception as e:
+            print(f"Error: Communication failed - {e}", file=sys.stderr)
+            return EXIT_COMMUNICATION_ERROR
+    
+    import json
+    exit_code = EXIT_SUCCESS
+    for result in results:
+        failure_code = result.pop('exit_code', EXIT_COMMUNICATION_ERROR)
+        if not result['ok'] and exit_code == EXIT_SUCCESS:
+            exit_code = failure_code
+        print(json.dumps(result))
+    return exit_code
+
+
+def _describe_result(result: dict) -> str:
+    """Summarize one device's result for the table output."""
+    if not result['ok']:
+        return result.get('error', 'failed')
+    if 'results' in result:
+        return f"{len(result['results'])} command(s) ok"
+    if 'stats' in result:
+        return _describe_fade(result)
+    if 'scene' in result:
+        return f"scene {result['scene']}: {result['sent']} sent, {result['unchanged']} unchanged"
+    status = result.get('status')
+    if status:
+        parts = [f"power={status['power']}"]
+        if status.get('brightness_lumen'):
+            parts.append(f"brightness={status['brightness_lumen']}lm")
+        if status.get('temperature_kelvin'):
+            parts.append(f"temperature={status['temperature_kelvin']}K")
+        return " ".join(parts)
+    if 'power' in result:
+        return f"power={result['power']}"
+    if 'brightness_lumen' in result:
+        return f"brightness={result['brightness_lumen']}lm"
+    if 'temperature_kelvin' in result:
+        return f"temperature={result['temperature_kelvin']}K"
+    return "ok"
+
+
+def _run_on_selected(action, serials: Optional[list], timeout: float, as_json: bool) -> int:
+    """
+    Open the selected devices in parallel and apply an action to each.
+    
+    Args:
+        action: Called with each connected LitraDevice; returns a result dictionary
+        serials: Serial numbers to select, or None for every device
+        timeout: Per-device timeout in seconds
+        as_json: Print JSON lines instead of a table
+    """
+    from functools import partial
+    from litra.fanout import select_devices, run_parallel
+    from litra.device import find_litra_devices
+    from litra.locks import device_lock
+    
+    selected = select_devices(find_litra_devices(), serials)
+    missing = []
+    if serials:
+        found = {info['serial_number'] for info in selected}
+        missing = [serial for serial in dict.fromkeys(serials) if serial not in found]
+    
+    if not selected and not missing:
         print("Error: Litra Glow device not found. Please check USB connection.", file=sys.stderr)
         return EXIT_DEVICE_NOT_FOUND
     
+    cache = _state_cache()
+    
+    def run(device):
+        # run_parallel() has set a deadline within DEADLINE already
+        device.state_cache = cache
+        try:
+            return action(device)
+        finally:
+            cache.save()
+    
+    results = run_parallel(selected, run, timeout=_within_deadline(timeout),
+                           lock_factory=partial(device_lock, timeout=_lock_timeout()))
+    results.extend({'serial_number': serial, 'ok': False, 'error': "Device not found"}
+                   for serial in missing)
+    
+    if as_json:
+        import json
+        for result in results:
+            print(json.dumps(result))
+    else:
+        print(f"{'SERIAL':<20} {'RESULT':<7} {'TIME':>9}  DETAIL")
+        for result in results:
+            elapsed = f"{result['elapsed_ms']:.1f} ms" if 'elapsed_ms' in result else "-"
+            outcome = "ok" if result['ok'] else "FAILED"
+            print(f"{result['serial_number']:<20} {outcome:<7} {elapsed:>9}  {_describe_result(result)}")
+    
+    if missing:
+        return EXIT_DEVICE_NOT_FOUND
+    if not all(result['ok'] for result in results):
+        return EXIT_COMMUNICATION_ERROR
+    return EXIT_SUCCESS
+
+
+def cmd_fanout(commands: list, serials: Optional[list] = None, timeout: float = 5.0,
+               as_json: bool = False, keep_going: bool = False) -> int:
+    """Apply commands to several devices in parallel."""
+    def action(device):
+        if len(commands) == 1:
+            return device.execute(*commands[0])
+        results = device.execute_many(commands, stop_on_error=not keep_going)
+        return {'ok': all(result['ok'] for result in results), 'results': results}
+    
+    return _run_on_selected(action, serials, timeout, as_json)
+
+
+def _fade_targets(brightness: Optional[str], temperature: Optional[str], is_percentage: bool,
+                  duration: float, fps: float) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Validate fade arguments.
+    
+    Returns:
+        Tuple of (brightness_lumen, temperature_kelvin), either may be None
+        
+    Raises:
+        ValueError: If an argument is invalid
+    """
+    from litra.transitions import MAX_FPS
+    
+    if brightness is None and temperature is None:
+        raise ValueError("Specify --brightness and/or --temperature to fade to")
+    if duration <= 0:
+        raise ValueError("Duration must be greater than 0")
+    if fps <= 0 or fps > MAX_FPS:
+        raise ValueError(f"Frame rate must be between 0 and {MAX_FPS:g} fps")
+    
+    brightness_lumen = temperature_kelvin = None
+    if brightness is not None:
+        _, brightness_lumen = parse_command(f"brightness {brightness}" + (" -p" if is_percentage else ""))
+    if temperature is not None:
+        _, temperature_kelvin = parse_command(f"temperature {temperature}")
+    return brightness_lumen, temperature_kelvin
+
+
+def _describe_fade(result: dict) -> str:
+    stats = result['stats']
+    return (f"{result['brightness_lumen']} lumens, {result['temperature_kelvin']}K in "
+            f"{stats['elapsed_ms'] / 1000.0:.2f}s: {stats['frames_sent']}/{stats['frames_total']} frames "
+            f"({stats['frames_dropped']} dropped), {stats['achieved_fps']:.1f} fps, "
+            f"jitter mean {stats['jitter_mean_ms']:.2f} ms / max {stats['jitter_max_ms']:.2f} ms")
+
+
+def cmd_fade(brightness: Optional[str], temperature: Optional[str], is_percentage: bool = False,
+             duration: float = 1.0, fps: float = 30.0, as_json: bool = False) -> int:
+    """Fade brightness and/or temperature smoothly to a target."""
+    from litra.transitions import fade
+    
     try:
-        with device:
-            if device.write(set_brightness_command(brightness_lumen)):
-                print(f"Brightness set to {brightness_lumen} lumens")
-                return EXIT_SUCCESS
-            else:
-                print("Error: Failed to send command to device", file=sys.stderr)
-                return EXIT_COMMUNICATION_ERROR
+        brightness_lumen, temperature_kelvin = _fade_targets(brightness, temperature,
+                                                             is_percentage, duration, fps)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    
+    from litra.locks import LockTimeout, locked_device
+    cache = _state_cache()
+    try:
+        with locked_device(timeout=LOCK_TIMEOUT, deadline=DEADLINE) as device:
+            if not device:
+                return _device_not_found()
+            try:
+                device.state_cache = cache
+                result = fade(device, brightness_lumen, temperature_kelvin, duration, fps)
+            finally:
+                cache.save()
+    except LockTimeout as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR
     except Exception as e:
         print(f"Error: Communication failed - {e}", file=sys.stderr)
         return EXIT_COMMUNICATION_ERROR
+    
+    if as_json:
+        import json
+        print(json.dumps(result))
+    elif result['ok']:
+        print(f"Faded to {_describe_fade(result)}")
+    if not result['ok']:
+        print(f"Error: {result['error']}", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR
+    return EXIT_SUCCESS
 
 
-def cmd_temperature(value: str) -> int:
-    """Set the color temperature."""
+def _connect_selected(serials: Optional[list], select_all: bool) -> list:
+    """Connect to the lights chosen by --all/--serial, or to the first light."""
+    from litra.device import LitraDevice, find_litra_devices, get_device
+    
+    if not (select_all or serials):
+        device = get_device()
+        return [device] if device else []
+    
+    from litra.fanout import select_devices
+    devices = []
+    for info in select_devices(find_litra_devices(), None if select_all else serials):
+        device = LitraDevice(info['path'], info['serial_number'])
+        if device.connect():
+            devices.append(device)
+    return devices
+
+
+def cmd_watch(serials: Optional[list] = None, select_all: bool = False,
+              interval: float = 0.25, max_interval: float = 5.0,
+              duration: Optional[float] = None) -> int:
+    """
+    Stream status changes as JSON lines until interrupted.
+    
+    Args:
+        serials: Serial numbers of the lights to watch
+        select_all: Watch every connected light
+        interval: Poll interval right after a change, in seconds
+        max_interval: Poll interval ceiling while a light is idle
+        duration: Stop after this many seconds; None runs until Ctrl-C
+    """
+    import json
+    from litra.watch import StatusWatcher
+    
+    if interval <= 0 or max_interval < interval:
+        print("Error: --interval must be positive and not above --max-interval", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    
+    devices = _connect_selected(serials, select_all)
+    if not devices:
+        print("Error: Litra Glow device not found. Please check USB connection.", file=sys.stderr)
+        return EXIT_DEVICE_NOT_FOUND
+    
+    watcher = StatusWatcher(devices, interval, max_interval)
     try:
-        temperature = int(value)
-    except ValueError:
-        print(f"Error: Invalid temperature value '{value}'. Must be an integer.", file=sys.stderr)
+        with watcher:
+            for event in watcher.events(duration):
+                print(json.dumps(event), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for device in devices:
+            device.disconnect()
+    return EXIT_SUCCESS
+
+
+def cmd_schedule(curve_path: str, serials: Optional[list] = None, select_all: bool = False,
+                 show: bool = False, tick: float = 1.0, duration: Optional[float] = None,
+                 as_json: bool = False) -> int:
+    """
+    Drive lights from a daylight curve until interrupted.
+    
+    Args:
+        curve_path: JSON day curve file
+        serials: Serial numbers of the lights to drive
+        select_all: Drive every connected light
+        show: Print the compiled schedule instead of running it
+        tick: Scheduler resolution in seconds
+        duration: Stop after this many seconds; None runs until Ctrl-C
+        as_json: Print every applied change as a JSON line
+    """
+    from litra.schedule import ScheduleRunner, load_curve
+    
+    try:
+        table = load_curve(curve_path)
+    except OSError as e:
+        print(f"Error: Cannot read curve file - {e}", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    except ValueError as e:
+        print(f"Error: Invalid curve - {e}", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    if tick <= 0:
+        print("Error: --tick must be positive", file=sys.stderr)
         return EXIT_INVALID_PARAMETER
     
-    is_valid, error_msg = validate_temperature(temperature)
-    if not is_valid:
-        print(f"Error: {error_msg}", file=sys.stderr)
+    if show:
+        for minute, lumen, kelvin in table.changes():
+            values = [f"{lumen} lumens" if lumen else None, f"{kelvin}K" if kelvin else None]
+            print(f"{minute // 60:02d}:{minute % 60:02d}  {', '.join(v for v in values if v)}")
+        return EXIT_SUCCESS
+    
+    devices = _connect_selected(serials, select_all)
+    if not devices:
+        print("Error: Litra Glow device not found. Please check USB connection.", file=sys.stderr)
+        return EXIT_DEVICE_NOT_FOUND
+    
+    cache = _state_cache()
+    
+    def report(device, minute, lumen, kelvin):
+        if as_json:
+            import json
+            print(json.dumps({'time': f"{minute // 60:02d}:{minute % 60:02d}",
+                              'serial_number': device.state_key(),
+                              'brightness_lumen': lumen or None,
+                              'temperature_kelvin': kelvin or None}), flush=True)
+        else:
+            print(f"{minute // 60:02d}:{minute % 60:02d} {device.state_key()}: "
+                  f"{lumen} lumens, {kelvin}K", flush=True)
+        cache.save()
+    
+    runner = ScheduleRunner(tick, on_apply=report)
+    for device in devices:
+        device.state_cache = cache
+        runner.add(device, table)
+    try:
+        runner.run(duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cache.save()
+        for device in devices:
+            device.disconnect()
+    return EXIT_COMMUNICATION_ERROR if runner.stats.failed_writes else EXIT_SUCCESS
+
+
+def cmd_auto(source: str = '-', serial: Optional[str] = None, curve: Optional[list] = None,
+             smoothing: float = 0.2, hysteresis: float = 0.1, max_rate: float = 2.0,
+             duration: Optional[float] = None, as_json: bool = False) -> int:
+    """
+    Track ambient light: set the brightness from a stream of lux readings until end of input.
+    
+    Args:
+        source: '-' for stdin, or a FIFO or file with one reading per line
+        serial: Serial number of the light to drive (default: the first light)
+        curve: 'LUX:PERCENT' points; the default curve if omitted
+        smoothing: EMA weight of each new reading
+        hysteresis: Relative lux change needed before the target moves
+        max_rate: Maximum brightness writes per second
+        duration: Stop after this many seconds; None runs until end of input or Ctrl-C
+        as_json: Print every write as a JSON line
+    """
+    import time
+    from litra.auto import DEFAULT_CURVE, AutoBrightness, LuxTable, open_source, parse_curve, run
+    
+    try:
+        table = LuxTable(parse_curve(curve) if curve else DEFAULT_CURVE)
+        fd = open_source(source)
+    except ValueError as e:
+        print(f"Error: Invalid curve - {e}", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    except OSError as e:
+        print(f"Error: Cannot open {source} - {e}", file=sys.stderr)
         return EXIT_INVALID_PARAMETER
     
-    device = get_device()
-    if not device:
+    devices = _connect_selected([serial] if serial else None, False)
+    if not devices:
         print("Error: Litra Glow device not found. Please check USB connection.", file=sys.stderr)
         return EXIT_DEVICE_NOT_FOUND
+    device = devices[0]
+    cache = _state_cache()
+    device.state_cache = cache
+    
+    def report(lux, lumen):
+        if as_json:
+            import json
+            print(json.dumps({'time': round(time.time(), 3), 'lux': round(lux, 1),
+                              'brightness_lumen': lumen}), flush=True)
+        else:
+            print(f"{time.strftime('%H:%M:%S')} {lux:.1f} lux -> {lumen} lumens", flush=True)
     
     try:
-        with device:
-            if device.write(set_temperature_command(temperature)):
-                print(f"Temperature set to {temperature}K")
-                return EXIT_SUCCESS
-            else:
-                print("Error: Failed to send command to device", file=sys.stderr)
-                return EXIT_COMMUNICATION_ERROR
+        controller = AutoBrightness(device, table, smoothing, hysteresis, max_rate, on_write=report)
+    except ValueError as e:
+        device.disconnect()
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    try:
+        run(controller, fd, duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cache.save()
+        device.disconnect()
+        if source != '-':
+            os.close(fd)
+    
+    stats = controller.stats
+    print(f"{stats.readings} readings ({stats.invalid} invalid), {stats.writes} writes, "
+          f"{stats.suppressed} suppressed ({stats.suppressed_hysteresis} within hysteresis, "
+          f"{stats.suppressed_unchanged} same brightness, {stats.suppressed_rate} rate-limited), "
+          f"{stats.failed_writes} failed", file=sys.stderr)
+    return EXIT_COMMUNICATION_ERROR if stats.failed_writes else EXIT_SUCCESS
+
+
+def _describe_scene(scene) -> str:
+    parts = []
+    if scene.power is not None:
+        parts.append(f"power={scene.power}")
+    if scene.brightness_lumen is not None:
+        parts.append(f"brightness={scene.brightness_lumen}lm")
+    if scene.temperature_kelvin is not None:
+        parts.append(f"temperature={scene.temperature_kelvin}K")
+    return " ".join(parts)
+
+
+def cmd_scene_save(name: str, power: Optional[str] = None, brightness: Optional[str] = None,
+                   is_percentage: bool = False, temperature: Optional[str] = None) -> int:
+    """
+    Save a scene from the given values, or from the light's current state if none are given.
+    """
+    from litra.scenes import SceneStore, make_scene
+    
+    try:
+        brightness_lumen = temperature_kelvin = None
+        if brightness is not None:
+            _, brightness_lumen = parse_command(f"brightness {brightness}" + (" -p" if is_percentage else ""))
+        if temperature is not None:
+            _, temperature_kelvin = parse_command(f"temperature {temperature}")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    
+    if power is None and brightness_lumen is None and temperature_kelvin is None:
+        # Capture whatever the light is showing right now
+        exit_code, result = _execute('status')
+        if not result:
+            return exit_code
+        status = result['status']
+        power = status['power']
+        brightness_lumen = status['brightness_lumen']
+        temperature_kelvin = status['temperature_kelvin']
+    
+    try:
+        scene = make_scene(name, power, brightness_lumen, temperature_kelvin)
+        with SceneStore() as store:
+            store.save(scene)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    except OSError as e:
+        print(f"Error: Cannot write scene file - {e}", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR
+    print(f"Saved scene '{name}': {_describe_scene(scene)}")
+    return EXIT_SUCCESS
+
+
+def _load_scene(name: str):
+    """Look up a scene, printing an error if it cannot be found."""
+    from litra.scenes import SceneStore
+    
+    try:
+        with SceneStore() as store:
+            scene = store.get(name)
+    except (OSError, ValueError) as e:
+        print(f"Error: Cannot read scene file - {e}", file=sys.stderr)
+        return None
+    if scene is None:
+        print(f"Error: Unknown scene '{name}'", file=sys.stderr)
+    return scene
+
+
+def cmd_scene_apply(name: str, serials: Optional[list] = None, select_all: bool = False,
+                    timeout: float = 5.0, as_json: bool = False) -> int:
+    """Apply a saved scene, writing only the fields that differ from the light's state."""
+    from litra.scenes import apply_scene
+    
+    scene = _load_scene(name)
+    if scene is None:
+        return EXIT_INVALID_PARAMETER
+    
+    if select_all or serials:
+        return _run_on_selected(lambda device: apply_scene(device, scene),
+                                None if select_all else serials, timeout, as_json)
+    
+    from litra.locks import LockTimeout, locked_device
+    cache = _state_cache()
+    try:
+        with locked_device(timeout=LOCK_TIMEOUT, deadline=DEADLINE) as device:
+            if not device:
+                return _device_not_found()
+            try:
+                device.state_cache = cache
+                result = apply_scene(device, scene)
+            finally:
+                cache.save()
+    except LockTimeout as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR
     except Exception as e:
         print(f"Error: Communication failed - {e}", file=sys.stderr)
         return EXIT_COMMUNICATION_ERROR
+    
+    if as_json:
+        import json
+        print(json.dumps(result))
+    elif result['ok']:
+        print(f"Applied scene '{name}': {result['sent']} change(s) sent, {result['unchanged']} unchanged")
+    if not result['ok']:
+        print(f"Error: {result['error']}", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR
+    return EXIT_SUCCESS
 
 
-def cmd_status() -> int:
-    """Get the current device status."""
-    device = get_device()
-    if not device:
-        print("Error: Litra Glow device not found. Please check USB connection.", file=sys.stderr)
+def cmd_scene_list(as_json: bool = False) -> int:
+    """List the saved scenes."""
+    from litra.scenes import SceneStore
+    
+    try:
+        with SceneStore() as store:
+            scenes = store.scenes()
+    except (OSError, ValueError) as e:
+        print(f"Error: Cannot read scene file - {e}", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR
+    
+    if as_json:
+        import json
+        for scene in scenes:
+            print(json.dumps(scene.to_dict()))
+    elif not scenes:
+        print("No scenes saved")
+    else:
+        width = max(len(scene.name) for scene in scenes)
+        for scene in scenes:
+            print(f"{scene.name:<{width}}  {_describe_scene(scene)}")
+    return EXIT_SUCCESS
+
+
+def cmd_scene_delete(name: str) -> int:
+    """Delete a saved scene."""
+    from litra.scenes import SceneStore
+    
+    try:
+        with SceneStore() as store:
+            deleted = store.delete(name)
+    except (OSError, ValueError) as e:
+        print(f"Error: Cannot update scene file - {e}", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR
+    if not deleted:
+        print(f"Error: Unknown scene '{name}'", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    print(f"Deleted scene '{name}'")
+    return EXIT_SUCCESS
+
+
+def cmd_group_save(name: str, serials: Optional[list] = None, select_all: bool = False) -> int:
+    """Save a named group of lights, given by serial number or as every connected light."""
+    from litra.group import GroupStore
+    
+    if select_all:
+        from litra.device import find_litra_devices
+        serials = [info['serial_number'] for info in find_litra_devices() if info['serial_number']]
+        if not serials:
+            print("Error: Litra Glow device not found. Please check USB connection.", file=sys.stderr)
+            return EXIT_DEVICE_NOT_FOUND
+    try:
+        GroupStore().save(name, serials or [])
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    except OSError as e:
+        print(f"Error: Cannot update group file - {e}", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR
+    print(f"Saved group '{name}': {', '.join(serials)}")
+    return EXIT_SUCCESS
+
+
+def cmd_group_list(as_json: bool = False) -> int:
+    """List the saved groups."""
+    from litra.group import GroupStore
+    
+    try:
+        groups = GroupStore().load()
+    except (OSError, ValueError) as e:
+        print(f"Error: Cannot read group file - {e}", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR
+    
+    if as_json:
+        import json
+        for name, serials in groups.items():
+            print(json.dumps({'name': name, 'serial_numbers': serials}))
+    elif not groups:
+        print("No groups saved")
+    else:
+        width = max(len(name) for name in groups)
+        for name, serials in groups.items():
+            print(f"{name:<{width}}  {' '.join(serials)}")
+    return EXIT_SUCCESS
+
+
+def cmd_group_delete(name: str) -> int:
+    """Delete a saved group."""
+    from litra.group import GroupStore
+    
+    try:
+        deleted = GroupStore().delete(name)
+    except (OSError, ValueError) as e:
+        print(f"Error: Cannot update group file - {e}", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR
+    if not deleted:
+        print(f"Error: Unknown group '{name}'", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    print(f"Deleted group '{name}'")
+    return EXIT_SUCCESS
+
+
+def cmd_group_apply(name: str, action: str, value: Optional[str] = None, is_percentage: bool = False,
+                    timeout: float = 5.0, as_json: bool = False) -> int:
+    """Apply one command to every light of a group at the same moment and report the skew."""
+    from contextlib import ExitStack
+    from litra.device import find_litra_devices
+    from litra.fanout import select_devices
+    from litra.group import GroupStore, LightGroup
+    from litra.locks import LockTimeout, device_lock, lock_key
+    
+    try:
+        serials = GroupStore().get(name)
+    except (OSError, ValueError) as e:
+        print(f"Error: Cannot read group file - {e}", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR
+    if serials is None:
+        print(f"Error: Unknown group '{name}'", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    
+    if action in ('on', 'off', 'toggle'):
+        line = action
+    elif value is None:
+        print(f"Error: '{action}' needs a value", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    else:
+        line = f"{action} {value}" + (" -p" if is_percentage else "")
+    try:
+        command, command_value = parse_command(line)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    
+    selected = select_devices(find_litra_devices(), serials)
+    found = {info['serial_number'] for info in selected}
+    missing = [serial for serial in serials if serial not in found]
+    if not selected:
+        print(f"Error: No light of group '{name}' is connected", file=sys.stderr)
         return EXIT_DEVICE_NOT_FOUND
     
+    cache = _state_cache()
+    try:
+        with ExitStack() as locks:
+            # Always lock in the same order so two group commands cannot deadlock
+            for info in sorted(selected, key=lambda info: lock_key(info['serial_number'], info['path'])):
+                locks.enter_context(device_lock(info, _lock_timeout()))
+            try:
+                with LightGroup(selected, timeout=_within_deadline(timeout), state_cache=cache) as group:
+                    result = group.apply(command, command_value)
+            finally:
+                cache.save()
+    except LockTimeout as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    except Exception as e:
+        print(f"Error: Communication failed - {e}", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR
+    
+    result['group'] = name
+    result['members'].extend({'serial_number': serial, 'ok': False, 'error': "Device not found"}
+                             for serial in missing)
+    if as_json:
+        import json
+        print(json.dumps(result))
+    else:
+        print(f"{'SERIAL':<20} {'RESULT':<7} {'WRITE':>9}  DETAIL")
+        for member in result['members']:
+            elapsed = f"{member['write_ms']:.2f} ms" if 'write_ms' in member else "-"
+            outcome = "ok" if member['ok'] else "FAILED"
+            print(f"{member['serial_number']:<20} {outcome:<7} {elapsed:>9}  {_describe_result(member)}")
+        if result['skew_ms'] is not None:
+            print(f"Skew between first and last write: {result['skew_ms']:.3f} ms")
+    
+    if missing:
+        return EXIT_DEVICE_NOT_FOUND
+    if not all(member['ok'] for member in result['members']):
+        return EXIT_COMMUNICATION_ERROR
+    return EXIT_SUCCESS
+
+
+def _describe_replayed_status(status: Optional[dict]) -> str:
+    if status is None:
+        return "no valid reply"
+    return f"{status['power']}, {status['brightness_lumen']} lm, {status['temperature_kelvin']} K"
+
+
+def cmd_replay(log_path: str, serial: Optional[str] = None, fast: bool = False, speed: float = 1.0,
+               max_gap: Optional[float] = None, as_json: bool = False) -> int:
+    """Replay a capture log into a light and compare its status replies with the recorded ones."""
+    from litra.capture import CaptureLog, replay
+    from litra.locks import LockTimeout, locked_device
+
+    if speed <= 0:
+        print("Error: --speed must be positive", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    try:
+        log = CaptureLog(log_path)
+    except (OSError, ValueError) as e:
+        print(f"Error: Cannot read capture log - {e}", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+
     try:
-        with device:
-            if not device.write(get_status_command()):
-                print("Error: Failed to send status request", file=sys.stderr)
-                return EXIT_COMMUNICATION_ERROR
-            
-            response = device.read()
-            if not response:
-                print("Error: Failed to read device status", file=sys.stderr)
-                return EXIT_COMMUNICATION_ERROR
-            
-            status = parse_status_response(response)
-            print(format_status(status))
-            return EXIT_SUCCESS
+        with log, locked_device(serial, timeout=LOCK_TIMEOUT, deadline=DEADLINE) as device:
+            if not device:
+                return _device_not_found()
+            result = replay(log, device, realtime=not fast, speed=speed, max_gap=max_gap)
+    except LockTimeout as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_COMMUNICATION_ERROR
     except Exception as e:
         print(f"Error: Communication failed - {e}", file=sys.stderr)
         return EXIT_COMMUNICATION_ERROR
 
+    if as_json:
+        import json
+        print(json.dumps(result))
+    else:
+        print(f"Replayed {result['records']} records in {result['elapsed_s']:.3f} s "
+              f"(recorded over {result['recorded_s']:.3f} s), {result['reports_per_second']:.0f} reports/s")
+        print(f"  {result['writes']} writes ({result['failed_writes']} failed), "
+              f"{result['replies']} status replies ({result['missing']} missing), "
+              f"{result['skipped']} other input reports skipped")
+        for mismatch in result['mismatches']:
+            print(f"  Mismatch at record {mismatch['record']} (+{mismatch['at_s']:.3f} s): expected "
+                  f"{_describe_replayed_status(mismatch['expected'])}, "
+                  f"got {_describe_replayed_status(mismatch['actual'])}")
+        print(f"  {len(result['mismatches'])} mismatch(es)")
+    if result['mismatches'] or result['missing'] or result['failed_writes']:
+        return EXIT_COMMUNICATION_ERROR
+    return EXIT_SUCCESS
+
 
 def cmd_list() -> int:
     """List all connected Litra devices."""
+    from litra.device import find_litra_devices
     devices = find_litra_devices()
     
     if not devices:
@@ -233,46 +1029,442 @@ def cmd_list() -> int:
     return EXIT_SUCCESS
 
 
-def main():
-    """Main entry point for the CLI."""
+def run_selected(args) -> int:
+    """Run a device command against the devices chosen by --all/--serial."""
+    try:
+        if args.command == 'batch':
+            if args.file == '-':
+                commands = parse_batch(sys.stdin)
+            else:
+                with open(args.file, 'r', encoding='utf-8') as fh:
+                    commands = parse_batch(fh)
+            if not commands:
+                return EXIT_SUCCESS
+        elif args.command == 'brightness':
+            text = f"brightness {args.value}" + (" -p" if args.percentage else "")
+            commands = [parse_command(text)]
+        elif args.command == 'temperature':
+            commands = [parse_command(f"temperature {args.value}")]
+        elif args.command == 'fade':
+            from litra.transitions import fade
+            targets = _fade_targets(args.brightness, args.temperature, args.percentage,
+                                    args.duration, args.fps)
+            serials = None if args.all else args.serial
+            return _run_on_selected(lambda device: fade(device, *targets, args.duration, args.fps),
+                                    serials, args.timeout + args.duration, args.json)
+        else:
+            commands = [parse_command(args.command)]
+    except OSError as e:
+        print(f"Error: Cannot read batch file - {e}", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_INVALID_PARAMETER
+    
+    serials = None if args.all else args.serial
+    return cmd_fanout(commands, serials, args.timeout, args.json,
+                      getattr(args, 'keep_going', False))
+
+
+def cmd_import_times(argv: list, limit: int = 15) -> int:
+    """
+    Run the CLI once under ``python -X importtime`` and report where start-up time goes.
+    
+    The command's own output is passed through; the report goes to stderr.
+    
+    Args:
+        argv: Command-line arguments for the measured run
+        limit: Number of slowest imports to list
+    
+    Returns:
+        Exit code of the measured run
+    """
+    import subprocess
+    
+    proc = subprocess.run([sys.executable, '-X', 'importtime', os.path.abspath(__file__)] + argv,
+                          stderr=subprocess.PIPE, universal_newlines=True)
+    
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            print(line, file=sys.stderr)
+            continue
+        fields = line[len('import time:'):].split('|')
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except (IndexError, ValueError):
+            continue  # Column header
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((cumulative_us, self_us, depth, name.strip()))
+    
+    total_us = sum(cumulative for cumulative, _, depth, _ in imports if depth == 0)
+    litra_us = sum(cumulative for cumulative, _, _, name in imports
+                   if name == 'litra' or (name.startswith('litra.') and '.' not in name[6:]))
+    print(f"\nImport time: {total_us / 1000:.1f} ms in {len(imports)} modules "
+          f"(litra package: {litra_us / 1000:.1f} ms)", file=sys.stderr)
+    print(f"{'CUMULATIVE':>12} {'SELF':>10}  MODULE", file=sys.stderr)
+    for cumulative, self_us, depth, name in sorted(imports, reverse=True)[:limit]:
+        print(f"{cumulative / 1000:>9.2f} ms {self_us / 1000:>7.2f} ms  {'  ' * depth}{name}",
+              file=sys.stderr)
+    return proc.returncode
+
+
+def _fast_path(argv: list) -> Optional[int]:
+    """
+    Run the common single-device invocations without building the argparse parser.
+    
+    Only plain ``on``/``off``/``toggle``/``status``/``list``,
+    ``brightness N``/``temperature N`` and ``scene apply NAME`` are handled;
+    anything with an option falls through to the full parser. ``serve``
+    always goes straight to litra.server, which parses its own options.
+    
+    Returns:
+        Exit code, or None if argv needs the full parser
+    """
+    if len(argv) == 1:
+        handler = {
+            'on': cmd_on,
+            'off': cmd_off,
+            'toggle': cmd_toggle,
+            'status': cmd_status,
+            'list': cmd_list,
+        }.get(argv[0])
+        return handler() if handler else None
+    if len(argv) == 2 and argv[1] and not argv[1].startswith('-'):
+        if argv[0] == 'brightness':
+            return cmd_brightness(argv[1])
+        if argv[0] == 'temperature':
+            return cmd_temperature(argv[1])
+    if argv and argv[0] == 'serve':
+        # The server has its own parser; see litra.server
+        from litra.server import main as serve
+        return serve(argv[1:])
+    if len(argv) == 3 and argv[:2] == ['scene', 'apply'] and argv[2] and not argv[2].startswith('-'):
+        return cmd_scene_apply(argv[2])
+    return None
+
+
+def build_parser():
+    """Build the argparse parser for the full command line."""
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description="Control Logitech Litra Glow light from the command line",
         epilog="Author: RKaushik | License: MIT"
     )
     
+    parser.add_argument('--import-times', action='store_true',
+                        help='Run the command and report its module import times on stderr')
+    parser.add_argument('--timings', action='store_true',
+                        help='Report device enumerate/open/write/read/close timings on stderr')
+    parser.add_argument('--capture', metavar='FILE',
+                        help='Append every report sent to or read from the light to a capture log')
+    parser.add_argument('--state-ttl', type=float, metavar='SECONDS',
+                        help='Trust cached device state for this long (default: $LITRA_STATE_TTL or 30, 0 disables)')
+    parser.add_argument('--lock-timeout', type=float, metavar='SECONDS',
+                        help='Wait this long for other litra-control processes using the light '
+                             '(default: $LITRA_LOCK_TIMEOUT or 5)')
+    parser.add_argument('--deadline-ms', type=int, metavar='MS',
+                        help='Give up if the command is not done within this many milliseconds, '
+                             'including lock waits, opening the light and retries '
+                             '(default: $LITRA_DEADLINE_MS or none)')
+    
     subparsers = parser.add_subparsers(dest='command', help='Command to execute')
     
+    # Device selection options shared by every device command
+    selector_parser = argparse.ArgumentParser(add_help=False)
+    selector_group = selector_parser.add_argument_group('device selection')
+    selector_group.add_argument('--all', action='store_true',
+                                help='Apply to every connected Litra Glow in parallel')
+    selector_group.add_argument('--serial', action='append', metavar='SERIAL',
+                                help='Apply to the device with this serial number (repeatable)')
+    selector_group.add_argument('--timeout', type=float, default=5.0,
+                                help='Per-device timeout in seconds with --all/--serial (default: 5)')
+    selector_group.add_argument('--json', action='store_true',
+                                help='Print per-device results as JSON lines with --all/--serial')
+    selector = [selector_parser]
+    
     # On command
-    subparsers.add_parser('on', help='Turn the light on')
+    subparsers.add_parser('on', help='Turn the light on', parents=selector)
     
     # Off command
-    subparsers.add_parser('off', help='Turn the light off')
+    subparsers.add_parser('off', help='Turn the light off', parents=selector)
     
     # Toggle command
-    subparsers.add_parser('toggle', help='Toggle the light on/off')
+    subparsers.add_parser('toggle', help='Toggle the light on/off', parents=selector)
     
     # Brightness command
-    brightness_parser = subparsers.add_parser('brightness', help='Set brightness')
-    brightness_parser.add_argument('value', help='Brightness value (20-250 lumens or 0-100%%)')
+    brightness_parser = subparsers.add_parser('brightness', help='Set brightness', parents=selector)
+    brightness_parser.add_argument('value', help='Brightness value (20-250 lumens or 0-100%%), '
+                                   'or +N/-N to change it relative to the current value')
     brightness_parser.add_argument('-p', '--percentage', action='store_true',
                                    help='Interpret value as percentage (0-100)')
     
     # Temperature command
-    temperature_parser = subparsers.add_parser('temperature', help='Set color temperature')
-    temperature_parser.add_argument('value', help='Temperature in Kelvin (2700-6500, multiples of 100)')
+    temperature_parser = subparsers.add_parser('temperature', help='Set color temperature',
+                                               parents=selector)
+    temperature_parser.add_argument('value', help='Temperature in Kelvin (2700-6500, multiples of 100), '
+                                    'or +N/-N to change it relative to the current value')
     
     # Status command
-    subparsers.add_parser('status', help='Get current device status')
+    status_parser = subparsers.add_parser('status', help='Get current device status', parents=selector)
+    status_parser.add_argument('--watch', action='store_true',
+                               help='Keep polling and print a JSON line whenever the status changes')
+    status_parser.add_argument('--interval', type=float, default=0.25,
+                               help='With --watch: poll interval after a change, in seconds (default: 0.25)')
+    status_parser.add_argument('--max-interval', type=float, default=5.0,
+                               help='With --watch: poll interval ceiling while idle, in seconds (default: 5)')
+    status_parser.add_argument('--duration', type=float,
+                               help='With --watch: stop after this many seconds')
     
     # List command
     subparsers.add_parser('list', help='List all connected Litra devices')
     
-    args = parser.parse_args()
+    # Fade command
+    fade_parser = subparsers.add_parser('fade', help='Fade brightness and/or temperature smoothly',
+                                        parents=selector)
+    fade_parser.add_argument('-b', '--brightness', help='Target brightness (20-250 lumens or 0-100%%)')
+    fade_parser.add_argument('-p', '--percentage', action='store_true',
+                             help='Interpret the brightness as percentage (0-100)')
+    fade_parser.add_argument('-t', '--temperature', help='Target temperature in Kelvin (2700-6500)')
+    fade_parser.add_argument('-d', '--duration', type=float, default=1.0,
+                             help='Fade length in seconds (default: 1)')
+    fade_parser.add_argument('--fps', type=float, default=30.0,
+                             help='Frames per second (default: 30)')
+    
+    # Schedule command
+    schedule_parser = subparsers.add_parser('schedule', help='Follow a daylight curve through the day',
+                                            parents=selector)
+    schedule_parser.add_argument('curve', help='JSON day curve file')
+    schedule_parser.add_argument('--show', action='store_true',
+                                 help='Print the compiled schedule and exit')
+    schedule_parser.add_argument('--tick', type=float, default=1.0,
+                                 help='Scheduler resolution in seconds (default: 1)')
+    schedule_parser.add_argument('--duration', type=float,
+                                 help='Stop after this many seconds')
+    
+    # Auto-brightness command
+    auto_parser = subparsers.add_parser('auto', help='Follow the ambient light level read from a lux sensor')
+    auto_parser.add_argument('input', nargs='?', default='-',
+                             help='FIFO or file with lux readings, one per line (default: stdin)')
+    auto_parser.add_argument('--serial', help='Drive the device with this serial number')
+    auto_parser.add_argument('--curve', nargs='+', metavar='LUX:PERCENT',
+                             help='Lux to brightness curve (default: 0:10 50:30 300:60 1000:100)')
+    auto_parser.add_argument('--smoothing', type=float, default=0.2,
+                             help='Weight of each new reading in the moving average, 0-1 (default: 0.2)')
+    auto_parser.add_argument('--hysteresis', type=float, default=0.1,
+                             help='Relative lux change needed before the brightness moves (default: 0.1)')
+    auto_parser.add_argument('--max-rate', type=float, default=2.0,
+                             help='Maximum brightness writes per second (default: 2)')
+    auto_parser.add_argument('--duration', type=float, help='Stop after this many seconds')
+    auto_parser.add_argument('--json', action='store_true', help='Print every write as a JSON line')
+    
+    # Scene commands
+    scene_parser = subparsers.add_parser('scene', help='Save and apply named scenes')
+    scene_subparsers = scene_parser.add_subparsers(dest='scene_command', metavar='ACTION')
+    scene_save = scene_subparsers.add_parser(
+        'save', help='Save a scene from the given values, or from the light\'s current state')
+    scene_save.add_argument('name', help='Scene name')
+    scene_power = scene_save.add_mutually_exclusive_group()
+    scene_power.add_argument('--on', dest='power', action='store_const', const='on',
+                             help='Turn the light on')
+    scene_power.add_argument('--off', dest='power', action='store_const', const='off',
+                             help='Turn the light off')
+    scene_save.add_argument('-b', '--brightness', help='Brightness (20-250 lumens or 0-100%%)')
+    scene_save.add_argument('-p', '--percentage', action='store_true',
+                            help='Interpret the brightness as percentage (0-100)')
+    scene_save.add_argument('-t', '--temperature', help='Temperature in Kelvin (2700-6500)')
+    scene_apply = scene_subparsers.add_parser('apply', help='Apply a saved scene', parents=selector)
+    scene_apply.add_argument('name', help='Scene name')
+    scene_list = scene_subparsers.add_parser('list', help='List saved scenes')
+    scene_list.add_argument('--json', action='store_true', help='Print scenes as JSON lines')
+    scene_delete = scene_subparsers.add_parser('delete', help='Delete a saved scene')
+    scene_delete.add_argument('name', help='Scene name')
+    
+    # Serve command (handled in _fast_path; listed here for --help)
+    subparsers.add_parser('serve', help='Serve a REST API for the lights on localhost '
+                          '(see serve --help)', add_help=False)
+    
+    # Group commands
+    group_parser = subparsers.add_parser('group', help='Control named groups of lights in sync')
+    group_subparsers = group_parser.add_subparsers(dest='group_command', metavar='ACTION')
+    group_save = group_subparsers.add_parser('save', help='Save a named group of lights')
+    group_save.add_argument('name', help='Group name')
+    group_save.add_argument('serials', nargs='*', metavar='SERIAL', help='Serial numbers of the members')
+    group_save.add_argument('--all', action='store_true', help='Every connected Litra Glow')
+    group_apply = group_subparsers.add_parser(
+        'apply', help='Apply a command to every light of a group at the same moment')
+    group_apply.add_argument('name', help='Group name')
+    group_apply.add_argument('action', choices=('on', 'off', 'toggle', 'brightness', 'temperature'))
+    group_apply.add_argument('value', nargs='?',
+                             help='Brightness (20-250 lumens or 0-100%%) or temperature (2700-6500), '
+                                  'or +N/-N to change it relative to each light\'s current value')
+    group_apply.add_argument('-p', '--percentage', action='store_true',
+                             help='Interpret the brightness as percentage (0-100)')
+    group_apply.add_argument('--timeout', type=float, default=5.0,
+                             help='Per-device timeout in seconds (default: 5)')
+    group_apply.add_argument('--json', action='store_true', help='Print the result as JSON')
+    group_list = group_subparsers.add_parser('list', help='List saved groups')
+    group_list.add_argument('--json', action='store_true', help='Print groups as JSON lines')
+    group_delete = group_subparsers.add_parser('delete', help='Delete a saved group')
+    group_delete.add_argument('name', help='Group name')
+    
+    # Replay command
+    replay_parser = subparsers.add_parser('replay', help='Replay a capture log into a light')
+    replay_parser.add_argument('log', help='Capture log written with --capture or $LITRA_CAPTURE')
+    replay_parser.add_argument('--serial', help='Replay into the device with this serial number')
+    replay_parser.add_argument('--fast', action='store_true',
+                               help='Send reports as fast as possible instead of at the recorded pace')
+    replay_parser.add_argument('--speed', type=float, default=1.0,
+                               help='Play this many times faster than recorded (default: 1)')
+    replay_parser.add_argument('--max-gap', type=float, metavar='SECONDS',
+                               help='Shorten recorded pauses longer than this')
+    replay_parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+    
+    # Batch command
+    batch_parser = subparsers.add_parser('batch', help='Run newline-delimited commands in one session',
+                                         parents=selector)
+    batch_parser.add_argument('file', nargs='?', default='-',
+                              help='Script file to read (default: stdin)')
+    batch_parser.add_argument('-k', '--keep-going', action='store_true',
+                              help='Continue after a failed command')
+    
+    return parser
+
+
+def main(argv: Optional[list] = None):
+    """Main entry point for the CLI."""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if '--import-times' in argv:
+        argv.remove('--import-times')
+        return cmd_import_times(argv)
+    capture = _pop_option(argv, '--capture')
+    if capture:
+        from litra import capture as _capture
+        try:
+            _capture.start(capture)
+        except (OSError, ValueError) as e:
+            print(f"Error: Cannot capture to {capture} - {e}", file=sys.stderr)
+            return EXIT_INVALID_PARAMETER
+    deadline_ms = _pop_option(argv, '--deadline-ms') or os.environ.get('LITRA_DEADLINE_MS')
+    if deadline_ms:
+        global DEADLINE
+        import time
+        try:
+            DEADLINE = time.monotonic() + _parse_deadline_ms(deadline_ms) / 1000.0
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return EXIT_INVALID_PARAMETER
+    try:
+        if '--timings' in argv:
+            argv.remove('--timings')
+            return cmd_timings(argv)
+        return _run(argv)
+    finally:
+        timeouts = sys.modules.get('litra.timeouts')
+        if timeouts is not None:
+            timeouts.get_rtt_table().save()
+
+
+def _parse_deadline_ms(value: str) -> int:
+    """Parse a --deadline-ms value; raises ValueError if it is not a positive integer."""
+    try:
+        deadline_ms = int(value)
+    except ValueError:
+        deadline_ms = 0
+    if deadline_ms <= 0:
+        raise ValueError(f"Deadline must be a positive number of milliseconds, got '{value}'")
+    return deadline_ms
+
+
+def _pop_option(argv: list, name: str) -> Optional[str]:
+    """Remove a global ``--name VALUE`` / ``--name=VALUE`` option from argv and return its value."""
+    for i, arg in enumerate(argv):
+        if arg == '--':
+            break
+        if arg == name and i + 1 < len(argv):
+            del argv[i]
+            return argv.pop(i)
+        if arg.startswith(name + '='):
+            del argv[i]
+            return arg[len(name) + 1:]
+    return None
+
+
+def cmd_timings(argv: list) -> int:
+    """Run a command with device I/O instrumentation and print the timings to stderr."""
+    from litra import metrics
+    
+    recorder = metrics.enable()
+    try:
+        return _run(argv)
+    finally:
+        if recorder.to_dict()['operations']:
+            print(f"\n{recorder.format_table()}", file=sys.stderr)
+        else:
+            print("\nNo device I/O recorded (the command may have been served by litrad)",
+                  file=sys.stderr)
+
+
+def _run(argv: list) -> int:
+    """Parse argv and run the selected command."""
+    exit_code = _fast_path(argv)
+    if exit_code is not None:
+        return exit_code
+    
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    
+    global STATE_TTL, LOCK_TIMEOUT
+    STATE_TTL = args.state_ttl
+    LOCK_TIMEOUT = args.lock_timeout
     
     if not args.command:
         parser.print_help()
         return EXIT_SUCCESS
     
+    if args.command == 'status' and args.watch:
+        return cmd_watch(args.serial, args.all, args.interval, args.max_interval, args.duration)
+    
+    if args.command == 'scene':
+        if args.scene_command == 'save':
+            return cmd_scene_save(args.name, args.power, args.brightness, args.percentage,
+                                  args.temperature)
+        if args.scene_command == 'apply':
+            return cmd_scene_apply(args.name, args.serial, args.all, args.timeout, args.json)
+        if args.scene_command == 'list':
+            return cmd_scene_list(args.json)
+        if args.scene_command == 'delete':
+            return cmd_scene_delete(args.name)
+        parser.parse_args(['scene', '--help'])
+    
+    if args.command == 'auto':
+        return cmd_auto(args.input, args.serial, args.curve, args.smoothing, args.hysteresis,
+                        args.max_rate, args.duration, args.json)
+    
+    if args.command == 'group':
+        if args.group_command == 'save':
+            return cmd_group_save(args.name, args.serials, args.all)
+        if args.group_command == 'apply':
+            return cmd_group_apply(args.name, args.action, args.value, args.percentage,
+                                   args.timeout, args.json)
+        if args.group_command == 'list':
+            return cmd_group_list(args.json)
+        if args.group_command == 'delete':
+            return cmd_group_delete(args.name)
+        parser.parse_args(['group', '--help'])
+    
+    if args.command == 'replay':
+        return cmd_replay(args.log, args.serial, args.fast, args.speed, args.max_gap, args.json)
+    
+    if args.command == 'schedule':
+        return cmd_schedule(args.curve, args.serial, args.all, args.show, args.tick,
+                            args.duration, args.json)
+    
+    if getattr(args, 'all', False) or getattr(args, 'serial', None):
+        return run_selected(args)
+    
     # Execute command
     if args.command == 'on':
         return cmd_on()
@@ -288,6 +1480,11 @@ def main():
         return cmd_status()
     elif args.command == 'list':
         return cmd_list()
+    elif args.command == 'batch':
+        return cmd_batch(args.file, args.keep_going)
+    elif args.command == 'fade':
+        return cmd_fade(args.brightness, args.temperature, args.percentage,
+                        args.duration, args.fps, args.json)
     else:
         parser.print_help()
         return EXIT_SUCCESS
@@ -18,7 +18,7 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/rkaushikethz/litra-macos-shortcuts",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: End Users/Desktop",
@@ -38,6 +38,7 @@ setup(
     entry_points={
         "console_scripts": [
             "litra-control=litra_control:main",
+            "litrad=litra.daemon:main",
         ],
     },
 )
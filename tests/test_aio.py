@@ -0,0 +1,94 @@
+"""
+Tests for litra.aio against emulated lights
+
+Author: RKaushik
+License: MIT
+"""
+
+import asyncio
+import time
+
+from litra.aio import AsyncLitraDevice
+from litra.commands import brightness_report
+from litra.emulator import EmulatedLitra, EmulatedLitraDevice
+
+LIGHTS = 24
+
+
+def _lights(count: int = LIGHTS, **options) -> list:
+    return [EmulatedLitra(serial_number=f"EMU{i + 1:04d}", brightness_lumen=20 + 5 * i,
+                          temperature_kelvin=2700 + 100 * (i % 38), power=bool(i % 2), **options)
+            for i in range(count)]
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_status_of_many_lights_concurrently():
+    lights = _lights(report_latency=0.02)
+    devices = [AsyncLitraDevice(EmulatedLitraDevice(light)) for light in lights]
+
+    async def main():
+        await asyncio.gather(*(device.connect() for device in devices))
+        try:
+            start = time.monotonic()
+            results = await asyncio.gather(*(device.status() for device in devices))
+            return results, time.monotonic() - start
+        finally:
+            await asyncio.gather(*(device.disconnect() for device in devices))
+
+    results, elapsed = _run(main())
+    for light, status in zip(lights, results):
+        assert status == {'power': 'on' if light.power else 'off',
+                          'brightness_lumen': light.brightness_lumen,
+                          'temperature_kelvin': light.temperature_kelvin}
+    # One at a time would take LIGHTS * report_latency
+    assert elapsed < LIGHTS * 0.02 / 2
+
+
+def test_status_skips_reports_that_are_not_the_reply():
+    lights = _lights(8, ack_writes=True)
+    devices = [AsyncLitraDevice(EmulatedLitraDevice(light)) for light in lights]
+
+    async def query(device, light):
+        await device.connect()
+        try:
+            # Leave the acknowledgement and a button press unread before asking
+            assert await device.write(brightness_report(200))
+            light.press_button('brightness_up')
+            return await device.status()
+        finally:
+            await device.disconnect()
+
+    async def main():
+        return await asyncio.gather(*(query(device, light) for device, light in zip(devices, lights)))
+
+    for light, status in zip(lights, _run(main())):
+        assert 'error' not in status
+        assert status['brightness_lumen'] == light.brightness_lumen == 210
+        assert status['temperature_kelvin'] == light.temperature_kelvin
+
+
+def test_status_returns_error_when_replies_are_lost():
+    lights = _lights(8, drop_rate=1.0, seed=1)
+    devices = [AsyncLitraDevice(EmulatedLitraDevice(light)) for light in lights]
+
+    async def main():
+        await asyncio.gather(*(device.connect() for device in devices))
+        try:
+            start = time.monotonic()
+            results = await asyncio.gather(*(device.status(timeout=0.2) for device in devices),
+                                           return_exceptions=True)
+            return results, time.monotonic() - start
+        finally:
+            await asyncio.gather(*(device.disconnect() for device in devices))
+
+    results, elapsed = _run(main())
+    for device, result in zip(devices, results):
+        assert isinstance(result, (dict, asyncio.TimeoutError))
+        if isinstance(result, dict):
+            assert 'error' in result
+        # The deadline set for the exchange is cleared again
+        assert device.device.deadline is None
+    assert elapsed < 1.0
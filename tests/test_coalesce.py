@@ -0,0 +1,39 @@
+"""
+Tests for litra.coalesce.CoalescingWriter against an emulated light
+
+Author: RKaushik
+License: MIT
+"""
+
+import pytest
+
+from litra.coalesce import CoalescingWriter
+from litra.emulator import EmulatedLitra, EmulatedLitraDevice
+
+
+@pytest.fixture
+def writer():
+    light = EmulatedLitra()
+    device = EmulatedLitraDevice(light)
+    assert device.connect()
+    writer = CoalescingWriter(device)
+    yield writer, light
+    writer.close()
+    device.disconnect()
+
+
+@pytest.mark.parametrize('setter, value', [('set_brightness', 5000), ('set_brightness', 19),
+                                           ('set_temperature', 2750), ('set_temperature', 7000)])
+def test_out_of_range_values_raise_value_error(writer, setter, value):
+    writer, _ = writer
+    with pytest.raises(ValueError):
+        getattr(writer, setter)(value)
+    assert writer.accepted == 0
+
+
+def test_valid_values_are_sent(writer):
+    writer, light = writer
+    assert writer.set_brightness(180)
+    assert writer.set_temperature(3000)
+    writer.close()
+    assert (light.brightness_lumen, light.temperature_kelvin) == (180, 3000)
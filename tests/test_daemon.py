@@ -0,0 +1,121 @@
+"""
+Tests for litrad (litra.daemon) against emulated lights
+
+Author: RKaushik
+License: MIT
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from litra.daemon import DaemonClient, LitraDaemon
+from litra.transport import get_backend, set_backend
+
+
+def _reply_when(daemon: LitraDaemon, request: dict, condition, timeout: float = 3.0) -> dict:
+    """Repeat a request until its reply meets a condition."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        reply = daemon.handle_request(request)
+        if condition(reply):
+            return reply
+        time.sleep(0.02)
+    raise AssertionError(f"no reply to {request} met the condition in time; last: {reply}")
+
+
+@pytest.fixture
+def emulator(tmp_path, monkeypatch):
+    """Start an emulated light, optionally playing a LITRA_EMULATOR_SCRIPT."""
+    def start(script=None, count=1):
+        monkeypatch.setenv('LITRA_BACKEND', f'emulator:{count}')
+        monkeypatch.delenv('LITRA_EMULATOR_STATE', raising=False)
+        if script is not None:
+            path = tmp_path / 'script.json'
+            path.write_text(json.dumps(script))
+            monkeypatch.setenv('LITRA_EMULATOR_SCRIPT', str(path))
+        else:
+            monkeypatch.delenv('LITRA_EMULATOR_SCRIPT', raising=False)
+        set_backend(None)
+        return get_backend()
+
+    yield start
+    set_backend(None)
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    daemon = LitraDaemon(socket_path=str(tmp_path / 'litrad.sock'), state_ttl=0)
+    yield daemon
+    daemon.close()
+
+
+def test_commands_reply_with_results(emulator, daemon):
+    light = emulator().light('EMU0001')
+
+    assert daemon.handle_request({'command': 'on'}) == {'ok': True, 'power': 'on'}
+    assert daemon.handle_request({'command': 'brightness', 'value': 150}) == \
+        {'ok': True, 'brightness_lumen': 150}
+    assert daemon.handle_request({'command': 'temperature_delta', 'value': 300})['temperature_kelvin'] == 4300
+    assert (light.power, light.brightness_lumen, light.temperature_kelvin) == (True, 150, 4300)
+
+    reply = daemon.handle_request({'command': 'status'})
+    assert reply['ok']
+    assert reply['status'] == {'power': 'on', 'brightness_lumen': 150, 'temperature_kelvin': 4300}
+
+    assert daemon.handle_request({'command': 'toggle'})['power'] == 'off'
+    assert not light.power
+
+
+@pytest.mark.parametrize('request_, exit_code', [
+    ({'command': 'dance'}, 2),
+    ({'command': 'brightness', 'value': 500}, 2),
+    ({'command': 'brightness'}, 2),
+    ({'command': 'temperature_delta', 'value': 150}, 2),
+    ({'command': 'history'}, 2),
+])
+def test_invalid_requests_are_rejected(emulator, daemon, request_, exit_code):
+    light = emulator().light('EMU0001')
+    reply = daemon.handle_request(request_)
+    assert not reply['ok']
+    assert reply['exit_code'] == exit_code
+    assert light.writes == 0
+
+
+def test_no_light(emulator, daemon):
+    emulator(count=0)
+    reply = daemon.handle_request({'command': 'status'})
+    assert reply['exit_code'] == 1
+
+
+def test_script_changes_are_seen_and_replug_recovers(emulator, daemon):
+    emulator([{'at': 0.2, 'press': 'brightness_up'},
+              {'at': 0.6, 'unplug': True},
+              {'at': 1.2, 'plug': True}])
+    assert daemon.handle_request({'command': 'status'})['status']['brightness_lumen'] == 100
+
+    _reply_when(daemon, {'command': 'status'}, lambda reply: reply['status']['brightness_lumen'] == 110)
+    failed = _reply_when(daemon, {'command': 'status'}, lambda reply: not reply['ok'])
+    assert failed['exit_code'] in (1, 3)
+
+    # The daemon reopens the light once it is back
+    reply = _reply_when(daemon, {'command': 'brightness', 'value': 60}, lambda reply: reply['ok'])
+    assert reply['brightness_lumen'] == 60
+
+
+def test_requests_over_the_socket(emulator, daemon):
+    emulator()
+    daemon.bind()
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with DaemonClient(daemon.socket_path) as client:
+            assert client.request('ping')['ok']
+            assert client.request('brightness', 80) == {'ok': True, 'brightness_lumen': 80}
+            assert client.request('status')['status']['brightness_lumen'] == 80
+            assert client.request('brightness', 10)['exit_code'] == 2
+    finally:
+        daemon.shutdown()
+        thread.join()
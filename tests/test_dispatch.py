@@ -0,0 +1,107 @@
+"""
+Tests for litra.dispatch.ReportDispatcher against an emulated light
+
+Author: RKaushik
+License: MIT
+"""
+
+import time
+
+import pytest
+
+from litra import timeouts
+from litra.commands import GET_STATUS_REPORT, parse_status_response
+from litra.dispatch import ReportDispatcher
+from litra.emulator import EmulatedLitra, EmulatedLitraDevice
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    monkeypatch.setattr(timeouts, '_table', timeouts.RttTable())
+    light = EmulatedLitra(serial_number='EMU0001')
+    device = EmulatedLitraDevice(light)
+    device.timeout_ceiling_ms = 50
+    with device, ReportDispatcher(device, poll_interval_ms=5) as dispatcher:
+        yield light, device, dispatcher
+
+
+def _wait_until(predicate, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.005)
+
+
+def _brightness(reply: bytes) -> int:
+    return parse_status_response(reply)['brightness_lumen']
+
+
+def test_late_reply_is_not_given_to_the_next_request(dispatched):
+    light, device, dispatcher = dispatched
+    light.drop_rate = 1.0
+    stale = light.status_report()
+    assert dispatcher.request(GET_STATUS_REPORT, timeout=0.02) is None
+    writes = light.writes
+
+    # The next request is in flight when the late reply, from before a change, arrives
+    light.set_state(brightness_lumen=200)
+    future = dispatcher.submit(GET_STATUS_REPORT)
+    light.queue_report(stale)
+    light.queue_report(light.status_report())
+    assert _brightness(future.result(1.0)) == 200
+    assert light.writes == writes + 1
+
+
+def test_lost_reply_costs_one_retry_and_no_more(dispatched):
+    light, device, dispatcher = dispatched
+    light.drop_rate = 1.0
+    assert dispatcher.request(GET_STATUS_REPORT, timeout=0.02) is None
+
+    # The placeholder of the lost reply swallows the next reply once
+    light.drop_rate = 0.0
+    light.set_state(brightness_lumen=180)
+    assert _brightness(dispatcher.request(GET_STATUS_REPORT, timeout=1.0)) == 180
+    assert dispatcher.pending() == 0
+
+    # After that every request is answered on its first attempt again
+    for _ in range(5):
+        writes = light.writes
+        assert _brightness(dispatcher.request(GET_STATUS_REPORT)) == 180
+        assert light.writes == writes + 1
+
+
+def test_replies_after_a_timeout_are_no_round_trip_samples(dispatched):
+    light, device, dispatcher = dispatched
+    estimator = timeouts.get_rtt_table().get(device.state_key())
+    assert dispatcher.request(GET_STATUS_REPORT) is not None
+    assert len(estimator) == 1
+
+    light.drop_rate = 1.0
+    assert dispatcher.request(GET_STATUS_REPORT, timeout=0.02) is None
+    light.drop_rate = 0.0
+    light.queue_report(light.status_report())
+    assert dispatcher.request(GET_STATUS_REPORT) is not None
+    assert len(estimator) == 1
+
+
+def test_lost_replies_are_retried_within_the_budget(dispatched):
+    light, device, dispatcher = dispatched
+    light.drop_rate = 1.0
+    start = time.monotonic()
+    assert dispatcher.request(GET_STATUS_REPORT, timeout=1.0) is None
+    # 50, 100 and 200 ms waits
+    assert light.writes == device.max_retries + 1
+    assert time.monotonic() - start < 1.0
+
+    device.deadline = time.monotonic() + 0.03
+    writes = light.writes
+    assert dispatcher.request(GET_STATUS_REPORT) is None
+    assert light.writes - writes <= 2
+    device.deadline = None
+
+
+def test_query_status_matches_the_direct_path(dispatched):
+    light, device, dispatcher = dispatched
+    light.set_state(power=True, brightness_lumen=90, temperature_kelvin=3100)
+    assert device.query_status() == {'power': 'on', 'brightness_lumen': 90, 'temperature_kelvin': 3100}
+    _wait_until(lambda: dispatcher.pending() == 0)
@@ -0,0 +1,50 @@
+"""
+Tests for litra.fanout against emulated lights
+
+Author: RKaushik
+License: MIT
+"""
+
+import time
+
+from litra.emulator import EmulatedLitra, EmulatedLitraDevice
+from litra.fanout import run_parallel
+
+
+def _setup(*serials: str) -> tuple:
+    lights = {serial: EmulatedLitra(serial_number=serial) for serial in serials}
+    infos = [{'serial_number': serial, 'path': light.path} for serial, light in lights.items()]
+    return lights, infos, lambda info: EmulatedLitraDevice(lights[info['serial_number']])
+
+
+def test_exceptions_become_failed_results():
+    lights, infos, factory = _setup('EMU0001', 'EMU0002', 'EMU0003')
+
+    def action(device):
+        if device.serial_number == 'EMU0001':
+            raise ValueError("bad value")
+        if device.serial_number == 'EMU0002':
+            raise RuntimeError("broken")
+        return device.execute('brightness', 200)
+
+    results = run_parallel(infos, action, timeout=2.0, device_factory=factory)
+    assert [result['serial_number'] for result in results] == ['EMU0001', 'EMU0002', 'EMU0003']
+    assert results[0] == {'serial_number': 'EMU0001', 'ok': False, 'error': "bad value",
+                          'elapsed_ms': results[0]['elapsed_ms']}
+    assert not results[1]['ok'] and 'broken' in results[1]['error']
+    assert results[2]['ok'] and lights['EMU0003'].brightness_lumen == 200
+
+
+def test_timed_out_device_is_not_written_later():
+    lights, infos, factory = _setup('EMU0001', 'EMU0002')
+    lights['EMU0002'].open_latency = 0.3
+
+    results = run_parallel(infos, lambda device: device.execute('brightness', 200),
+                           timeout=0.1, device_factory=factory)
+    assert results[0]['ok']
+    assert results[1]['error'] == "Timed out after 0.1s"
+
+    # Give the slow light time to finish opening; its deadline has passed by then
+    time.sleep(0.4)
+    assert lights['EMU0002'].writes == 0
+    assert lights['EMU0002'].brightness_lumen == 100
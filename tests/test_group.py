@@ -0,0 +1,37 @@
+"""
+Tests for litra.group.LightGroup against emulated lights
+
+Author: RKaushik
+License: MIT
+"""
+
+import threading
+
+from litra.emulator import EmulatedLitra, EmulatedLitraDevice
+from litra.group import LightGroup
+
+
+def _group_threads() -> list:
+    return [thread for thread in threading.enumerate() if thread.name.startswith('litra-group-')]
+
+
+def test_apply_then_close_disconnects_every_member():
+    lights = {serial: EmulatedLitra(serial_number=serial, report_latency=0.01)
+              for serial in ('EMU0001', 'EMU0002', 'EMU0003')}
+    infos = [{'serial_number': serial, 'path': light.path} for serial, light in lights.items()]
+    devices = []
+
+    def factory(info):
+        device = EmulatedLitraDevice(lights[info['serial_number']])
+        devices.append(device)
+        return device
+
+    with LightGroup(infos, timeout=2.0, device_factory=factory) as group:
+        result = group.apply('brightness', 180)
+        assert _group_threads()
+
+    assert result['ok']
+    assert all(light.brightness_lumen == 180 for light in lights.values())
+    # Callers release their device locks right after __exit__, so nothing may stay open
+    assert _group_threads() == []
+    assert all(device.device is None for device in devices)
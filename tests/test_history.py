@@ -0,0 +1,57 @@
+"""
+Tests for the event history recorded by LitraDevice
+
+Author: RKaushik
+License: MIT
+"""
+
+import contextlib
+
+import pytest
+
+from litra import history, timeouts
+from litra.dispatch import ReportDispatcher
+from litra.emulator import EmulatedLitra, EmulatedLitraDevice
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    monkeypatch.setattr(timeouts, '_table', timeouts.RttTable())
+    recorder = history.EventHistory(100)
+    monkeypatch.setattr(history, 'recorder', recorder)
+    return recorder
+
+
+@pytest.fixture(params=['direct', 'dispatched'])
+def device(request):
+    light = EmulatedLitra(serial_number='EMU0001')
+    device = EmulatedLitraDevice(light)
+    device.timeout_ceiling_ms = 30
+    with device, contextlib.ExitStack() as stack:
+        if request.param == 'dispatched':
+            stack.enter_context(ReportDispatcher(device, poll_interval_ms=5))
+        yield light, device
+
+
+def _status_results(recorder: history.EventHistory) -> list:
+    return [event['result'] for event in recorder.query(kind='status')]
+
+
+def test_answered_status_is_ok(recorder, device):
+    light, device = device
+    assert 'error' not in device.query_status()
+    assert _status_results(recorder) == ['ok']
+
+
+def test_lost_reply_is_a_timeout(recorder, device):
+    light, device = device
+    light.drop_rate = 1.0
+    assert device.query_status() == {'error': "Failed to read device status"}
+    assert _status_results(recorder) == ['timeout']
+
+
+def test_unsent_request_is_an_error(recorder, device):
+    light, device = device
+    light.unplug()
+    assert device.query_status() == {'error': "Failed to get device status"}
+    assert _status_results(recorder) == ['error']
@@ -0,0 +1,75 @@
+"""
+Tests for the litra.server REST API against emulated lights
+
+Author: RKaushik
+License: MIT
+"""
+
+import http.client
+import json
+import socket
+import threading
+
+import pytest
+
+from litra.emulator import EmulatorBackend
+from litra.server import MAX_BODY, LitraHTTPServer, parse_action
+from litra.transport import set_backend
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setenv('LITRA_STATE_FILE', str(tmp_path / 'state.json'))
+    set_backend(EmulatorBackend.create(1))
+    server = LitraHTTPServer(('127.0.0.1', 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    set_backend(None)
+
+
+@pytest.mark.parametrize('value', ["60 -p", "60%", "6 0", " 60", True, 1.5, [60], {'v': 60}])
+def test_parse_action_rejects_values_that_are_not_integers(value):
+    with pytest.raises(ValueError):
+        parse_action('brightness', {'value': value})
+
+
+@pytest.mark.parametrize('value, expected', [(60, ('brightness', 60)), ("60", ('brightness', 60)),
+                                             ("+20", ('brightness_delta', 20)),
+                                             (-20, ('brightness_delta', -20))])
+def test_parse_action_accepts_integers(value, expected):
+    assert parse_action('brightness', {'value': value}) == expected
+
+
+def test_value_cannot_add_flags(server):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+    connection.request('POST', '/brightness', body=json.dumps({'value': "60 -p"}))
+    response = connection.getresponse()
+    assert response.status == 400
+    assert not json.loads(response.read())['ok']
+
+    # The connection stays usable after an ordinary bad request
+    connection.request('POST', '/brightness', body=json.dumps({'value': 60}))
+    response = connection.getresponse()
+    assert response.status == 200
+    assert json.loads(response.read())['brightness_lumen'] == 60
+    connection.close()
+
+
+def test_oversized_body_closes_the_connection(server):
+    # A request hidden in the unread body must not be parsed as the next one
+    hidden = b'GET /devices HTTP/1.1\r\nHost: test\r\n\r\n'
+    body = hidden + b' ' * MAX_BODY
+    with socket.create_connection(server.server_address, timeout=5) as sock:
+        sock.sendall(b'POST /brightness HTTP/1.1\r\nHost: test\r\nContent-Length: %d\r\n\r\n'
+                     % len(body) + body)
+        received = b''
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            received += data
+    assert received.count(b'HTTP/1.1 ') == 1
+    assert received.startswith(b'HTTP/1.1 400 ')
+    assert b'Connection: close' in received
@@ -0,0 +1,77 @@
+"""
+Tests for litra.watch.StatusWatcher against emulated lights
+
+Author: RKaushik
+License: MIT
+"""
+
+import time
+
+import pytest
+
+from litra.emulator import EmulatedLitra, EmulatedLitraDevice, EmulatorBackend
+from litra.watch import StatusWatcher
+
+
+@pytest.fixture
+def lights():
+    lights = [EmulatedLitra(serial_number=f"EMU{i:04d}") for i in (1, 2)]
+    devices = [EmulatedLitraDevice(light) for light in lights]
+    for device in devices:
+        assert device.connect()
+    yield EmulatorBackend(lights), devices
+    for device in devices:
+        device.disconnect()
+
+
+def _collect(watcher: StatusWatcher, count: int, timeout: float = 3.0) -> list:
+    events = []
+    for event in watcher.events(duration=timeout):
+        events.append(event)
+        if len(events) == count:
+            break
+    return events
+
+
+def test_first_sample_then_only_changes(lights):
+    backend, devices = lights
+    backend.play_script([{'at': 0.2, 'serial': 'EMU0002', 'press': 'brightness_up'},
+                         {'at': 0.4, 'serial': 'EMU0002', 'set': {'temperature_kelvin': 5000}}])
+
+    with StatusWatcher(devices, min_interval=0.02, max_interval=0.05) as watcher:
+        events = _collect(watcher, 4)
+
+    first = {event['serial_number']: event for event in events[:2]}
+    assert set(first) == {'EMU0001', 'EMU0002'}
+    for event in first.values():
+        assert event['changed'] == ['power', 'brightness_lumen', 'temperature_kelvin']
+        assert (event['power'], event['brightness_lumen'], event['temperature_kelvin']) == ('off', 100, 4000)
+
+    assert [(event['serial_number'], event['changed']) for event in events[2:]] == \
+        [('EMU0002', ['brightness_lumen']), ('EMU0002', ['temperature_kelvin'])]
+    assert events[2]['brightness_lumen'] == 110
+    assert events[3]['temperature_kelvin'] == 5000
+
+
+def test_unplugged_light_reports_one_error_and_recovers(lights):
+    backend, devices = lights
+    backend.play_script([{'at': 0.2, 'serial': 'EMU0001', 'unplug': True},
+                         {'at': 0.6, 'serial': 'EMU0001', 'set': {'power': True}},
+                         {'at': 0.7, 'serial': 'EMU0001', 'plug': True}])
+
+    with StatusWatcher(devices[:1], min_interval=0.02, max_interval=0.05) as watcher:
+        events = _collect(watcher, 3)
+
+    assert events[0]['power'] == 'off'
+    assert events[1]['serial_number'] == 'EMU0001' and 'error' in events[1]
+    # A fresh full sample once the light answers again
+    assert events[2]['power'] == 'on'
+    assert events[2]['changed'] == ['power', 'brightness_lumen', 'temperature_kelvin']
+
+
+def test_idle_light_backs_off(lights):
+    _, devices = lights
+    with StatusWatcher(devices[:1], min_interval=0.01, max_interval=0.2, backoff=2.0) as watcher:
+        time.sleep(0.5)
+    # 0.01, 0.02, 0.04, ... at most a handful of polls instead of fifty
+    assert watcher.polls <= 8